@@ -0,0 +1,26 @@
+from django.contrib.admin import autodiscover
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
+
+
+def check_discovered_admin(app_configs, **kwargs):
+    """
+    ``check_admin_app`` after discovering the admin modules, which web
+    workers otherwise only load on the first /admin/ request. System checks
+    run from management commands (check, migrate, runserver, test), so
+    workers still start without the admin.
+    """
+    autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class LazyAdminConfig(SimpleAdminConfig):
+    """
+    Admin without discovery at start-up (see config.admin_urls) that still
+    runs the ModelAdmin system checks.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_discovered_admin, checks.Tags.admin)
@@ -0,0 +1,8 @@
+from django.contrib import admin
+
+# Admin modules (and the auth forms they pull in) are registered here, on
+# the first /admin/ request, instead of at start-up; see LazyAdminConfig
+# in INSTALLED_APPS.
+admin.autodiscover()
+
+urlpatterns = admin.site.urls[0]
@@ -0,0 +1,21 @@
+from django.urls import path
+from rest_framework.permissions import AllowAny
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView,
+    TokenRefreshView,
+)
+
+from .throttling import AuthRateThrottle
+
+class PublicTokenObtainPairView(TokenObtainPairView):
+    permission_classes = [AllowAny]
+    throttle_classes = [AuthRateThrottle]
+
+class PublicTokenRefreshView(TokenRefreshView):
+    permission_classes = [AllowAny]
+    throttle_classes = [AuthRateThrottle]
+
+urlpatterns = [
+    path("token/", PublicTokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("token/refresh/", PublicTokenRefreshView.as_view(), name="token_refresh"),
+]
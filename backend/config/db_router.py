@@ -0,0 +1,61 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Route ORM reads inside the block to a replica (if any are configured).
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Pin ORM reads inside the block to the primary, e.g. to read your own writes.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary and reads to a random replica while
+    ``read_from_replica`` is active. ``ReplicaRoutingMiddleware`` enables it
+    for safe requests from clients that have not written recently.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any alias may relate.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
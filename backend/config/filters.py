@@ -0,0 +1,21 @@
+import django_filters
+from rest_framework.exceptions import ValidationError
+
+# Upper bound on ``?ids=`` so a multi-get stays one reasonably sized IN query.
+MAX_IDS = 200
+
+
+class IdListFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    """
+    ``?ids=1,2,3``: fetch those rows with a single ``pk IN (...)`` query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("field_name", "pk")
+        kwargs.setdefault("lookup_expr", "in")
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value and len(value) > MAX_IDS:
+            raise ValidationError({"ids": f"At most {MAX_IDS} ids per request."})
+        return super().filter(qs, value)
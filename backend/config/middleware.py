@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .db_router import read_from_primary, read_from_replica, replica_aliases
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve safe requests from read replicas, except for clients that wrote
+    within the last ``DB_REPLICA_STICKY_SECONDS`` (read-your-writes).
+
+    Clients are identified by their Authorization header, falling back to
+    the remote address. Use a shared cache backend when running several
+    workers so the pin is visible to all of them.
+    """
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @staticmethod
+    def _pin_key(request):
+        identity = request.META.get("HTTP_AUTHORIZATION") or request.META.get("REMOTE_ADDR", "")
+        return "db_pin:" + hashlib.sha1(identity.encode()).hexdigest()
+
+    def __call__(self, request):
+        key = self._pin_key(request)
+        if request.method in SAFE_METHODS and not cache.get(key):
+            with read_from_replica():
+                return self.get_response(request)
+
+        with read_from_primary():
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            cache.set(key, True, settings.DB_REPLICA_STICKY_SECONDS)
+        return response
+
+
+# API payloads only; HTML (admin pages carrying CSRF tokens) is left alone because of BREACH.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/vnd.vendease.columnar+json",
+    "text/csv",
+)
+_encoding_re = _lazy_re_compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def accepted_encodings(header: str) -> dict:
+    """
+    ``Accept-Encoding`` as ``{coding: q}``. q=0 entries are kept: they
+    refuse a coding that ``*`` would otherwise allow.
+    """
+    accepted = {}
+    for part in header.lower().split(","):
+        match = _encoding_re.match(part)
+        if match:
+            try:
+                quality = float(match[2]) if match[2] is not None else 1.0
+            except ValueError:
+                continue
+            accepted[match[1]] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Brotli or gzip compression for API responses of at least
+    ``COMPRESSION_MIN_BYTES``; brotli wins when the client accepts both
+    equally. Streaming responses (the SSE feed) are never compressed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_BYTES
+            or not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        quality = {coding: accepted.get(coding, accepted.get("*", 0)) for coding in ("br", "gzip")}
+        coding = max(quality, key=quality.get)
+        if not quality[coding]:
+            return response
+        if coding == "br":
+            compressed = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = coding
+        # The body bytes changed, so a strong ETag no longer matches them.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,150 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from .filters import MAX_IDS
+
+# Below this many rows an exact COUNT(*) is cheap enough to run.
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for ``queryset``, or None when unavailable.
+
+    Unfiltered querysets use table statistics (``pg_class.reltuples`` on
+    PostgreSQL, ``sqlite_stat1`` on SQLite once ANALYZE has run). Filtered
+    ones use the PostgreSQL planner's estimate for the query.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    filtered = bool(queryset.query.where) or queryset.query.distinct
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            if not filtered:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] >= 0 else None
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        if connection.vendor == "sqlite" and not filtered:
+            try:
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            except Exception:
+                # sqlite_stat1 only exists after the first ANALYZE.
+                return None
+            counts = [int(stat.split()[0]) for (stat,) in cursor.fetchall() if stat]
+            return max(counts) if counts else None
+    return None
+
+
+def fast_count(queryset, threshold=ESTIMATE_THRESHOLD, estimate_filtered=True):
+    """
+    Return ``(count, is_estimate)``: exact for small results, the planner's
+    estimate for large ones.
+
+    A filtered queryset is first counted up to ``threshold`` rows, which
+    settles every small result exactly at bounded cost. Past that it is
+    estimated (at least ``threshold``) where the database can estimate a
+    filtered query, which only PostgreSQL does; elsewhere, or with
+    ``estimate_filtered=False``, it gets an exact ``COUNT(*)``.
+    """
+    if bool(queryset.query.where) or queryset.query.distinct:
+        capped = queryset[:threshold].count()
+        if capped < threshold:
+            return capped, False
+        estimate = estimated_count(queryset) if estimate_filtered else None
+        if estimate is not None:
+            return max(estimate, threshold), True
+        return queryset.count(), False
+    estimate = estimated_count(queryset)
+    if estimate is not None and estimate >= threshold:
+        return estimate, True
+    return queryset.count(), False
+
+
+def count_cache_key(queryset) -> str:
+    sql, params = queryset.query.sql_with_params()
+    signature = f"{queryset.db}:{sql}:{params!r}"
+    return "page_count:" + hashlib.sha1(signature.encode()).hexdigest()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids ``COUNT(*)`` over large tables (used by the admin).
+    """
+
+    estimate_filtered = True
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        self.count_is_estimate = False
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        count, self.count_is_estimate = fast_count(
+            self.object_list, self.estimate_threshold, estimate_filtered=self.estimate_filtered
+        )
+        return count
+
+
+class CachedCountPaginator(EstimatedCountPaginator):
+    """
+    ``fast_count`` counts, with large ones cached per query signature for
+    ``PAGINATION_COUNT_CACHE_SECONDS``, so a large filtered list that has
+    to be counted exactly (no planner estimate on SQLite) pays for it once
+    per cache period rather than on every page.
+    """
+
+    @cached_property
+    def count(self):
+        self.count_is_estimate = False
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        key = count_cache_key(self.object_list)
+        cached = cache.get(key)
+        if cached is not None:
+            count, self.count_is_estimate = cached
+            return count
+        count, self.count_is_estimate = fast_count(self.object_list, self.estimate_threshold)
+        if count >= self.estimate_threshold:
+            cache.set(key, (count, self.count_is_estimate), settings.PAGINATION_COUNT_CACHE_SECONDS)
+        return count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page-number pagination whose ``count`` may be an estimate on large
+    tables; ``count_is_estimate`` says which.
+    """
+
+    django_paginator_class = CachedCountPaginator
+
+    def get_page_size(self, request):
+        page_size = super().get_page_size(request)
+        # A multi-get returns every requested row on one page.
+        ids = request.query_params.get("ids")
+        if ids:
+            return max(page_size, min(len(ids.split(",")), MAX_IDS))
+        return page_size
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["count_is_estimate"] = self.page.paginator.count_is_estimate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_is_estimate"] = {"type": "boolean"}
+        return schema
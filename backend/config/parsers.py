@@ -0,0 +1,30 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import COLUMNAR_MEDIA_TYPE, from_columnar
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc or type(exc).__name__}")
+
+
+class ColumnarJSONParser(JSONParser):
+    """
+    ``{"columns": [...], "rows": [[...]]}`` bodies, parsed to a list of objects.
+    """
+
+    media_type = COLUMNAR_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = super().parse(stream, media_type, parser_context)
+        try:
+            return from_columnar(data)
+        except (KeyError, TypeError) as exc:
+            raise ParseError(f"Columnar JSON needs \"columns\" and \"rows\" - {exc}")
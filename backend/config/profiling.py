@@ -0,0 +1,236 @@
+import json
+import os
+import random
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+# SQL statements kept per profile; the count and total time cover all of them.
+MAX_QUERIES = 200
+# Frame labels cached by the sampler, least recently used dropped first.
+MAX_LABELS = 10000
+
+
+class StackSampler:
+    """
+    Samples the stacks of registered threads every ``interval`` seconds from
+    one background thread, so profiled requests pay almost nothing.
+
+    Stacks are counted in collapsed form (``root;...;leaf``), starting below
+    the frame whose code object is ``root_code``.
+    """
+
+    def __init__(self, interval: float, root_code=None):
+        self.interval = interval
+        self.root_code = root_code
+        # Path prefixes stripped from file names, and an LRU of code object
+        # labels; only the sampler thread reads or writes these.
+        self._prefixes = (
+            str(settings.BASE_DIR),
+            *(path for path in sys.path if path.endswith("-packages")),
+            sysconfig.get_paths()["stdlib"],
+        )
+        self._labels = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id: int) -> Counter:
+        stacks = Counter()
+        with self._lock:
+            self._active[thread_id] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return stacks
+
+    def stop(self, thread_id: int) -> Counter:
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                # Cleared under the lock, so a start() that registers after
+                # this check still sets the event and wakes the wait below.
+                self._wake.clear()
+                active = list(self._active.items())
+            if not active:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[self.collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def collapse(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            if frame.f_code is self.root_code:
+                break
+            labels.append(self._cached_label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _cached_label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = self._label(code)
+            if len(self._labels) > MAX_LABELS:
+                self._labels.popitem(last=False)
+        else:
+            self._labels.move_to_end(code)
+        return label
+
+    def _label(self, code) -> str:
+        filename = code.co_filename
+        for prefix in self._prefixes:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):].lstrip(os.sep)
+                break
+        # Semicolons separate frames in the collapsed format.
+        return f"{code.co_name} ({filename})".replace(";", ":")
+
+
+class QueryRecorder:
+    """
+    ``execute_wrapper`` that notes every statement and its duration.
+    """
+
+    def __init__(self, alias: str, queries: list):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((self.alias, sql, (time.perf_counter() - start) * 1000))
+
+
+class ProfileStore:
+    """
+    Slow-request profiles as JSON files in ``directory``, keeping only the
+    newest ``max_records`` (oldest are deleted on write).
+    """
+
+    def __init__(self, directory, max_records: int):
+        self.directory = Path(directory)
+        self.max_records = max_records
+
+    def save(self, record: dict) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        record_id = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        record["id"] = record_id
+        path = self.directory / f"{record_id}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(record))
+        os.replace(temporary, path)
+        for stale in self.paths()[:-self.max_records]:
+            stale.unlink(missing_ok=True)
+        return record_id
+
+    def paths(self) -> list:
+        if not self.directory.exists():
+            return []
+        # Ids start with a nanosecond timestamp; sort numerically, oldest first.
+        return sorted(self.directory.glob("*.json"), key=lambda path: int(path.stem.split("-")[0]))
+
+    def load(self, record_id: str):
+        path = self.directory / f"{record_id}.json"
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def records(self):
+        """
+        Newest first. Files removed by another worker mid-read are skipped.
+        """
+        for path in reversed(self.paths()):
+            record = self.load(path.stem)
+            if record is not None:
+                yield record
+
+    def clear(self) -> int:
+        paths = self.paths()
+        for path in paths:
+            path.unlink(missing_ok=True)
+        return len(paths)
+
+
+def get_store() -> ProfileStore:
+    return ProfileStore(settings.SLOW_REQUEST_DIR, settings.SLOW_REQUEST_MAX_RECORDS)
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Opt-in (``SLOW_REQUEST_PROFILING``) sampling profiler.
+
+    ``SLOW_REQUEST_SAMPLE_RATE`` of requests are profiled: their thread's
+    stack is sampled every ``SLOW_REQUEST_SAMPLE_INTERVAL_MS`` and their SQL
+    recorded. Those slower than ``SLOW_REQUEST_THRESHOLD_MS`` are written
+    to the on-disk store; inspect them with ``manage.py slow_requests``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = StackSampler(
+            settings.SLOW_REQUEST_SAMPLE_INTERVAL_MS / 1000, root_code=SlowRequestProfilerMiddleware.__call__.__code__
+        )
+        self.store = get_store()
+
+    def __call__(self, request):
+        if random.random() >= settings.SLOW_REQUEST_SAMPLE_RATE:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        queries = []
+        started_at = timezone.now()
+        start = time.perf_counter()
+        stacks = self.sampler.start(thread_id)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(QueryRecorder(alias, queries)))
+                response = self.get_response(request)
+        finally:
+            self.sampler.stop(thread_id)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            match = getattr(request, "resolver_match", None)
+            self.store.save({
+                "started_at": started_at.isoformat(),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": (match.view_name or match._func_path) if match else None,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "interval_ms": settings.SLOW_REQUEST_SAMPLE_INTERVAL_MS,
+                "samples": sum(stacks.values()),
+                "stacks": dict(stacks),
+                "sql_count": len(queries),
+                "sql_ms": round(sum(ms for _, _, ms in queries), 2),
+                "sql": [
+                    {"alias": alias, "sql": sql, "ms": round(ms, 3)} for alias, sql, ms in queries[:MAX_QUERIES]
+                ],
+            })
+        return response
@@ -0,0 +1,67 @@
+import datetime
+import decimal
+import uuid
+
+import msgpack
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.vendease.columnar+json"
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    ``Accept: application/msgpack`` (or ``?format=msgpack``).
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+def to_columnar(rows: list) -> dict:
+    """
+    ``[{"a": 1, "b": 2}, ...]`` -> ``{"columns": ["a", "b"], "rows": [[1, 2], ...]}``.
+
+    Columns are the union of the rows' keys in first-seen order; a row
+    without one of them gets null.
+    """
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    return {"columns": columns, "rows": [[row.get(column) for column in columns] for row in rows]}
+
+
+def from_columnar(data: dict) -> list:
+    columns = data["columns"]
+    return [dict(zip(columns, row)) for row in data["rows"]]
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Lists of objects as ``{"columns": [...], "rows": [[...], ...]}`` so key
+    names are sent once. Paginated responses keep their envelope with
+    ``results`` in that form; anything else renders as plain JSON.
+    """
+
+    media_type = COLUMNAR_MEDIA_TYPE
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = to_columnar(data)
+        elif isinstance(data, dict) and "count" in data and isinstance(data.get("results"), list):
+            data = {**data, "results": to_columnar(data["results"])}
+        return super().render(data, accepted_media_type, renderer_context)
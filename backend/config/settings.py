@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -39,7 +40,8 @@ if not DEBUG and not ALLOWED_HOSTS:
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are autodiscovered lazily by config.admin_urls (and by the system checks).
+    'config.admin_apps.LazyAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -55,6 +57,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.profiling.SlowRequestProfilerMiddleware',
+    'config.middleware.CompressionMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
@@ -89,13 +94,97 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# Set DB_ENGINE=postgresql for production. DB_REPLICA_HOSTS is a comma-separated
+# list of host[:port] read replicas; safe requests are routed to them by
+# config.db_router.PrimaryReplicaRouter.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60' if DB_ENGINE == 'postgresql' else '0'))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5'))
+
+# SQLite production mode: WAL (readers never block the writer), writers
+# queue on the lock for up to SQLITE_BUSY_TIMEOUT seconds instead of failing
+# with "database is locked", and transactions take the write lock up front
+# (BEGIN IMMEDIATE) so they can't deadlock upgrading from a read lock.
+SQLITE_HARDENED = os.environ.get('SQLITE_HARDENED', 'True') == 'True'
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', '20'))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))
+
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': SQLITE_BUSY_TIMEOUT,
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        # Durable across application crashes; only an OS crash can lose the last commits.
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+        f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',
+        'PRAGMA temp_store=MEMORY',
+    ]),
 }
 
+def postgres_database(host, port=None, **extra):
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'vendease'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': host,
+        'PORT': port or os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+        },
+        **extra,
+    }
+
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': postgres_database(os.environ.get('DB_HOST', 'localhost')),
+    }
+    for index, replica in enumerate(DB_REPLICA_HOSTS, start=1):
+        host, _, port = replica.partition(':')
+        DATABASES[f'replica_{index}'] = postgres_database(host, port, TEST={'MIRROR': 'default'})
+else:
+    DATABASES = {
+        'default': {
+            # Stock SQLite backend plus cross-process write queueing (config/sqlite_backend).
+            'ENGINE': 'config.sqlite_backend' if SQLITE_HARDENED else 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': SQLITE_OPTIONS if SQLITE_HARDENED else {},
+            # A file, not the shared-cache memory database, so the
+            # concurrency tests see real locking instead of "table is locked".
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+
+
+# Cache
+# Set REDIS_URL to share the cache (replica pins, throttles, counts) across workers.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -140,6 +229,8 @@ CORS_ALLOWED_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ALLOWE
 # If CORS_ALLOWED_ORIGINS is set, use it; otherwise allow all
 CORS_ALLOW_ALL_ORIGINS = os.environ.get('CORS_ALLOW_ALL_ORIGINS', 'True') == 'True' if not CORS_ALLOWED_ORIGINS else False
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-match')
+CORS_EXPOSE_HEADERS = ['ETag', 'Idempotent-Replayed']
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -148,6 +239,92 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # Picked by the Accept header (or ?format=): JSON, MessagePack, columnar JSON.
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "config.renderers.MessagePackRenderer",
+        "config.renderers.ColumnarJSONRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "config.parsers.MessagePackParser",
+        "config.parsers.ColumnarJSONParser",
+    ),
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.EstimatedCountPagination",
     "PAGE_SIZE": 10,
-}
\ No newline at end of file
+    "DEFAULT_THROTTLE_CLASSES": (
+        "config.throttling.ClientRateThrottle",
+        "config.throttling.AnonRateThrottle",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "client": os.environ.get('THROTTLE_RATE_CLIENT', '600/min'),
+        "anon": os.environ.get('THROTTLE_RATE_ANON', '60/min'),
+        "auth": os.environ.get('THROTTLE_RATE_AUTH', '10/min'),
+    },
+}
+
+# Sampling profiler for slow requests (see `manage.py slow_requests`)
+SLOW_REQUEST_PROFILING = os.environ.get('SLOW_REQUEST_PROFILING', 'False') == 'True'
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '0.1'))
+SLOW_REQUEST_SAMPLE_INTERVAL_MS = float(os.environ.get('SLOW_REQUEST_SAMPLE_INTERVAL_MS', '5'))
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '500'))
+SLOW_REQUEST_DIR = os.environ.get('SLOW_REQUEST_DIR', str(BASE_DIR / 'slow_requests'))
+SLOW_REQUEST_MAX_RECORDS = int(os.environ.get('SLOW_REQUEST_MAX_RECORDS', '200'))
+
+# Response compression (config.middleware.CompressionMiddleware)
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# Most sub-requests one /api/batch/ call may carry
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+
+# How long large list counts are cached per filter signature (seconds)
+PAGINATION_COUNT_CACHE_SECONDS = int(os.environ.get('PAGINATION_COUNT_CACHE_SECONDS', '10'))
+
+# Background maintenance jobs (vendor deletion, PO purge)
+MAINTENANCE_JOBS_IN_PROCESS = os.environ.get('MAINTENANCE_JOBS_IN_PROCESS', 'True') == 'True'
+MAINTENANCE_JOB_WORKERS = int(os.environ.get('MAINTENANCE_JOB_WORKERS', '2'))
+MAINTENANCE_JOB_CHUNK_SIZE = int(os.environ.get('MAINTENANCE_JOB_CHUNK_SIZE', '500'))
+# Completed/canceled POs ordered more than this many days ago are archived
+PO_ARCHIVE_AFTER_DAYS = int(os.environ.get('PO_ARCHIVE_AFTER_DAYS', '365'))
+
+# Delivery analytics / ETA profiles are cached per vendor for this long (seconds)
+ANALYTICS_CACHE_SECONDS = int(os.environ.get('ANALYTICS_CACHE_SECONDS', '300'))
+
+# Throttling: in-process token buckets, optionally synced through CACHES
+THROTTLE_SHARED_SYNC = os.environ.get('THROTTLE_SHARED_SYNC', 'False') == 'True'
+THROTTLE_SYNC_INTERVAL = float(os.environ.get('THROTTLE_SYNC_INTERVAL', '1.0'))
+THROTTLE_MAX_BUCKETS = int(os.environ.get('THROTTLE_MAX_BUCKETS', '10000'))
+# How long a worker remembers which vendor a user belongs to (seconds)
+THROTTLE_VENDOR_CACHE_SECONDS = float(os.environ.get('THROTTLE_VENDOR_CACHE_SECONDS', '60'))
+
+# Server-sent events (/api/purchase_orders/events/)
+EVENT_STREAM_QUEUE_SIZE = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', '100'))
+EVENT_STREAM_KEEPALIVE_SECONDS = int(os.environ.get('EVENT_STREAM_KEEPALIVE_SECONDS', '15'))
+EVENT_STREAM_TICKET_SECONDS = int(os.environ.get('EVENT_STREAM_TICKET_SECONDS', '30'))
+
+# How long a stored Idempotency-Key response is replayed (seconds)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+
+# Outbound webhooks (sent by `manage.py dispatch_webhooks`)
+WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', '100'))
+WEBHOOK_CONCURRENCY = int(os.environ.get('WEBHOOK_CONCURRENCY', '10'))
+WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_TIMEOUT_SECONDS', '10'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.environ.get('WEBHOOK_RETRY_BASE_SECONDS', '30'))
+WEBHOOK_RETRY_MAX_SECONDS = float(os.environ.get('WEBHOOK_RETRY_MAX_SECONDS', str(6 * 60 * 60)))
+WEBHOOK_POLL_INTERVAL = float(os.environ.get('WEBHOOK_POLL_INTERVAL', '1.0'))
+# Allow http and private/loopback hosts (only for local testing with webhook_stub_server)
+WEBHOOK_ALLOW_PRIVATE_URLS = os.environ.get('WEBHOOK_ALLOW_PRIVATE_URLS', 'False') == 'True'
+
+# Change log rows younger than this are not handed out as sync cursors: ids
+# are allocated at insert but commit out of order, so a recent gap may still fill.
+# Keep it above the longest transaction that writes purchase orders.
+CHANGE_LOG_SETTLE_SECONDS = float(os.environ.get('CHANGE_LOG_SETTLE_SECONDS', '10'))
+
+# Spend cube snapshot for warm restarts (empty disables; see `manage.py spend_cube`)
+SPEND_CUBE_SNAPSHOT = os.environ.get('SPEND_CUBE_SNAPSHOT', str(BASE_DIR / 'spend_cube.npz'))
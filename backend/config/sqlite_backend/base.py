@@ -0,0 +1,84 @@
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to SQLite's own busy waiting.
+    fcntl = None
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend that queues write transactions on an ``flock`` of
+    ``<NAME>.lock`` before ``BEGIN IMMEDIATE``.
+
+    Without it, concurrent writers wait in SQLite's busy handler, which
+    polls with growing sleeps: throughput holds up but unlucky writers wait
+    seconds. Waiters poll the kernel lock every few milliseconds, and give
+    up with "database is locked" after the busy timeout, as SQLite would.
+    Autocommit statements outside ``atomic()`` don't take it; they are
+    single statements and fall back to ``busy_timeout``.
+    """
+
+    _write_lock = None
+    _write_locked = False
+
+    def _serializes_writes(self):
+        return fcntl is not None and self.transaction_mode == "IMMEDIATE" and not self.is_in_memory_db()
+
+    def _acquire_write_lock(self):
+        if not self._serializes_writes() or self._write_locked:
+            return
+        if self._write_lock is None:
+            self._write_lock = open(f"{self.settings_dict['NAME']}.lock", "a")
+        # Poll rather than block, so the busy timeout still bounds the wait
+        # and a stuck writer makes the others fail instead of hang.
+        timeout = self.settings_dict["OPTIONS"].get("timeout", 5)
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(self._write_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise OperationalError(f"database is locked (waited {timeout:g}s for the write lock)")
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                delay = min(delay * 2, 0.01)
+        self._write_locked = True
+
+    def _release_write_lock(self):
+        if self._write_locked:
+            fcntl.flock(self._write_lock, fcntl.LOCK_UN)
+            self._write_locked = False
+
+    def _start_transaction_under_autocommit(self):
+        self._acquire_write_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
+            if self._write_lock is not None:
+                self._write_lock.close()
+                self._write_lock = None
@@ -0,0 +1,82 @@
+"""
+Cold-start probe: ``python -X importtime -m config.startup [path ...]``.
+
+Imports the ASGI application the way a fresh worker does, sends it the
+given GET requests and prints one JSON line with the time and memory at
+each phase. ``manage.py startup_profile`` runs it in clean interpreters
+and combines the output with the ``-X importtime`` report.
+"""
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+
+def rss_kb() -> int:
+    """
+    Resident set size right now (``ru_maxrss`` only ever grows).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def get(application, path: str) -> int:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Nothing more to read; wait like a client that keeps the connection open.
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    return status
+
+
+def measure(paths) -> dict:
+    phases = []
+    start = time.perf_counter()
+
+    def mark(name, **extra):
+        phases.append({"phase": name, "ms": round((time.perf_counter() - start) * 1000, 2), "rss_kb": rss_kb(), **extra})
+
+    mark("interpreter")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    from config.asgi import application
+    mark("application")
+    for index, path in enumerate(paths):
+        status = asyncio.run(get(application, path))
+        mark("first request" if index == 0 else "request", path=path, status=status)
+    return {"phases": phases, "modules": sorted(sys.modules)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure(sys.argv[1:] or ["/api/vendors/"])))
@@ -0,0 +1,277 @@
+import gzip
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import brotli
+import msgpack
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from config import profiling, throttling
+from config.middleware import accepted_encodings
+from config.pagination import CachedCountPaginator, fast_count
+from config.profiling import StackSampler
+from config.renderers import COLUMNAR_MEDIA_TYPE, from_columnar
+from config.throttling import BucketRegistry, ClientRateThrottle, vendor_id_for
+from config.sqlite_backend.base import DatabaseWrapper
+from config.views import ThrottleStatsView
+from vendors.models import Vendor
+
+
+class SQLiteWriteLockTests(SimpleTestCase):
+    def connect(self, name, timeout):
+        return DatabaseWrapper({
+            "NAME": name,
+            "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": timeout},
+            "TIME_ZONE": None,
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "AUTOCOMMIT": True,
+            "ATOMIC_REQUESTS": False,
+        }, alias="write_lock_test")
+
+    def test_waiting_writer_gives_up_after_the_busy_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            name = str(Path(directory) / "db.sqlite3")
+            holder, waiter = self.connect(name, 5), self.connect(name, 0.2)
+            holder.ensure_connection()
+            waiter.ensure_connection()
+            try:
+                # What atomic() does on SQLite to open a transaction.
+                holder._start_transaction_under_autocommit()
+                started = time.monotonic()
+                with self.assertRaisesMessage(OperationalError, "database is locked"):
+                    waiter._start_transaction_under_autocommit()
+                self.assertLess(time.monotonic() - started, 2)
+
+                holder._rollback()
+                waiter._start_transaction_under_autocommit()  # The lock is free again.
+                waiter._rollback()
+            finally:
+                holder.close()
+                waiter.close()
+
+
+class StackSamplerTests(SimpleTestCase):
+    def test_every_start_is_sampled_after_the_sampler_went_idle(self):
+        sampler = StackSampler(0.001)
+        thread_id = threading.get_ident()
+        for _ in range(50):
+            stacks = sampler.start(thread_id)
+            deadline = time.monotonic() + 2
+            while not stacks and time.monotonic() < deadline:
+                time.sleep(0.001)
+            sampler.stop(thread_id)
+            self.assertTrue(stacks)
+            # Let the sampler find nothing active and go back to waiting.
+            time.sleep(0.003)
+
+    def test_label_cache_is_bounded(self):
+        sampler = StackSampler(1)
+        codes = [compile(f"x = {number}", f"generated_{number}.py", "exec") for number in range(5)]
+        with mock.patch.object(profiling, "MAX_LABELS", 3):
+            for code in codes[:3]:
+                sampler._cached_label(code)
+            sampler._cached_label(codes[0])
+            for code in codes[3:]:
+                sampler._cached_label(code)
+        self.assertEqual(list(sampler._labels), [codes[0], codes[3], codes[4]])
+
+
+class BatchViewTests(TestCase):
+    def test_crashing_sub_request_does_not_fail_the_batch(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin"))
+
+        with mock.patch.object(ThrottleStatsView, "get", side_effect=RuntimeError("boom")), \
+                self.assertLogs("config.views", "ERROR"):
+            response = client.get("/api/batch/", {"path": ["/api/throttle/stats/", "/api/vendors/"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in response.data["results"]], [500, 200])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_bursts_up_to_capacity_then_waits_for_a_refill(self):
+        registry = BucketRegistry()
+        self.assertEqual([registry.take("k", 3, 1.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        wait = registry.take("k", 3, 1.0)
+        self.assertGreater(wait, 0.9)
+        self.assertLessEqual(wait, 1.0)
+        self.assertEqual(registry.take("other", 3, 1.0), 0.0)
+
+    def test_least_recently_used_bucket_is_evicted(self):
+        registry = BucketRegistry(max_buckets=2)
+        registry.take("a", 1, 0.001)
+        registry.take("b", 1, 0.001)
+        self.assertGreater(registry.take("a", 1, 0.001), 0)
+        registry.take("c", 1, 0.001)
+        self.assertEqual(registry.snapshot()["buckets"], 2)
+        self.assertGreater(registry.take("a", 1, 0.001), 0)
+        self.assertEqual(registry.take("b", 1, 0.001), 0.0)
+
+    @override_settings(THROTTLE_SHARED_SYNC=True, THROTTLE_SYNC_INTERVAL=0)
+    def test_shared_sync_drains_later_requests_not_the_one_it_counted(self):
+        cache.clear()
+        first, second = BucketRegistry(), BucketRegistry()
+        self.assertEqual([first.take("k", 3, 0.01) for _ in range(3)], [0.0, 0.0, 0.0])
+        # The second worker still had a token, so this request goes through...
+        self.assertEqual(second.take("k", 3, 0.01), 0.0)
+        # ...but the fleet is over its limit, so the next one waits.
+        self.assertGreater(second.take("k", 3, 0.01), 0)
+
+
+class ClientThrottleKeyTests(TestCase):
+    def setUp(self):
+        # User ids are reused between tests; start from an empty memo.
+        throttling._vendor_ids.clear()
+
+    def key(self, user):
+        return ClientRateThrottle().get_cache_key(mock.Mock(user=user), None)
+
+    def test_key_follows_vendor_profile_changes(self):
+        user = User.objects.create_user("portal")
+        self.assertEqual(self.key(user), f"user:{user.pk}")
+
+        first = Vendor.objects.create(name="A", contact_details="-", address="-", vendor_code="A", user=user)
+        user = User.objects.get(pk=user.pk)
+        self.assertEqual(self.key(user), f"vendor:{first.pk}")
+
+        first.user = None
+        first.save()
+        second = Vendor.objects.create(name="B", contact_details="-", address="-", vendor_code="B", user=user)
+        user = User.objects.get(pk=user.pk)
+        self.assertEqual(self.key(user), f"vendor:{second.pk}")
+
+        second.delete()
+        user = User.objects.get(pk=user.pk)
+        self.assertEqual(self.key(user), f"user:{user.pk}")
+
+    def test_memo_expires(self):
+        user = User.objects.create_user("portal")
+        self.assertIsNone(vendor_id_for(user))
+        # Linked by another worker: no signal reaches this process.
+        vendor = Vendor.objects.create(name="A", contact_details="-", address="-", vendor_code="A")
+        Vendor.objects.filter(pk=vendor.pk).update(user=user)
+        user = User.objects.get(pk=user.pk)
+        self.assertIsNone(vendor_id_for(user))
+        with mock.patch("config.throttling.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(vendor_id_for(user), vendor.pk)
+
+
+class PaginationCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for number in range(7):
+            code = f"{'AB'[number % 2]}{number}"
+            Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code)
+
+    def test_small_filtered_results_are_counted_exactly_with_a_capped_query(self):
+        filtered = Vendor.objects.filter(vendor_code__startswith="A")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(fast_count(filtered, threshold=5), (4, False))
+        self.assertEqual(len(queries), 1)
+        self.assertIn("LIMIT 5", queries[0]["sql"])
+
+    def test_large_filtered_results_use_the_planner_estimate_when_there_is_one(self):
+        filtered = Vendor.objects.filter(name__gte="")
+        # SQLite cannot estimate a filtered query: exact count.
+        self.assertEqual(fast_count(filtered, threshold=5), (7, False))
+        with mock.patch("config.pagination.estimated_count", return_value=2):
+            # A low estimate never undercuts the rows already counted.
+            self.assertEqual(fast_count(filtered, threshold=5), (5, True))
+        with mock.patch("config.pagination.estimated_count", return_value=900):
+            self.assertEqual(fast_count(filtered, threshold=5), (900, True))
+            self.assertEqual(fast_count(filtered, threshold=5, estimate_filtered=False), (7, False))
+
+    def test_unfiltered_tables_are_estimated_only_when_large(self):
+        with mock.patch("config.pagination.estimated_count", return_value=3):
+            self.assertEqual(fast_count(Vendor.objects.all(), threshold=5), (7, False))
+        with mock.patch("config.pagination.estimated_count", return_value=50000):
+            self.assertEqual(fast_count(Vendor.objects.all(), threshold=5), (50000, True))
+
+    def test_large_counts_are_cached(self):
+        queryset = Vendor.objects.filter(name__gte="").order_by("pk")
+        with mock.patch.object(CachedCountPaginator, "estimate_threshold", 5):
+            self.assertEqual(CachedCountPaginator(queryset, 2).count, 7)
+            Vendor.objects.filter(vendor_code="A0").delete()
+            self.assertEqual(CachedCountPaginator(queryset, 2).count, 7)
+            cache.clear()
+            self.assertEqual(CachedCountPaginator(queryset, 2).count, 6)
+
+    def test_list_response_says_whether_the_count_is_estimated(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("buyer"))
+        body = client.get("/api/vendors/").json()
+        self.assertEqual((body["count"], body["count_is_estimate"], len(body["results"])), (7, False, 7))
+
+
+class NegotiationTests(TestCase):
+    def setUp(self):
+        for number in range(10):
+            Vendor.objects.create(
+                name=f"Vendor {number}", contact_details="contact@example.com", address="1 Long Street",
+                vendor_code=f"V{number}",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("viewer"))
+        self.results = self.client.get("/api/vendors/", HTTP_ACCEPT_ENCODING="identity").json()["results"]
+
+    def test_accept_selects_the_renderer(self):
+        response = self.client.get("/api/vendors/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content)["results"], self.results)
+
+        response = self.client.get("/api/vendors/", HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+        self.assertTrue(response["Content-Type"].startswith(COLUMNAR_MEDIA_TYPE))
+        body = response.json()
+        self.assertEqual(body["count"], 10)
+        self.assertEqual(body["results"]["columns"], list(self.results[0]))
+        self.assertEqual(from_columnar(body["results"]), self.results)
+
+        self.assertEqual(self.client.get("/api/vendors/", HTTP_ACCEPT="text/x-unknown").status_code, 406)
+
+    def test_content_type_selects_the_parser(self):
+        fields = {"name": "Packed", "contact_details": "-", "address": "-", "vendor_code": "PACKED"}
+        response = self.client.post("/api/vendors/", msgpack.packb(fields), content_type="application/msgpack")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Vendor.objects.filter(vendor_code="PACKED").exists())
+        response = self.client.post("/api/vendors/", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+
+    def test_accept_encoding_selects_the_compression(self):
+        cases = (
+            ("gzip, br", "br"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("*", "br"),
+            ("br;q=0, *;q=0.3", "gzip"),
+            ("gzip;q=0, br;q=0", None),
+            ("identity", None),
+            ("", None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                response = self.client.get("/api/vendors/", HTTP_ACCEPT_ENCODING=header)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertEqual(response.get("Content-Encoding"), expected)
+                body = response.content
+                if expected == "br":
+                    body = brotli.decompress(body)
+                elif expected == "gzip":
+                    body = gzip.decompress(body)
+                self.assertEqual(json.loads(body)["results"], self.results)
+
+    def test_small_responses_are_left_alone(self):
+        with override_settings(COMPRESSION_MIN_BYTES=10**6):
+            response = self.client.get("/api/vendors/", HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(accepted_encodings("GZip;q=0.5, br;q=0, deflate"), {"gzip": 0.5, "br": 0.0, "deflate": 1.0})
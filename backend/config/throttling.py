@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a DRF style rate (``"100/min"``) into ``(capacity, tokens_per_second)``.
+    """
+    if rate is None:
+        return None, None
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "synced_used")
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated = now
+        # Tokens spent locally since the last shared-cache sync.
+        self.synced_used = 0
+
+    def take(self, capacity, refill_rate, now):
+        """
+        Spend one token. Returns 0.0 if allowed, else the seconds until a
+        token is available.
+        """
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * refill_rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.synced_used += 1
+            return 0.0
+        return (1 - self.tokens) / refill_rate
+
+
+class BucketRegistry:
+    """
+    Process-local token buckets, least recently used evicted first.
+
+    Every check is a dict lookup and some arithmetic under one lock; no
+    I/O happens on the request path unless shared sync is enabled.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sync = {}
+        self.stats = Counter()
+
+    def take(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(capacity, now)
+                if len(self._buckets) > self.max_buckets:
+                    evicted, _ = self._buckets.popitem(last=False)
+                    self._last_sync.pop(evicted, None)
+            else:
+                self._buckets.move_to_end(key)
+            wait = bucket.take(capacity, refill_rate, now)
+            if settings.THROTTLE_SHARED_SYNC and now - self._last_sync.get(key, 0) >= settings.THROTTLE_SYNC_INTERVAL:
+                self._last_sync[key] = now
+                used, bucket.synced_used = bucket.synced_used, 0
+            else:
+                used = None
+        if used is not None:
+            self._sync(key, bucket, capacity, refill_rate, used)
+        return wait
+
+    def _sync(self, key, bucket, capacity, refill_rate, used):
+        """
+        Share consumption with other workers through the cache.
+
+        Each worker adds what it spent since its last sync to a counter for
+        the current refill window, then drains its own bucket by what the
+        other workers spent. Between syncs a worker only sees its own traffic,
+        so the fleet-wide limit is approximate by up to one sync interval.
+        The drain applies from the next request on: the one that triggered
+        the sync was already decided (and its token spent) locally.
+        """
+        window = max(1, int(capacity / refill_rate))
+        cache_key = f"throttle:{key}:{int(time.time() // window)}"
+        try:
+            cache.add(cache_key, 0, window * 2)
+            total = cache.incr(cache_key, used)
+        except Exception:
+            return
+        with self._lock:
+            bucket.tokens = min(bucket.tokens, capacity - total)
+
+    def record(self, scope, throttled):
+        with self._lock:
+            self.stats[(scope, "throttled" if throttled else "allowed")] += 1
+
+    def snapshot(self):
+        with self._lock:
+            scopes = {}
+            for (scope, outcome), count in self.stats.items():
+                scopes.setdefault(scope, {"allowed": 0, "throttled": 0})[outcome] = count
+            return {"buckets": len(self._buckets), "scopes": scopes}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._last_sync.clear()
+            self.stats.clear()
+
+
+registry = BucketRegistry(getattr(settings, "THROTTLE_MAX_BUCKETS", 10000))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle; ``scope`` picks the rate from
+    ``DEFAULT_THROTTLE_RATES``. ``"100/min"`` means bursts of up to 100
+    requests, refilled at 100 per minute.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.capacity, self.refill_rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        self._wait = None
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError(".get_cache_key() must be overridden")
+
+    def allow_request(self, request, view):
+        if self.capacity is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self._wait = registry.take(f"{self.scope}:{key}", self.capacity, self.refill_rate)
+        registry.record(self.scope, bool(self._wait))
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+_vendor_ids = OrderedDict()
+_vendor_ids_lock = threading.Lock()
+
+
+def vendor_id_for(user):
+    """
+    The user's vendor id (or None), memoised per process for
+    ``THROTTLE_VENDOR_CACHE_SECONDS`` so buyers don't pay a vendor-profile
+    query on every request. Vendor saves and deletes in this process clear
+    the affected entries (``forget_vendor``); the expiry covers the others.
+    """
+    now = time.monotonic()
+    with _vendor_ids_lock:
+        entry = _vendor_ids.get(user.pk)
+        if entry is not None and entry[1] > now:
+            _vendor_ids.move_to_end(user.pk)
+            return entry[0]
+    vendor = getattr(user, "vendor_profile", None)
+    vendor_id = vendor.pk if vendor is not None else None
+    with _vendor_ids_lock:
+        _vendor_ids[user.pk] = (vendor_id, now + settings.THROTTLE_VENDOR_CACHE_SECONDS)
+        _vendor_ids.move_to_end(user.pk)
+        if len(_vendor_ids) > registry.max_buckets:
+            _vendor_ids.popitem(last=False)
+    return vendor_id
+
+
+def forget_vendor(vendor_id, user_id=None) -> None:
+    """
+    Drop the memoised entries of ``user_id`` and of every user mapped to
+    ``vendor_id``, after the vendor's profile link changed or it was deleted.
+    """
+    with _vendor_ids_lock:
+        stale = [pk for pk, (cached, _) in _vendor_ids.items() if pk == user_id or cached == vendor_id]
+        for pk in stale:
+            del _vendor_ids[pk]
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """
+    Authenticated clients: one bucket per vendor (shared by all of a
+    vendor's tokens), otherwise one per user.
+    """
+
+    scope = "client"
+
+    def get_cache_key(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return None
+        vendor_id = vendor_id_for(user)
+        if vendor_id is not None:
+            return f"vendor:{vendor_id}"
+        return f"user:{user.pk}"
+
+
+class AnonRateThrottle(TokenBucketThrottle):
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f"ip:{self.get_ident(request)}"
+
+
+class AuthRateThrottle(TokenBucketThrottle):
+    """
+    Per-IP limit for the public registration and token endpoints, which
+    hash passwords and so are expensive to serve.
+    """
+
+    scope = "auth"
+
+    def get_cache_key(self, request, view):
+        return f"ip:{self.get_ident(request)}"
+
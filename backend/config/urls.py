@@ -1,22 +1,24 @@
-from django.contrib import admin
 from django.urls import path, include
-from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
 
-class PublicTokenObtainPairView(TokenObtainPairView):
-    permission_classes = [AllowAny]
+from .views import BatchView, ThrottleStatsView
+
+
+def lazy_include(module: str, namespace: str | None = None):
+    """
+    Like ``include()``, but ``module`` is imported by the first request
+    routed into it (or the first ``reverse()`` needing it) instead of when
+    the URLconf loads. For rarely used, import-heavy sections.
+    """
+    return (module, namespace, namespace)
 
-class PublicTokenRefreshView(TokenRefreshView):
-    permission_classes = [AllowAny]
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("admin/", lazy_include("config.admin_urls", "admin")),
+    path("api/auth/", lazy_include("config.auth_urls")),
+    path("api/vendors/register/", lazy_include("vendors.registration")),
     path("api/", include("vendors.urls")),
     path("api/", include("purchase_orders.urls")),
 
-    path("api/auth/token/", PublicTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/auth/token/refresh/", PublicTokenRefreshView.as_view(), name="token_refresh"),
-]
\ No newline at end of file
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/throttle/stats/", ThrottleStatsView.as_view(), name="throttle-stats"),
+]
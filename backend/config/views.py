@@ -0,0 +1,95 @@
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .throttling import registry
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleStatsView(APIView):
+    """
+    Allowed/throttled counts per scope for this worker process.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+
+class BatchView(APIView):
+    """
+    Run several GET requests in one round trip:
+    ``/api/batch/?path=/api/vendors/1/&path=/api/vendor/purchase_orders/?page=2``
+    (each ``path`` URL-encoded).
+
+    Sub-requests reuse the batch request's authentication instead of
+    decoding the token again, run one after another on this request's
+    database connection, and still go through each view's permission and
+    throttle checks. Each result is ``{"path", "status", "body"}`` plus
+    ``etag`` when the view sent one. A sub-request that crashes gets a 500
+    result; the others still run.
+    """
+
+    # Every sub-request is throttled on its own.
+    throttle_classes = []
+
+    def get(self, request):
+        paths = request.query_params.getlist("path")
+        if not paths:
+            return Response({"path": "Pass at least one path."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(paths) > settings.BATCH_MAX_REQUESTS:
+            return Response(
+                {"path": f"At most {settings.BATCH_MAX_REQUESTS} paths per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"results": [self.run(request, path) for path in paths]})
+
+    def run(self, request, path):
+        url = urlsplit(path)
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            match = None
+        view_class = getattr(match.func, "cls", None) if match else None
+        # Only DRF views run synchronously against a plain HttpRequest (not the SSE stream or batch itself).
+        if url.scheme or url.netloc or view_class is None or issubclass(view_class, BatchView):
+            return {"path": path, "status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+
+        try:
+            response = match.func(self.sub_request(request, url, match), *match.args, **match.kwargs)
+        except Exception:
+            # DRF has already turned API errors into responses; this is an unhandled one.
+            logger.exception("Batch sub-request %s failed", path)
+            return {"path": path, "status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"detail": "Server error."}}
+        result = {"path": path, "status": response.status_code, "body": getattr(response, "data", None)}
+        if response.has_header("ETag"):
+            result["etag"] = response["ETag"]
+        return result
+
+    @staticmethod
+    def sub_request(request, url, match):
+        parent = request._request
+        sub = HttpRequest()
+        sub.method = "GET"
+        sub.path = sub.path_info = url.path
+        sub.META = {
+            key: value for key, value in parent.META.items() if key not in ("CONTENT_LENGTH", "CONTENT_TYPE")
+        }
+        sub.META.update(REQUEST_METHOD="GET", PATH_INFO=url.path, QUERY_STRING=url.query)
+        sub.GET = QueryDict(url.query)
+        sub.resolver_match = match
+        sub.user = parent.user
+        # Picked up by rest_framework.request.Request in place of the authenticators.
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        return sub
@@ -0,0 +1,71 @@
+from django.db import router, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .models import PurchaseOrder
+
+MAX_ATTEMPTS = 5
+
+
+class AcknowledgeConflict(Exception):
+    """
+    The PO kept changing underneath us; the caller may retry.
+    """
+
+
+def acknowledge_purchase_order(queryset, pk, source="", changes=None):
+    """
+    Acknowledge a PO with one version-guarded conditional UPDATE.
+
+    Only the request whose ``UPDATE ... WHERE version = v AND
+    acknowledgment_date IS NULL`` matches a row does any write or metric
+    work. Everyone else sees the PO already acknowledged and gets it back
+    unchanged, except that ``changes`` (such as a revised
+    ``expected_delivery_date``) that differ from the stored values are
+    still applied, guarded by the version alone. Returns ``(po,
+    acknowledged_now)``.
+
+    The post-save signal pipeline (metrics, buckets, event log, change log,
+    SSE) runs once for each write.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        po = get_object_or_404(queryset, pk=pk)
+        acknowledging = po.acknowledgment_date is None
+        if acknowledging:
+            values = {
+                "acknowledgment_date": timezone.now(),
+                "status": "acknowledged" if po.status == "pending" else po.status,
+                **(changes or {}),
+            }
+        else:
+            values = {field: value for field, value in (changes or {}).items() if getattr(po, field) != value}
+            if not values:
+                return po, False
+
+        previous = po.metric_snapshot()
+        with transaction.atomic(using=router.db_for_write(PurchaseOrder)):
+            claim = PurchaseOrder.objects.filter(pk=po.pk, version=po.version)
+            if acknowledging:
+                claim = claim.filter(acknowledgment_date__isnull=True)
+            updated = claim.update(version=F("version") + 1, **values)
+            if not updated:
+                # Lost the race or the row changed since we read it; look again.
+                continue
+
+            for field, value in values.items():
+                setattr(po, field, value)
+            po.version += 1
+            po._previous_snapshot = previous
+            po._event_source = source
+            post_save.send(
+                sender=PurchaseOrder,
+                instance=po,
+                created=False,
+                update_fields=frozenset(values) | {"version"},
+                raw=False,
+                using=router.db_for_write(PurchaseOrder),
+            )
+        return po, acknowledging
+    raise AcknowledgeConflict
@@ -1,3 +1,83 @@
 from django.contrib import admin
+from django.db import transaction
 
-# Register your models here.
+from config.pagination import EstimatedCountPaginator
+from vendors.admin import VendorListFilter
+from vendors.metrics import deferred_recalc
+from .acknowledgement import acknowledge_purchase_order
+from .models import PurchaseOrder, WebhookDelivery, WebhookEndpoint
+from .webhooks import requeue_dead
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ("po_number", "vendor", "status", "order_date", "expected_delivery_date", "quality_rating")
+    list_select_related = ("vendor",)
+    list_filter = ("status", VendorListFilter)
+    search_fields = ("=po_number",)
+    autocomplete_fields = ("vendor",)
+    readonly_fields = ("version",)
+    ordering = ("-pk",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    actions = ["acknowledge_selected", "complete_selected"]
+
+    def save_model(self, request, obj, form, change):
+        obj._event_source = "admin"
+        super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        obj._event_source = "admin"
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # Every delete still runs the PO signals; metrics are recomputed once per vendor.
+        with transaction.atomic(), deferred_recalc():
+            for po in queryset:
+                po._event_source = "admin"
+                po.delete()
+
+    @admin.action(description="Acknowledge selected purchase orders")
+    def acknowledge_selected(self, request, queryset):
+        acknowledged = 0
+        with transaction.atomic(), deferred_recalc():
+            for pk in queryset.filter(acknowledgment_date__isnull=True).values_list("pk", flat=True):
+                _, changed = acknowledge_purchase_order(PurchaseOrder.objects.all(), pk, source="admin")
+                acknowledged += changed
+        self.message_user(request, f"Acknowledged {acknowledged} purchase orders.")
+
+    @admin.action(description="Mark selected purchase orders as completed")
+    def complete_selected(self, request, queryset):
+        completed = 0
+        with transaction.atomic(), deferred_recalc():
+            for po in queryset.exclude(status="completed"):
+                po.status = "completed"
+                po._event_source = "admin"
+                po.save(update_fields=["status", "actual_delivery_date"])
+                completed += 1
+        self.message_user(request, f"Marked {completed} purchase orders as completed.")
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ("url", "vendor", "events", "is_active", "created_at")
+    list_select_related = ("vendor",)
+    list_filter = ("is_active", VendorListFilter)
+    autocomplete_fields = ("vendor",)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("id", "event", "endpoint", "status", "attempts", "last_status_code", "next_attempt_at", "created_at")
+    list_select_related = ("endpoint",)
+    list_filter = ("status", "event")
+    readonly_fields = [field.name for field in WebhookDelivery._meta.fields]
+    ordering = ("-pk",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["requeue_selected"]
+
+    @admin.action(description="Retry selected dead deliveries")
+    def requeue_selected(self, request, queryset):
+        self.message_user(request, f"Requeued {requeue_dead(queryset)} deliveries.")
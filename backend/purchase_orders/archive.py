@@ -0,0 +1,139 @@
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from vendors.metrics import add_archive_totals, snapshot_totals
+from vendors.status_counts import subtract_status_counts
+from .changes import record_changes
+from .filters import ArchivedPurchaseOrderFilter
+from .models import ArchivedPurchaseOrder, ArchivedPurchaseOrderItem, PurchaseOrder, PurchaseOrderChange, PurchaseOrderItem
+from .serializers import PurchaseOrderSerializer
+from .signals import suppress_signals
+
+ARCHIVABLE_STATUSES = ("completed", "canceled")
+
+
+def default_cutoff():
+    return timezone.now() - timedelta(days=settings.PO_ARCHIVE_AFTER_DAYS)
+
+
+def archivable(before=None):
+    """
+    Completed and canceled POs ordered before ``before`` (default: older
+    than ``PO_ARCHIVE_AFTER_DAYS``).
+    """
+    return PurchaseOrder.objects.filter(status__in=ARCHIVABLE_STATUSES, order_date__lt=before or default_cutoff())
+
+
+def archive_chunk(ids) -> int:
+    """
+    Move the given POs to the archive in one transaction.
+
+    Their metric totals are folded into each vendor's archive counters
+    first, so recalculated metrics come out the same after the move and no
+    recalculation is needed. Item lines move to ``ArchivedPurchaseOrderItem``.
+    Delta-sync clients see them as deleted.
+    """
+    with transaction.atomic():
+        pos = list(PurchaseOrder.objects.filter(pk__in=ids, status__in=ARCHIVABLE_STATUSES))
+        if not pos:
+            return 0
+        by_vendor = defaultdict(list)
+        rows = []
+        for po in pos:
+            by_vendor[po.vendor_id].append(po.metric_snapshot())
+            rows.append(
+                ArchivedPurchaseOrder(
+                    id=po.pk,
+                    po_number=po.po_number,
+                    vendor_id=po.vendor_id,
+                    status=po.status,
+                    order_date=po.order_date,
+                    payload=ArchivedPurchaseOrder.compress(PurchaseOrderSerializer(po).data),
+                )
+            )
+        ArchivedPurchaseOrder.objects.bulk_create(rows)
+        statuses = {po.pk: po.status for po in pos}
+        ArchivedPurchaseOrderItem.objects.bulk_create(
+            [
+                ArchivedPurchaseOrderItem(status=statuses[line["purchase_order_id"]], **line)
+                for line in PurchaseOrderItem.objects.filter(purchase_order_id__in=statuses).values(
+                    "purchase_order_id", "vendor_id", "line_number", "product", "category", "unit_price", "quantity"
+                )
+            ],
+            batch_size=2000,
+        )
+        for vendor_id, snapshots in by_vendor.items():
+            add_archive_totals(vendor_id, snapshot_totals(snapshots))
+        with suppress_signals():
+            PurchaseOrder.objects.filter(pk__in=[po.pk for po in pos]).delete()
+        subtract_status_counts(snapshot for snapshots in by_vendor.values() for snapshot in snapshots)
+        record_changes([(po.pk, po.vendor_id) for po in pos], PurchaseOrderChange.DELETE)
+    return len(pos)
+
+
+def archived_matches(params):
+    """
+    The archived POs a list request should also return, or None.
+
+    The archive is only read for a multi-get (``ids``) or when an
+    ``order_date_*`` filter reaches back past the newest archived order.
+    Item-level filters match against ``ArchivedPurchaseOrderItem``.
+    """
+    if not {"ids", "order_date_after", "order_date_before"} & set(params):
+        return None
+    filterset = ArchivedPurchaseOrderFilter(params, queryset=ArchivedPurchaseOrder.objects.all())
+    if not filterset.is_valid():
+        return None
+    after = filterset.form.cleaned_data.get("order_date_after")
+    if after is not None:
+        newest = ArchivedPurchaseOrder.objects.aggregate(newest=Max("order_date"))["newest"]
+        if newest is None or after > newest:
+            return None
+    return filterset.qs
+
+
+class MergedOrderList:
+    """
+    Live and archived POs as one sequence, newest order first.
+
+    Supports ``len()`` and slicing so the regular paginators work on it.
+    A page costs ``offset + page size`` index entries from each source plus
+    one fetch per source for the rows on the page.
+    """
+
+    def __init__(self, live, archived):
+        self.live = live.order_by("-order_date", "-pk")
+        self.archived = archived.order_by("-order_date", "-id")
+
+    def __len__(self):
+        return self.live.count() + self.archived.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        live = ((order_date, pk, False) for order_date, pk in self.live.values_list("order_date", "pk")[:stop])
+        archived = ((order_date, pk, True) for order_date, pk in self.archived.values_list("order_date", "id")[:stop])
+        window = list(islice(heapq.merge(live, archived, key=lambda row: row[:2], reverse=True), start, stop))
+
+        live_rows = PurchaseOrder.objects.select_related("vendor").in_bulk(
+            [pk for _, pk, is_archived in window if not is_archived]
+        )
+        archived_rows = ArchivedPurchaseOrder.objects.in_bulk([pk for _, pk, is_archived in window if is_archived])
+        # A PO archived after the index read is fetched from the archive; one
+        # deleted in the meantime is left off the page.
+        moved = [pk for _, pk, is_archived in window if not is_archived and pk not in live_rows]
+        if moved:
+            archived_rows.update(ArchivedPurchaseOrder.objects.in_bulk(moved))
+        rows = (
+            archived_rows.get(pk) if is_archived else live_rows.get(pk, archived_rows.get(pk))
+            for _, pk, is_archived in window
+        )
+        return [row for row in rows if row is not None]
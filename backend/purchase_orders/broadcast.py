@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from django.conf import settings
+
+
+class Subscriber:
+    """
+    One connected event-stream client with a bounded queue.
+
+    When a slow client's queue is full the oldest event is dropped, so a
+    stalled connection can never grow memory without bound.
+    """
+
+    def __init__(self, loop, vendor_id=None, maxsize=100):
+        self.loop = loop
+        self.vendor_id = vendor_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, vendor_id) -> bool:
+        return self.vendor_id is None or self.vendor_id == vendor_id
+
+    def offer(self, message) -> None:
+        # Runs on the subscriber's event loop.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class BroadcastHub:
+    """
+    In-process fan-out of PO and vendor metric events to SSE subscribers.
+
+    Publishing is thread-safe and never blocks the writer: events are handed
+    to each subscriber's loop with ``call_soon_threadsafe``. Each worker
+    process has its own hub and only sees writes handled by that process.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, vendor_id=None) -> Subscriber:
+        subscriber = Subscriber(asyncio.get_running_loop(), vendor_id, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: dict, vendor_id=None) -> None:
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.wants(vendor_id)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, (event, data))
+            except RuntimeError:
+                # The subscriber's loop has closed; it will be unsubscribed on teardown.
+                pass
+
+
+hub = BroadcastHub(getattr(settings, "EVENT_STREAM_QUEUE_SIZE", 100))
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import PurchaseOrder, PurchaseOrderChange
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+class CursorExpired(Exception):
+    """
+    The cursor points before the oldest retained change; the client must resync.
+    """
+
+
+def record_change(po_id: int, vendor_id: int, op: str = PurchaseOrderChange.UPSERT) -> None:
+    PurchaseOrderChange.objects.create(purchase_order_id=po_id, vendor_id=vendor_id, op=op)
+
+
+def record_changes(rows, op: str = PurchaseOrderChange.UPSERT) -> None:
+    """
+    Bulk variant of ``record_change`` for ``(po_id, vendor_id)`` pairs.
+    """
+    PurchaseOrderChange.objects.bulk_create(
+        [PurchaseOrderChange(purchase_order_id=po_id, vendor_id=vendor_id, op=op) for po_id, vendor_id in rows]
+    )
+
+
+def settled_horizon():
+    """
+    Id of the oldest change logged within the last ``CHANGE_LOG_SETTLE_SECONDS``,
+    or None. Cursors must stay below it: a transaction that took a lower id
+    may commit after a later one, and a reader that had moved past its id
+    would never see it.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CHANGE_LOG_SETTLE_SECONDS)
+    return PurchaseOrderChange.objects.filter(changed_at__gt=cutoff).aggregate(horizon=Min("id"))["horizon"]
+
+
+def settled_changes():
+    horizon = settled_horizon()
+    log = PurchaseOrderChange.objects.all()
+    return log if horizon is None else log.filter(id__lt=horizon)
+
+
+def latest_cursor(vendor_id=None) -> int:
+    qs = settled_changes()
+    if vendor_id is not None:
+        qs = qs.filter(vendor_id=vendor_id)
+    return qs.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def changes_since(since: int, limit: int = DEFAULT_LIMIT, vendor_id=None):
+    """
+    Collapse the changes after cursor ``since`` into the current rows to upsert
+    and the ids to delete.
+
+    Returns ``(upserts, deleted_ids, next_cursor, has_more)``. Work is
+    proportional to the number of changes, not to the size of the PO table.
+    Changes younger than the settle window come in a later call.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    log = settled_changes()
+    if vendor_id is not None:
+        log = log.filter(vendor_id=vendor_id)
+
+    if since:
+        oldest = PurchaseOrderChange.objects.aggregate(oldest=Min("id"))["oldest"]
+        if oldest is not None and since < oldest - 1:
+            raise CursorExpired
+
+    rows = list(log.filter(id__gt=since).order_by("id").values_list("id", "purchase_order_id", "op")[:limit])
+    final_op = {}
+    for _, po_id, op in rows:
+        final_op[po_id] = op
+
+    upsert_ids = [po_id for po_id, op in final_op.items() if op == PurchaseOrderChange.UPSERT]
+    upserts = PurchaseOrder.objects.filter(pk__in=upsert_ids).select_related("vendor").order_by("pk")
+    if vendor_id is not None:
+        upserts = upserts.filter(vendor_id=vendor_id)
+    upserts = list(upserts)
+
+    # Rows deleted (or moved to another vendor) after their last logged upsert are gone too.
+    found = {po.pk for po in upserts}
+    deleted = sorted(po_id for po_id, op in final_op.items() if op == PurchaseOrderChange.DELETE or po_id not in found)
+
+    next_cursor = rows[-1][0] if rows else since
+    return upserts, deleted, next_cursor, len(rows) == limit
+
+
+def prune_changes(before_id: int) -> int:
+    deleted, _ = PurchaseOrderChange.objects.filter(id__lt=before_id).delete()
+    return deleted
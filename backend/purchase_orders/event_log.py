@@ -0,0 +1,56 @@
+from .models import PurchaseOrder, PurchaseOrderEvent
+
+
+def classify_change(previous: dict | None, current: dict | None) -> str | None:
+    """
+    Pick the event type for a PO going from ``previous`` to ``current``
+    metric snapshots, or ``None`` when nothing metric-relevant changed.
+    """
+    if current is None:
+        return PurchaseOrderEvent.DELETED
+    if previous is None:
+        return PurchaseOrderEvent.CREATED
+    if previous["status"] != current["status"]:
+        if current["status"] == "acknowledged":
+            return PurchaseOrderEvent.ACKNOWLEDGED
+        return PurchaseOrderEvent.STATUS_CHANGED
+    if previous != current:
+        return PurchaseOrderEvent.UPDATED
+    return None
+
+
+def record_event(po: PurchaseOrder, previous: dict | None, deleted: bool = False, source: str = "") -> None:
+    """
+    Append an event for ``po`` if its metric fields changed since ``previous``.
+    """
+    current = None if deleted else po.metric_snapshot()
+    event_type = classify_change(previous, current)
+    if event_type is None:
+        return
+    PurchaseOrderEvent.objects.create(
+        purchase_order_id=po.pk,
+        vendor_id=po.vendor_id,
+        event_type=event_type,
+        from_status=previous["status"] if previous else "",
+        to_status=current["status"] if current else "",
+        snapshot=current or {},
+        source=source,
+    )
+
+
+def record_deletions(snapshots: dict, source: str = "") -> None:
+    """
+    Append ``deleted`` events in bulk for ``{po_id: metric_snapshot}``.
+    """
+    PurchaseOrderEvent.objects.bulk_create(
+        [
+            PurchaseOrderEvent(
+                purchase_order_id=po_id,
+                vendor_id=snapshot["vendor_id"],
+                event_type=PurchaseOrderEvent.DELETED,
+                from_status=snapshot["status"],
+                source=source,
+            )
+            for po_id, snapshot in snapshots.items()
+        ]
+    )
@@ -0,0 +1,92 @@
+import django_filters
+
+from config.filters import IdListFilter
+from .models import ArchivedPurchaseOrder, ArchivedPurchaseOrderItem, PurchaseOrder, PurchaseOrderItem
+
+# Filters answered from the item lines: PurchaseOrderItem for live POs,
+# ArchivedPurchaseOrderItem for archived ones.
+ITEM_FILTERS = ("product", "category", "min_unit_price", "max_unit_price")
+
+
+class ItemLineFilterSet(django_filters.FilterSet):
+    """
+    Item-level filters, applied together so that a PO matches only if one of
+    its lines meets all of them.
+    """
+    product = django_filters.CharFilter(field_name="product__iexact", method="filter_item_line")
+    category = django_filters.CharFilter(field_name="category__iexact", method="filter_item_line")
+    min_unit_price = django_filters.NumberFilter(field_name="unit_price__gte", method="filter_item_line")
+    max_unit_price = django_filters.NumberFilter(field_name="unit_price__lte", method="filter_item_line")
+
+    def filter_item_line(self, queryset, name, value):
+        # Collected by filter_queryset into a single condition on the lines.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        line = {
+            self.filters[name].field_name: self.form.cleaned_data[name]
+            for name in ITEM_FILTERS
+            if self.form.cleaned_data.get(name) not in (None, "")
+        }
+        return self.filter_item_lines(queryset, line) if line else queryset
+
+    def filter_item_lines(self, queryset, line: dict):
+        raise NotImplementedError
+
+
+class PurchaseOrderFilter(ItemLineFilterSet):
+    """
+    Item-level filters resolve against the indexed ``PurchaseOrderItem`` table.
+    """
+    ids = IdListFilter()
+    order_date_after = django_filters.IsoDateTimeFilter(field_name="order_date", lookup_expr="gte")
+    order_date_before = django_filters.IsoDateTimeFilter(field_name="order_date", lookup_expr="lt")
+
+    class Meta:
+        model = PurchaseOrder
+        fields = ["vendor", "status"]
+
+    def filter_item_lines(self, queryset, line):
+        return queryset.filter(**{f"item_lines__{lookup}": value for lookup, value in line.items()}).distinct()
+
+
+class ArchivedPurchaseOrderFilter(ItemLineFilterSet):
+    ids = IdListFilter(field_name="id")
+    vendor = django_filters.NumberFilter(field_name="vendor_id")
+    status = django_filters.CharFilter(field_name="status")
+    order_date_after = django_filters.IsoDateTimeFilter(field_name="order_date", lookup_expr="gte")
+    order_date_before = django_filters.IsoDateTimeFilter(field_name="order_date", lookup_expr="lt")
+
+    class Meta:
+        model = ArchivedPurchaseOrder
+        fields = []
+
+    def filter_item_lines(self, queryset, line):
+        return queryset.filter(id__in=ArchivedPurchaseOrderItem.objects.filter(**line).values("purchase_order_id"))
+
+
+class PurchaseOrderItemFilter(django_filters.FilterSet):
+    product = django_filters.CharFilter(field_name="product", lookup_expr="iexact")
+    category = django_filters.CharFilter(field_name="category", lookup_expr="iexact")
+    min_unit_price = django_filters.NumberFilter(field_name="unit_price", lookup_expr="gte")
+    max_unit_price = django_filters.NumberFilter(field_name="unit_price", lookup_expr="lte")
+    status = django_filters.CharFilter(field_name="purchase_order__status")
+
+    class Meta:
+        model = PurchaseOrderItem
+        fields = ["vendor", "purchase_order"]
+
+
+class ArchivedPurchaseOrderItemFilter(django_filters.FilterSet):
+    product = django_filters.CharFilter(field_name="product", lookup_expr="iexact")
+    category = django_filters.CharFilter(field_name="category", lookup_expr="iexact")
+    min_unit_price = django_filters.NumberFilter(field_name="unit_price", lookup_expr="gte")
+    max_unit_price = django_filters.NumberFilter(field_name="unit_price", lookup_expr="lte")
+    status = django_filters.CharFilter(field_name="status")
+    vendor = django_filters.NumberFilter(field_name="vendor_id")
+    purchase_order = django_filters.NumberFilter(field_name="purchase_order_id")
+
+    class Meta:
+        model = ArchivedPurchaseOrderItem
+        fields = []
@@ -0,0 +1,118 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_key_in_use"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = "idempotency_key_reused"
+
+
+def request_fingerprint(request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b"\0")
+    digest.update(request.path.encode())
+    digest.update(b"\0")
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _claim(request, key, fingerprint):
+    """
+    Insert a placeholder for ``key``, or return the existing record.
+
+    Returns ``(record, created)``. The unique constraint on (user, key)
+    makes the claim race-free: of two concurrent first attempts exactly one
+    insert succeeds.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    key=key,
+                    user=request.user,
+                    method=request.method,
+                    path=request.path,
+                    request_hash=fingerprint,
+                    expires_at=expires_at,
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+            if record is None:
+                continue
+            if record.expires_at > now:
+                return record, False
+            # Expired but not purged yet: drop it and claim afresh.
+            record.delete()
+    raise IdempotencyKeyInUse()
+
+
+def run_idempotent(request, handler):
+    """
+    Run ``handler()`` at most once per ``Idempotency-Key`` and user.
+
+    Replays of a finished request return the stored response without
+    calling the handler, so no serializer, validation or signal work is
+    repeated. Exceptions (validation errors included) and 5xx responses
+    release the key so the client can retry for real.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({HEADER: f"Must be at most {MAX_KEY_LENGTH} characters."})
+
+    fingerprint = request_fingerprint(request)
+    record, created = _claim(request, key, fingerprint)
+    if not created:
+        if record.request_hash != fingerprint:
+            raise IdempotencyKeyReused()
+        if record.status_code is None:
+            raise IdempotencyKeyInUse()
+        response = Response(record.response_body, status=record.status_code)
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    try:
+        response = handler()
+    except BaseException:
+        record.delete()
+        raise
+    if response.status_code >= 500:
+        record.delete()
+        return response
+    record.status_code = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=["status_code", "response_body"])
+    return response
+
+
+class IdempotentPostMixin:
+    """
+    Honour the ``Idempotency-Key`` header on ``post``.
+    """
+
+    def post(self, request, *args, **kwargs):
+        return run_idempotent(request, lambda: super(IdempotentPostMixin, self).post(request, *args, **kwargs))
@@ -0,0 +1,63 @@
+from .models import PurchaseOrder, PurchaseOrderItem
+
+# PurchaseOrder fields whose change requires re-normalizing the item lines.
+ITEM_SOURCE_FIELDS = {"items", "quantity", "vendor"}
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_items(items, default_quantity: int) -> list[dict]:
+    """
+    Flatten the free-form ``items`` JSON into line dicts.
+
+    ``items`` may be a single object or a list of objects. A single line
+    without its own ``quantity`` inherits the purchase order quantity; on a
+    multi-line PO that quantity is the order total, so such lines get
+    ``None`` (unknown) instead.
+    """
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+
+    items = [item for item in items if isinstance(item, dict)]
+    if len(items) != 1:
+        default_quantity = None
+    lines = []
+    for item in items:
+        lines.append({
+            "product": str(item.get("product") or item.get("name") or "")[:255],
+            "category": str(item.get("category") or "")[:255],
+            "unit_price": _as_float(item.get("unit_price", item.get("price"))),
+            "quantity": _as_int(item.get("quantity"), default_quantity),
+        })
+    return lines
+
+
+def build_item_lines(po: PurchaseOrder) -> list[PurchaseOrderItem]:
+    return [
+        PurchaseOrderItem(purchase_order_id=po.pk, vendor_id=po.vendor_id, line_number=number, **line)
+        for number, line in enumerate(normalize_items(po.items, po.quantity))
+    ]
+
+
+def sync_item_lines(po: PurchaseOrder, update_fields=None) -> None:
+    """
+    Replace the normalized item lines of a purchase order.
+    """
+    if update_fields is not None and not ITEM_SOURCE_FIELDS.intersection(update_fields):
+        return
+    PurchaseOrderItem.objects.filter(purchase_order_id=po.pk).delete()
+    PurchaseOrderItem.objects.bulk_create(build_item_lines(po))
@@ -0,0 +1,31 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from purchase_orders.webhook_dispatcher import WebhookDispatcher
+from purchase_orders.webhooks import requeue_dead
+
+
+class Command(BaseCommand):
+    help = 'Send pending PO webhooks from the outbox (runs until stopped unless --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no delivery is due')
+        parser.add_argument('--batch-size', type=int, default=settings.WEBHOOK_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=settings.WEBHOOK_CONCURRENCY, help='Most requests in flight')
+        parser.add_argument('--poll-interval', type=float, default=settings.WEBHOOK_POLL_INTERVAL, help='Seconds to sleep when idle')
+        parser.add_argument('--requeue-dead', action='store_true', help='Retry dead-lettered deliveries first')
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            self.stdout.write(f'Requeued {requeue_dead()} dead deliveries')
+        dispatcher = WebhookDispatcher(batch_size=options['batch_size'], concurrency=options['concurrency'])
+        try:
+            asyncio.run(dispatcher.run(options['poll_interval'], once=options['once']))
+        except KeyboardInterrupt:
+            pass
+        stats = dispatcher.stats
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats["delivered"]} delivered, {stats["failed"]} non-2xx responses, {stats["errors"]} connection errors'
+        ))
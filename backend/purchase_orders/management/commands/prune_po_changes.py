@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from purchase_orders.changes import prune_changes
+from purchase_orders.models import PurchaseOrderChange
+
+
+class Command(BaseCommand):
+    help = 'Delete purchase order change-log rows older than --days (clients behind that point must resync)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        log = PurchaseOrderChange.objects.order_by('id').values_list('id', flat=True)
+        # With nothing logged since the cutoff the newest row is kept anyway,
+        # so the log still carries the current cursor.
+        first_kept = log.filter(changed_at__gte=cutoff).first() or log.last()
+        deleted = prune_changes(first_kept) if first_kept is not None else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} change-log rows from before {cutoff:%Y-%m-%d %H:%M:%S %Z} ({options["days"]} days kept)'
+        ))
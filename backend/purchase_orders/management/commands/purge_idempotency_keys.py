@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from purchase_orders.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses past their expiry'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired idempotency keys'))
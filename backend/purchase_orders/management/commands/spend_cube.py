@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from purchase_orders.spend import SpendCube
+
+
+class Command(BaseCommand):
+    help = 'Build or catch up the spend cube and write its snapshot (for fast worker start-up)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Full scan instead of starting from the snapshot')
+        parser.add_argument('--path', help='Snapshot file (default SPEND_CUBE_SNAPSHOT)')
+
+    def handle(self, *args, **options):
+        cube = SpendCube()
+        start = time.perf_counter()
+        if options['rebuild'] or not cube.load_snapshot(options['path']):
+            source = 'scan'
+            cube.build()
+        else:
+            source = 'snapshot'
+            cube.refresh()
+        loaded = time.perf_counter() - start
+        cube.save_snapshot(options['path'])
+        stats = cube.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded from {source} in {loaded:.2f}s: {stats["cells"]} cells, {stats["orders"]} POs, '
+            f'{stats["vendors"]} vendors x {stats["months"]} months x {stats["categories"]} categories '
+            f'(cursor {stats["cursor"]})'
+        ))
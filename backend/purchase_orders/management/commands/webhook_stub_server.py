@@ -0,0 +1,72 @@
+import hmac
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from purchase_orders.webhooks import sign
+
+
+class Command(BaseCommand):
+    help = 'Run a local webhook receiver that logs deliveries, for trying out dispatch_webhooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--secret', help='Endpoint secret; signatures are checked when given')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of requests answered with 503 (0-1)')
+        parser.add_argument('--delay-ms', type=float, default=0.0, help='Latency added to every response')
+        parser.add_argument('--quiet', action='store_true', help='Only print the periodic totals')
+
+    def handle(self, *args, **options):
+        command = self
+        connections = set()
+        totals = {'received': 0, 'rejected': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps connections open, so the dispatcher's reuse shows up in the log.
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if options['delay_ms']:
+                    time.sleep(options['delay_ms'] / 1000)
+                with lock:
+                    connections.add(self.client_address)
+                status = 204
+                if options['secret']:
+                    expected = sign(options['secret'], self.headers.get('X-Webhook-Timestamp', ''), body)
+                    if not hmac.compare_digest(expected, self.headers.get('X-Webhook-Signature', '')):
+                        status = 401
+                if status == 204 and random.random() < options['fail_rate']:
+                    status = 503
+                with lock:
+                    totals[{204: 'received', 401: 'rejected', 503: 'failed'}[status]] += 1
+                if not options['quiet']:
+                    event = json.loads(body or b'{}')
+                    command.stdout.write(
+                        f'{status} #{self.headers.get("X-Webhook-Id")} {event.get("event")} '
+                        f'po={event.get("data", {}).get("id")} conn={self.client_address[1]}'
+                    )
+                self.send_response(status)
+                if status == 503:
+                    self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f'Listening on http://127.0.0.1:{options["port"]}/ (Ctrl-C to stop)')
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            while True:
+                time.sleep(5)
+                with lock:
+                    self.stdout.write(f'totals {totals}, {len(connections)} connections used')
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-19 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of purchase_orders.items.normalize_items as of this migration.
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_items(items, default_quantity):
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        lines.append({
+            'product': str(item.get('product') or item.get('name') or '')[:255],
+            'category': str(item.get('category') or '')[:255],
+            'unit_price': _as_float(item.get('unit_price', item.get('price'))),
+            'quantity': _as_int(item.get('quantity'), default_quantity),
+        })
+    return lines
+
+
+def backfill_item_lines(apps, schema_editor):
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    PurchaseOrderItem = apps.get_model('purchase_orders', 'PurchaseOrderItem')
+    batch = []
+    for po in PurchaseOrder.objects.only('id', 'vendor_id', 'items', 'quantity').iterator(chunk_size=2000):
+        for number, line in enumerate(normalize_items(po.items, po.quantity)):
+            batch.append(PurchaseOrderItem(purchase_order_id=po.pk, vendor_id=po.vendor_id, line_number=number, **line))
+        if len(batch) >= 2000:
+            PurchaseOrderItem.objects.bulk_create(batch)
+            batch = []
+    PurchaseOrderItem.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0002_alter_purchaseorder_expected_delivery_date'),
+        ('vendors', '0003_vendor_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField(default=0)),
+                ('product', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('category', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('unit_price', models.FloatField(blank=True, db_index=True, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_lines', to='purchase_orders.purchaseorder')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_order_items', to='vendors.vendor')),
+            ],
+            options={
+                'ordering': ['purchase_order_id', 'line_number'],
+                'indexes': [models.Index(fields=['category', 'unit_price'], name='po_item_category_price_idx'), models.Index(fields=['vendor', 'category'], name='po_item_vendor_category_idx')],
+                'constraints': [models.UniqueConstraint(fields=('purchase_order', 'line_number'), name='unique_po_item_line')],
+            },
+        ),
+        migrations.RunPython(backfill_item_lines, migrations.RunPython.noop),
+    ]
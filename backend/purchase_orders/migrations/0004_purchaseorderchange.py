@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0003_purchaseorderitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_order_id', models.BigIntegerField()),
+                ('vendor_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor_id', 'id'], name='po_change_vendor_seq_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-19 02:58
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+METRIC_FIELDS = (
+    'vendor_id',
+    'status',
+    'issue_date',
+    'acknowledgment_date',
+    'expected_delivery_date',
+    'actual_delivery_date',
+    'quality_rating',
+)
+
+
+def seed_created_events(apps, schema_editor):
+    # Start the log with each existing PO's current state.
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    PurchaseOrderEvent = apps.get_model('purchase_orders', 'PurchaseOrderEvent')
+    batch = []
+    for row in PurchaseOrder.objects.order_by('pk').values('pk', *METRIC_FIELDS).iterator(chunk_size=2000):
+        po_id = row.pop('pk')
+        batch.append(PurchaseOrderEvent(
+            purchase_order_id=po_id,
+            vendor_id=row['vendor_id'],
+            event_type='created',
+            to_status=row['status'],
+            snapshot=row,
+            source='backfill',
+        ))
+        if len(batch) >= 2000:
+            PurchaseOrderEvent.objects.bulk_create(batch)
+            batch = []
+    PurchaseOrderEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0004_purchaseorderchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_order_id', models.BigIntegerField(db_index=True)),
+                ('vendor_id', models.BigIntegerField(db_index=True)),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('acknowledged', 'Acknowledged'), ('status_changed', 'Status changed'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=20)),
+                ('from_status', models.CharField(blank=True, max_length=50)),
+                ('to_status', models.CharField(blank=True, max_length=50)),
+                ('snapshot', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('source', models.CharField(blank=True, max_length=30)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(seed_created_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0005_purchaseorderevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
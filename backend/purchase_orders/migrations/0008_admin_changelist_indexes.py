@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0007_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status'], name='po_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 04:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0008_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchaseOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('po_number', models.CharField(max_length=50, unique=True)),
+                ('vendor_id', models.BigIntegerField()),
+                ('status', models.CharField(max_length=50)),
+                ('order_date', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('payload', models.BinaryField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor_id', 'order_date'], name='archived_po_vendor_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0010_webhooks'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorderchange',
+            index=models.Index(fields=['changed_at'], name='po_change_changed_at_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+# Frozen copy of purchase_orders.items.normalize_items as of this migration.
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_items(items, default_quantity):
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        lines.append({
+            'product': str(item.get('product') or item.get('name') or '')[:255],
+            'category': str(item.get('category') or '')[:255],
+            'unit_price': _as_float(item.get('unit_price', item.get('price'))),
+            'quantity': _as_int(item.get('quantity'), default_quantity),
+        })
+    return lines
+
+
+def backfill_archived_item_lines(apps, schema_editor):
+    """
+    Rebuild the lines of POs archived before this table existed from their
+    stored representation, the same way ``PurchaseOrderItem`` rows are built.
+    """
+    ArchivedPurchaseOrder = apps.get_model('purchase_orders', 'ArchivedPurchaseOrder')
+    ArchivedPurchaseOrderItem = apps.get_model('purchase_orders', 'ArchivedPurchaseOrderItem')
+    batch = []
+    for po in ArchivedPurchaseOrder.objects.iterator(chunk_size=500):
+        data = json.loads(zlib.decompress(bytes(po.payload)))
+        for number, line in enumerate(normalize_items(data.get('items'), data.get('quantity') or 0)):
+            batch.append(ArchivedPurchaseOrderItem(
+                purchase_order_id=po.pk, vendor_id=po.vendor_id, status=po.status, line_number=number, **line
+            ))
+        if len(batch) >= 2000:
+            ArchivedPurchaseOrderItem.objects.bulk_create(batch)
+            batch = []
+    ArchivedPurchaseOrderItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0011_purchaseorderchange_changed_at_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchaseOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_order_id', models.BigIntegerField()),
+                ('vendor_id', models.BigIntegerField()),
+                ('status', models.CharField(max_length=50)),
+                ('line_number', models.PositiveIntegerField(default=0)),
+                ('product', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('category', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('unit_price', models.FloatField(blank=True, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['purchase_order_id', 'line_number'],
+                'indexes': [models.Index(fields=['vendor_id', 'category'], name='archived_item_vendor_cat_idx')],
+                'constraints': [models.UniqueConstraint(fields=('purchase_order_id', 'line_number'), name='unique_archived_po_item_line')],
+            },
+        ),
+        migrations.RunPython(backfill_archived_item_lines, migrations.RunPython.noop),
+    ]
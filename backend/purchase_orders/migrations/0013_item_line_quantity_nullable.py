@@ -0,0 +1,102 @@
+# Generated by Django 6.0 on 2026-10-19 18:05
+
+import json
+import zlib
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Frozen copy of purchase_orders.items.normalize_items as of this migration.
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_items(items, default_quantity):
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    items = [item for item in items if isinstance(item, dict)]
+    if len(items) != 1:
+        default_quantity = None
+    lines = []
+    for item in items:
+        lines.append({
+            'product': str(item.get('product') or item.get('name') or '')[:255],
+            'category': str(item.get('category') or '')[:255],
+            'unit_price': _as_float(item.get('unit_price', item.get('price'))),
+            'quantity': _as_int(item.get('quantity'), default_quantity),
+        })
+    return lines
+
+
+def _renormalize(Item, sources):
+    """
+    Re-derive the quantities of multi-line POs, which used to give every line
+    without its own quantity the whole order quantity.
+    """
+    po_ids = list(
+        Item.objects.order_by().values('purchase_order_id').annotate(n=Count('pk')).filter(n__gt=1)
+        .values_list('purchase_order_id', flat=True)
+    )
+    for start in range(0, len(po_ids), 500):
+        chunk = po_ids[start:start + 500]
+        quantities = {
+            po_id: [line['quantity'] for line in normalize_items(items, quantity or 0)]
+            for po_id, items, quantity in sources(chunk)
+        }
+        changed = []
+        for line in Item.objects.filter(purchase_order_id__in=chunk):
+            expected = quantities.get(line.purchase_order_id, [])
+            if line.line_number < len(expected) and line.quantity != expected[line.line_number]:
+                line.quantity = expected[line.line_number]
+                changed.append(line)
+        Item.objects.bulk_update(changed, ['quantity'])
+
+
+def renormalize_line_quantities(apps, schema_editor):
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    ArchivedPurchaseOrder = apps.get_model('purchase_orders', 'ArchivedPurchaseOrder')
+
+    def live(po_ids):
+        return PurchaseOrder.objects.filter(pk__in=po_ids).values_list('pk', 'items', 'quantity')
+
+    def archived(po_ids):
+        for pk, payload in ArchivedPurchaseOrder.objects.filter(pk__in=po_ids).values_list('pk', 'payload'):
+            data = json.loads(zlib.decompress(bytes(payload)))
+            yield pk, data.get('items'), data.get('quantity')
+
+    _renormalize(apps.get_model('purchase_orders', 'PurchaseOrderItem'), live)
+    _renormalize(apps.get_model('purchase_orders', 'ArchivedPurchaseOrderItem'), archived)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0012_archivedpurchaseorderitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedpurchaseorderitem',
+            name='quantity',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorderitem',
+            name='quantity',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(renormalize_line_quantities, migrations.RunPython.noop),
+    ]
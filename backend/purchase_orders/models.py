@@ -1,5 +1,12 @@
-from django.db import models
+import json
+import secrets
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
 from django.db.models import JSONField
+from django.utils import timezone
 from vendors.models import Vendor
 
 class PurchaseOrder(models.Model):
@@ -21,6 +28,305 @@ class PurchaseOrder(models.Model):
     quality_rating = models.FloatField(null=True, blank=True)
     issue_date = models.DateTimeField()
     acknowledgment_date = models.DateTimeField(null=True, blank=True)
+    # Bumped on every write; used for optimistic locking (ETag / If-Match).
+    version = models.PositiveIntegerField(default=1)
+
+    # Not yet delivered or canceled.
+    OPEN_STATUSES = ('pending', 'acknowledged')
+
+    # Fields that feed vendor performance metrics.
+    METRIC_FIELDS = (
+        'vendor_id',
+        'status',
+        'issue_date',
+        'acknowledgment_date',
+        'expected_delivery_date',
+        'actual_delivery_date',
+        'quality_rating',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='po_status_idx'),
+            models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+        ]
+
+    def __str__(self):
+        return self.po_number
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        # The row and everything the signals write (buckets, metrics, logs)
+        # commit together in one short transaction.
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(PurchaseOrder, instance=self)):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(PurchaseOrder, instance=self)):
+            return super().delete(*args, **kwargs)
+
+    def metric_snapshot(self) -> dict:
+        return {field: getattr(self, field) for field in self.METRIC_FIELDS}
+
+
+class ArchivedPurchaseOrder(models.Model):
+    """
+    A completed or canceled PO moved out of the live table.
+
+    Only the columns list filters need are kept; the full API representation
+    is stored zlib-compressed in ``payload``. The PO's metric contribution
+    lives on in ``VendorArchiveTotals`` and its item lines in
+    ``ArchivedPurchaseOrderItem``.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    po_number = models.CharField(max_length=50, unique=True)
+    vendor_id = models.BigIntegerField()
+    status = models.CharField(max_length=50)
+    order_date = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    payload = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor_id', 'order_date'], name='archived_po_vendor_date_idx'),
+        ]
 
     def __str__(self):
         return self.po_number
+
+    @staticmethod
+    def compress(data: dict) -> bytes:
+        return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode())
+
+    def representation(self) -> dict:
+        data = json.loads(zlib.decompress(bytes(self.payload)))
+        data["archived"] = True
+        return data
+
+
+class PurchaseOrderItem(models.Model):
+    """
+    One normalized line of ``PurchaseOrder.items``, kept in sync by signals.
+    """
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='item_lines')
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='purchase_order_items')
+    line_number = models.PositiveIntegerField(default=0)
+    product = models.CharField(max_length=255, blank=True, db_index=True)
+    category = models.CharField(max_length=255, blank=True, db_index=True)
+    unit_price = models.FloatField(null=True, blank=True, db_index=True)
+    quantity = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['purchase_order_id', 'line_number']
+        constraints = [
+            models.UniqueConstraint(fields=['purchase_order', 'line_number'], name='unique_po_item_line'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'unit_price'], name='po_item_category_price_idx'),
+            models.Index(fields=['vendor', 'category'], name='po_item_vendor_category_idx'),
+        ]
+
+    @property
+    def spend(self):
+        return (self.unit_price or 0.0) * (self.quantity or 0)
+
+    def __str__(self):
+        return f"{self.purchase_order_id} #{self.line_number} {self.product}"
+
+
+class ArchivedPurchaseOrderItem(models.Model):
+    """
+    An item line of an archived PO, moved out of ``PurchaseOrderItem`` so
+    item summaries still count archived spend.
+    """
+    purchase_order_id = models.BigIntegerField()
+    vendor_id = models.BigIntegerField()
+    status = models.CharField(max_length=50)
+    line_number = models.PositiveIntegerField(default=0)
+    product = models.CharField(max_length=255, blank=True, db_index=True)
+    category = models.CharField(max_length=255, blank=True, db_index=True)
+    unit_price = models.FloatField(null=True, blank=True)
+    quantity = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['purchase_order_id', 'line_number']
+        constraints = [
+            models.UniqueConstraint(fields=['purchase_order_id', 'line_number'], name='unique_archived_po_item_line'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor_id', 'category'], name='archived_item_vendor_cat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.purchase_order_id} #{self.line_number} {self.product}"
+
+
+class PurchaseOrderChange(models.Model):
+    """
+    Append-only change log behind the delta-sync endpoints.
+
+    The auto-incrementing id is the sync cursor. Ids are handed out at
+    insert but become visible at commit, so readers stop short of rows
+    younger than ``CHANGE_LOG_SETTLE_SECONDS`` (see ``changes.settled_horizon``).
+    Rows reference POs by id only, so delete tombstones outlive the
+    purchase orders they describe.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OP_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+
+    purchase_order_id = models.BigIntegerField()
+    vendor_id = models.BigIntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor_id', 'id'], name='po_change_vendor_seq_idx'),
+            models.Index(fields=['changed_at'], name='po_change_changed_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pk} {self.op} {self.purchase_order_id}"
+
+
+class PurchaseOrderEvent(models.Model):
+    """
+    Append-only log of PO lifecycle events.
+
+    ``snapshot`` holds the metric fields after the event (empty for deletes),
+    so vendor metrics can be rebuilt by folding the log in id order.
+    """
+    CREATED = 'created'
+    ACKNOWLEDGED = 'acknowledged'
+    STATUS_CHANGED = 'status_changed'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    EVENT_CHOICES = [
+        (CREATED, 'Created'),
+        (ACKNOWLEDGED, 'Acknowledged'),
+        (STATUS_CHANGED, 'Status changed'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    purchase_order_id = models.BigIntegerField(db_index=True)
+    vendor_id = models.BigIntegerField(db_index=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    from_status = models.CharField(max_length=50, blank=True)
+    to_status = models.CharField(max_length=50, blank=True)
+    snapshot = JSONField(default=dict, encoder=DjangoJSONEncoder)
+    source = models.CharField(max_length=30, blank=True)
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.pk} {self.event_type} {self.purchase_order_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("PurchaseOrderEvent rows are append-only.")
+        super().save(*args, **kwargs)
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Stored outcome of a POST sent with an ``Idempotency-Key`` header.
+
+    A row with no ``status_code`` is a placeholder for a request still in
+    flight. Rows past ``expires_at`` are purged by ``purge_idempotency_keys``.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_records')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} {self.method} {self.path}"
+
+
+def generate_webhook_secret() -> str:
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A vendor's URL that receives PO events, signed with ``secret``.
+
+    An empty ``events`` list subscribes to every event type.
+    """
+    PO_CREATED = 'po.created'
+    PO_STATUS_CHANGED = 'po.status_changed'
+    EVENT_TYPES = (PO_CREATED, PO_STATUS_CHANGED)
+
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='webhook_endpoints')
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=64, default=generate_webhook_secret)
+    events = JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'is_active'], name='webhook_vendor_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id} {self.url}"
+
+    def wants(self, event: str) -> bool:
+        return not self.events or event in self.events
+
+
+class WebhookDelivery(models.Model):
+    """
+    Outbox row: one event for one endpoint, written in the same transaction
+    as the PO change and sent later by ``dispatch_webhooks``.
+
+    Failed sends are retried with backoff until ``WEBHOOK_MAX_ATTEMPTS``,
+    then the row is parked as ``dead`` for inspection or a manual retry.
+    """
+    PENDING = 'pending'
+    DELIVERED = 'delivered'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DELIVERED, 'Delivered'),
+        (DEAD, 'Dead'),
+    ]
+
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name='deliveries')
+    event = models.CharField(max_length=50)
+    payload = JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_delivery_due_idx'),
+            models.Index(fields=['endpoint', '-id'], name='webhook_delivery_endpoint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pk} {self.event} -> {self.endpoint_id} ({self.status})"
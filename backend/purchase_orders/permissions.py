@@ -22,3 +22,14 @@ class IsVendorOwner(permissions.BasePermission):
         vendor = request.user.vendor_profile
         return obj.vendor == vendor
 
+
+
+class IsStaffOrVendor(permissions.BasePermission):
+    """
+    Staff, or a user with a vendor profile (views narrow those to their own vendor).
+    """
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        return request.user.is_staff or hasattr(request.user, 'vendor_profile')
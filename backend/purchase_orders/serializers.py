@@ -1,12 +1,18 @@
 from django.utils import timezone
 from rest_framework import serializers
-from .models import PurchaseOrder
+from .models import ArchivedPurchaseOrder, PurchaseOrder, PurchaseOrderItem, WebhookDelivery, WebhookEndpoint
+from .webhooks import UnsafeWebhookURL, check_webhook_url
 
 class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = "__all__"
-        read_only_fields = ("acknowledgment_date",) 
+        read_only_fields = ("acknowledgment_date", "version")
+
+    def validate_po_number(self, value):
+        if ArchivedPurchaseOrder.objects.filter(po_number=value).exists():
+            raise serializers.ValidationError("An archived purchase order already uses this PO number.")
+        return value
     
     def create(self, validated_data):
         now = timezone.now()
@@ -18,4 +24,81 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         validated_data.pop('acknowledgment_date', None)
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+class PurchaseOrderItemSerializer(serializers.ModelSerializer):
+    po_number = serializers.CharField(source="purchase_order.po_number", read_only=True)
+    spend = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = PurchaseOrderItem
+        fields = (
+            "id",
+            "purchase_order",
+            "po_number",
+            "vendor",
+            "line_number",
+            "product",
+            "category",
+            "unit_price",
+            "quantity",
+            "spend",
+        )
+
+
+class PurchaseOrderPurgeSerializer(serializers.Serializer):
+    """
+    Filters for a PO purge job; at least one is required.
+    """
+    vendor = serializers.IntegerField(required=False)
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=PurchaseOrder.STATUS_CHOICES), required=False, allow_empty=False
+    )
+    before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Give at least one of vendor, status or before.")
+        return attrs
+
+    def to_job_params(self) -> dict:
+        params = dict(self.validated_data)
+        if "before" in params:
+            params["before"] = params["before"].isoformat()
+        return params
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=WebhookEndpoint.EVENT_TYPES), required=False, allow_empty=True
+    )
+
+    class Meta:
+        model = WebhookEndpoint
+        fields = ("id", "url", "secret", "events", "is_active", "created_at")
+        read_only_fields = ("secret", "created_at")
+
+    def validate_url(self, value):
+        try:
+            check_webhook_url(value)
+        except UnsafeWebhookURL as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDelivery
+        fields = (
+            "id",
+            "endpoint",
+            "event",
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_status_code",
+            "last_error",
+            "created_at",
+            "delivered_at",
+        )
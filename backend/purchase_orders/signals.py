@@ -1,9 +1,96 @@
-from django.db.models.signals import post_delete, post_save, pre_save
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from vendors.metrics import recalc_metrics
-from .models import PurchaseOrder
+from vendors.metrics import metrics_recalculated, request_recalc
+from vendors.models import Vendor
+from vendors.sketches import apply_sketch_delta
+from vendors.status_counts import apply_status_delta
+from vendors.windows import apply_snapshot_delta
+from .broadcast import hub
+from .changes import record_change
+from .event_log import record_event
+from .items import sync_item_lines
+from .models import PurchaseOrder, PurchaseOrderChange
+from .serializers import PurchaseOrderSerializer
+from .webhooks import enqueue_webhooks
+
+
+_suppressed = ContextVar("po_signals_suppressed", default=False)
+
+
+@contextmanager
+def suppress_signals():
+    """
+    Skip the per-row PO signal pipeline (metrics, buckets, logs, SSE) inside
+    the block.
+
+    For bulk jobs that write the change log, event log, buckets and metrics
+    themselves, once per chunk or vendor instead of once per row.
+    """
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def per_row(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not _suppressed.get():
+            handler(*args, **kwargs)
+    return wrapper
+
+
+def publish_on_commit(event: str, data: dict, vendor_id: int) -> None:
+    """
+    Hand an event to the SSE hub once the surrounding transaction commits.
+    """
+    if not hub.subscriber_count:
+        return
+    transaction.on_commit(lambda: hub.publish(event, data, vendor_id))
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+@per_row
+def capture_previous_state(sender, instance: PurchaseOrder, **kwargs):
+    """
+    Remember the stored metric fields so post_save handlers can apply deltas.
+
+    The row is locked (save() runs in a transaction), so a concurrent save
+    of the same PO waits and then reads what this one wrote, instead of
+    both applying their delta from the same old state.
+    """
+    instance._previous_snapshot = None
+    if instance.pk is not None and not instance._state.adding:
+        instance._previous_snapshot = _locked_snapshot(instance.pk)
+
+
+@receiver(pre_delete, sender=PurchaseOrder)
+@per_row
+def capture_stored_state(sender, instance: PurchaseOrder, origin=None, **kwargs):
+    """
+    Lock and remember the stored metric fields of a PO being deleted; None
+    if a concurrent delete got there first. Delete handlers subtract this,
+    not the possibly stale instance.
+    """
+    if not isinstance(origin, Vendor):
+        instance._stored_snapshot = _locked_snapshot(instance.pk)
+
+
+def _locked_snapshot(pk):
+    return PurchaseOrder.objects.select_for_update().filter(pk=pk).values(*PurchaseOrder.METRIC_FIELDS).first()
+
+
+def _stored_snapshot(instance: PurchaseOrder):
+    return getattr(instance, "_stored_snapshot", None)
 
 
 @receiver(pre_save, sender=PurchaseOrder)
@@ -16,7 +103,146 @@ def set_actual_delivery_date(sender, instance: PurchaseOrder, **kwargs):
         instance.actual_delivery_date = timezone.now()
 
 
+@receiver(post_save, sender=PurchaseOrder)
+def sync_purchase_order_items(sender, instance: PurchaseOrder, update_fields=None, **kwargs):
+    sync_item_lines(instance, update_fields)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def update_metric_buckets_on_save(sender, instance: PurchaseOrder, **kwargs):
+    apply_snapshot_delta(getattr(instance, "_previous_snapshot", None), instance.metric_snapshot())
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def update_metric_buckets_on_delete(sender, instance: PurchaseOrder, origin=None, **kwargs):
+    if isinstance(origin, Vendor):
+        return
+    apply_snapshot_delta(_stored_snapshot(instance), None)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def update_vendor_sketches_on_save(sender, instance: PurchaseOrder, **kwargs):
+    apply_sketch_delta(getattr(instance, "_previous_snapshot", None), instance.metric_snapshot())
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def update_vendor_sketches_on_delete(sender, instance: PurchaseOrder, origin=None, **kwargs):
+    if isinstance(origin, Vendor):
+        return
+    apply_sketch_delta(_stored_snapshot(instance), None)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def update_status_counts_on_save(sender, instance: PurchaseOrder, **kwargs):
+    apply_status_delta(getattr(instance, "_previous_snapshot", None), instance.metric_snapshot())
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def update_status_counts_on_delete(sender, instance: PurchaseOrder, origin=None, **kwargs):
+    if isinstance(origin, Vendor):
+        return
+    apply_status_delta(_stored_snapshot(instance), None)
+
+
 @receiver([post_save, post_delete], sender=PurchaseOrder)
-def update_vendor_metrics(sender, instance: PurchaseOrder, **kwargs):
-    recalc_metrics(instance.vendor)
+@per_row
+def update_vendor_metrics(sender, instance: PurchaseOrder, origin=None, **kwargs):
+    # Nothing to recalculate when the PO goes away with its vendor.
+    if isinstance(origin, Vendor):
+        return
+    request_recalc(instance.vendor)
+
+
+@receiver(metrics_recalculated, sender=Vendor)
+def publish_vendor_metrics(sender, vendor_id, metrics, **kwargs):
+    publish_on_commit("vendor.metrics", {"vendor": vendor_id, **metrics}, vendor_id)
 
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def publish_purchase_order_saved(sender, instance: PurchaseOrder, created=False, **kwargs):
+    previous = getattr(instance, "_previous_snapshot", None)
+    if created:
+        event = "po.created"
+    elif previous is not None and previous["status"] != instance.status:
+        event = "po.status_changed"
+    else:
+        return
+    if hub.subscriber_count:
+        data = dict(PurchaseOrderSerializer(instance).data)
+        if previous is not None:
+            data["previous_status"] = previous["status"]
+        publish_on_commit(event, data, instance.vendor_id)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def queue_purchase_order_webhooks(sender, instance: PurchaseOrder, created=False, **kwargs):
+    """
+    Write webhook outbox rows in the PO's transaction; ``dispatch_webhooks``
+    sends them, so no network call happens on the write path.
+    """
+    previous = getattr(instance, "_previous_snapshot", None)
+    if created:
+        event, extra = "po.created", {}
+    elif previous is not None and previous["status"] != instance.status:
+        event, extra = "po.status_changed", {"previous_status": previous["status"]}
+    else:
+        return
+    enqueue_webhooks(event, instance.vendor_id, lambda: {**PurchaseOrderSerializer(instance).data, **extra})
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def publish_purchase_order_deleted(sender, instance: PurchaseOrder, **kwargs):
+    publish_on_commit("po.deleted", {"id": instance.pk, "vendor": instance.vendor_id}, instance.vendor_id)
+
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def log_purchase_order_saved(sender, instance: PurchaseOrder, **kwargs):
+    previous = getattr(instance, "_previous_snapshot", None)
+    if previous is not None and previous["vendor_id"] != instance.vendor_id:
+        # Moving a PO between vendors is a delete from the old vendor's mirror.
+        record_change(instance.pk, previous["vendor_id"], PurchaseOrderChange.DELETE)
+    record_change(instance.pk, instance.vendor_id)
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def log_purchase_order_deleted(sender, instance: PurchaseOrder, **kwargs):
+    record_change(instance.pk, instance.vendor_id, PurchaseOrderChange.DELETE)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@per_row
+def append_event_on_save(sender, instance: PurchaseOrder, **kwargs):
+    record_event(
+        instance,
+        getattr(instance, "_previous_snapshot", None),
+        source=getattr(instance, "_event_source", "api"),
+    )
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+@per_row
+def append_event_on_delete(sender, instance: PurchaseOrder, **kwargs):
+    record_event(instance, instance.metric_snapshot(), deleted=True, source=getattr(instance, "_event_source", "api"))
+
+
+@receiver([post_save, post_delete], sender=PurchaseOrder)
+@per_row
+def refresh_spend_cube(sender, instance: PurchaseOrder, **kwargs):
+    # The cube (and numpy) only exist in workers that have served a spend
+    # query; don't import them here. Other workers catch up from the change
+    # log on their next cube query.
+    spend = sys.modules.get("purchase_orders.spend")
+    if spend is not None and spend.cube.loaded:
+        transaction.on_commit(spend.cube.refresh)
@@ -0,0 +1,414 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Min
+from django.utils.dateparse import parse_datetime
+
+from .changes import latest_cursor, settled_horizon
+from .items import normalize_items
+from .models import ArchivedPurchaseOrder, PurchaseOrderChange, PurchaseOrderItem
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("vendor", "month", "category")
+# Canceled orders are not spend.
+EXCLUDED_STATUSES = ("canceled",)
+SNAPSHOT_VERSION = 1
+CHANGE_BATCH = 5000
+SCAN_CHUNK = 5000
+
+
+def month_key(moment) -> int:
+    return moment.year * 100 + moment.month
+
+
+def month_label(key: int) -> str:
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def parse_month(value: str) -> int:
+    """
+    ``"YYYY-MM"`` to the cube's ``YYYYMM`` integer.
+    """
+    year, month = value.split("-")
+    if not 1 <= int(month) <= 12:
+        raise ValueError(value)
+    return int(year) * 100 + int(month)
+
+
+class Dimension:
+    """
+    Values of one cube axis, each mapped to a dense integer code.
+    """
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SpendCube:
+    """
+    In-memory vendor x month x category cube of purchased quantity, spend
+    (``unit_price * quantity``) and item line count, built from the
+    normalized item lines of live and archived POs.
+
+    Cells are stored column-wise in numpy arrays (one coordinate array per
+    dimension plus the measures), so a slice-and-dice query is a boolean
+    mask and a ``bincount`` over at most a few hundred thousand cells.
+
+    Every PO's contribution is remembered so it can be taken back out.
+    ``refresh()`` tails the PO change log from ``cursor`` and re-applies
+    each changed PO. That is how the process that made a change (right
+    after commit, from the PO signals) and every other worker (before its
+    next query) stay current.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.loaded = False
+        self.cursor = 0
+        self.vendors, self.months, self.categories = Dimension(), Dimension(), Dimension()
+        self._cells = {}
+        self._size = 0
+        self._columns = {
+            "vendor": np.zeros(0, dtype=np.int32),
+            "month": np.zeros(0, dtype=np.int32),
+            "category": np.zeros(0, dtype=np.int32),
+            "quantity": np.zeros(0, dtype=np.int64),
+            "spend": np.zeros(0, dtype=np.float64),
+            "lines": np.zeros(0, dtype=np.int64),
+        }
+        # po_id -> ((cell, quantity, spend), ...), one entry per item line.
+        self._contributions = {}
+
+    # Building and incremental updates
+
+    def _cell(self, vendor_id: int, month: int, category: str) -> int:
+        key = (self.vendors.code(vendor_id), self.months.code(month), self.categories.code(category))
+        cell = self._cells.get(key)
+        if cell is None:
+            if self._size == len(self._columns["spend"]):
+                capacity = max(1024, self._size * 2)
+                for name, column in self._columns.items():
+                    grown = np.zeros(capacity, dtype=column.dtype)
+                    grown[:self._size] = column[:self._size]
+                    self._columns[name] = grown
+            cell = self._cells[key] = self._size
+            for name, code in zip(DIMENSIONS, key):
+                self._columns[name][cell] = code
+            self._size += 1
+        return cell
+
+    def _add(self, po_id: int, vendor_id: int, order_date, lines) -> None:
+        """
+        Add one PO's ``(category, quantity, unit_price)`` lines. A line of
+        unknown quantity counts as a line but adds no quantity or spend.
+        """
+        month = month_key(order_date)
+        entries = []
+        for category, quantity, unit_price in lines:
+            cell = self._cell(vendor_id, month, category)
+            quantity = quantity or 0
+            spend = (unit_price or 0.0) * quantity
+            entries.append((cell, quantity, spend))
+        self._apply_entries(entries, 1)
+        if entries:
+            self._contributions[po_id] = tuple(entries)
+
+    def _remove(self, po_id: int) -> None:
+        self._apply_entries(self._contributions.pop(po_id, ()), -1)
+
+    def _apply_entries(self, entries, sign: int) -> None:
+        columns = self._columns
+        for cell, quantity, spend in entries:
+            columns["quantity"][cell] += sign * quantity
+            columns["spend"][cell] += sign * spend
+            columns["lines"][cell] += sign
+
+    def _live_lines(self, po_ids=None):
+        """
+        ``(po_id, vendor_id, order_date, category, quantity, unit_price)``
+        rows of live, non-canceled POs, streamed in chunks.
+        """
+        lines = PurchaseOrderItem.objects.exclude(purchase_order__status__in=EXCLUDED_STATUSES)
+        if po_ids is not None:
+            lines = lines.filter(purchase_order_id__in=po_ids)
+        return lines.order_by("purchase_order_id", "line_number").values_list(
+            "purchase_order_id", "vendor_id", "purchase_order__order_date", "category", "quantity", "unit_price"
+        ).iterator(chunk_size=SCAN_CHUNK)
+
+    def _archived_orders(self, po_ids=None):
+        """
+        ``(po_id, vendor_id, order_date, lines)`` of archived, non-canceled
+        POs; their lines are normalized from the stored representation.
+        """
+        archived = ArchivedPurchaseOrder.objects.exclude(status__in=EXCLUDED_STATUSES)
+        if po_ids is not None:
+            archived = archived.filter(pk__in=po_ids)
+        for po in archived.order_by("pk").iterator(chunk_size=500):
+            data = po.representation()
+            lines = [
+                (line["category"], line["quantity"], line["unit_price"])
+                for line in normalize_items(data.get("items"), data.get("quantity") or 0)
+            ]
+            yield po.pk, po.vendor_id, parse_datetime(data["order_date"]), lines
+
+    def _load_orders(self, po_ids=None) -> None:
+        current, lines = None, []
+        for po_id, vendor_id, order_date, category, quantity, unit_price in self._live_lines(po_ids):
+            if current is not None and po_id != current[0]:
+                self._add(*current, lines)
+                lines = []
+            current = (po_id, vendor_id, order_date)
+            lines.append((category, quantity, unit_price))
+        if current is not None:
+            self._add(*current, lines)
+
+        for po_id, vendor_id, order_date, lines in self._archived_orders(po_ids):
+            # A PO being archived can briefly be in both tables; count it once.
+            if po_id not in self._contributions:
+                self._add(po_id, vendor_id, order_date, lines)
+
+    def build(self) -> None:
+        """
+        Full streaming scan of item lines and the archive. Changes committed
+        during the scan are picked up by the ``refresh()`` that follows.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            self._reset()
+            self.cursor = latest_cursor()
+            self._load_orders()
+            self.loaded = True
+            self.refresh()
+            logger.info("Built spend cube: %s cells in %.2fs", self._size, time.perf_counter() - start)
+
+    def refresh(self) -> int:
+        """
+        Apply PO changes logged after ``cursor``. Returns how many POs were
+        re-applied. Rebuilds if the change log was pruned past the cursor.
+
+        Changes still inside the settle window are applied too, but the
+        cursor stops before them so they are applied again next time; one
+        that commits late behind a higher id is then not skipped.
+        """
+        with self._lock:
+            if not self.loaded:
+                return 0
+            oldest = PurchaseOrderChange.objects.aggregate(oldest=Min("id"))["oldest"]
+            if self.cursor and oldest is not None and self.cursor < oldest - 1:
+                logger.info("Spend cube cursor %s expired; rebuilding", self.cursor)
+                self.build()
+                return 0
+            horizon = settled_horizon()
+            position = self.cursor
+            applied = 0
+            while True:
+                rows = list(
+                    PurchaseOrderChange.objects.filter(id__gt=position)
+                    .order_by("id")
+                    .values_list("id", "purchase_order_id")[:CHANGE_BATCH]
+                )
+                if not rows:
+                    return applied
+                po_ids = {po_id for _, po_id in rows}
+                for po_id in po_ids:
+                    self._remove(po_id)
+                self._load_orders(list(po_ids))
+                position = rows[-1][0]
+                self.cursor = position if horizon is None else max(self.cursor, min(position, horizon - 1))
+                applied += len(po_ids)
+
+    def ensure_loaded(self) -> None:
+        """
+        Make the cube current: load the snapshot (or build) on first use,
+        then catch up with the change log.
+        """
+        with self._lock:
+            if not self.loaded and not self.load_snapshot():
+                self.build()
+                self.save_snapshot()
+            self.refresh()
+
+    # Queries
+
+    def query(self, group_by=(), vendors=None, categories=None, month_from=None, month_to=None, limit=None) -> dict:
+        """
+        Sum quantity, spend and lines over the cells matching the filters,
+        grouped by any of ``DIMENSIONS``; rows come back by spend, highest
+        first. ``month_from``/``month_to`` are inclusive ``YYYYMM`` ints and
+        categories match case-insensitively.
+        """
+        with self._lock:
+            return self._query(group_by, vendors, categories, month_from, month_to, limit)
+
+    def _query(self, group_by, vendors, categories, month_from, month_to, limit) -> dict:
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        vendor_values = np.array(self.vendors.values, dtype=np.int64)
+        month_values = np.array(self.months.values, dtype=np.int64)
+        category_values = self.categories.values
+
+        mask = columns["lines"] != 0
+        if vendors is not None:
+            mask &= np.isin(vendor_values, list(vendors))[columns["vendor"]]
+        if categories is not None:
+            wanted = {category.lower() for category in categories}
+            mask &= np.array([value.lower() in wanted for value in category_values], dtype=bool)[columns["category"]]
+        if month_from is not None:
+            mask &= month_values[columns["month"]] >= month_from
+        if month_to is not None:
+            mask &= month_values[columns["month"]] <= month_to
+
+        codes = [columns[name][mask].astype(np.int64) for name in group_by]
+        measures = {name: columns[name][mask] for name in ("quantity", "spend", "lines")}
+        totals = {
+            "quantity": int(measures["quantity"].sum()),
+            "spend": float(measures["spend"].sum()),
+            "lines": int(measures["lines"].sum()),
+        }
+        if not group_by:
+            return {"group_by": [], "rows": [], "totals": totals, "cursor": self.cursor}
+
+        # One integer key per group: mixed-radix combination of the codes.
+        sizes = {"vendor": len(vendor_values), "month": len(month_values), "category": len(category_values)}
+        keys = np.zeros(int(mask.sum()), dtype=np.int64)
+        for name, code in zip(group_by, codes):
+            keys = keys * max(sizes[name], 1) + code
+        groups, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        sums = {
+            name: np.bincount(inverse, weights=values, minlength=len(groups))
+            for name, values in measures.items()
+        }
+        order = np.argsort(-sums["spend"], kind="stable")
+        if limit is not None:
+            order = order[:limit]
+
+        labels = {
+            "vendor": vendor_values.tolist(),
+            "month": [month_label(month) for month in month_values.tolist()],
+            "category": category_values,
+        }
+        columns_out = [
+            [labels[name][value] for value in code[first[order]].tolist()] for name, code in zip(group_by, codes)
+        ]
+        quantities = np.rint(sums["quantity"][order]).astype(np.int64).tolist()
+        spends = sums["spend"][order].tolist()
+        lines = np.rint(sums["lines"][order]).astype(np.int64).tolist()
+        rows = [
+            {**dict(zip(group_by, values)), "quantity": quantity, "spend": spend, "lines": count}
+            for *values, quantity, spend, count in zip(*columns_out, quantities, spends, lines)
+        ]
+        return {"group_by": list(group_by), "rows": rows, "totals": totals, "cursor": self.cursor}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "cursor": self.cursor,
+                "cells": self._size,
+                "orders": len(self._contributions),
+                "vendors": len(self.vendors),
+                "months": len(self.months),
+                "categories": len(self.categories),
+            }
+
+    # Snapshots
+
+    def save_snapshot(self, path=None) -> bool:
+        """
+        Write the cube, its cursor and the per-PO contributions to an
+        ``.npz`` file (atomically), for a fast warm start.
+        """
+        path = Path(path or settings.SPEND_CUBE_SNAPSHOT)
+        if not path.name:
+            return False
+        with self._lock:
+            if not self.loaded:
+                return False
+            size = self._size
+            po_ids = np.fromiter(self._contributions, dtype=np.int64, count=len(self._contributions))
+            entries = [entry for po_entries in self._contributions.values() for entry in po_entries]
+            offsets = np.zeros(len(po_ids) + 1, dtype=np.int64)
+            np.cumsum([len(po_entries) for po_entries in self._contributions.values()], out=offsets[1:])
+            arrays = {
+                "meta": np.array([SNAPSHOT_VERSION, self.cursor], dtype=np.int64),
+                "vendors": np.array(self.vendors.values, dtype=np.int64),
+                "months": np.array(self.months.values, dtype=np.int64),
+                "categories": np.array(self.categories.values, dtype=np.str_),
+                **{name: column[:size] for name, column in self._columns.items()},
+                "po_ids": po_ids,
+                "po_offsets": offsets,
+                "entry_cell": np.array([cell for cell, _, _ in entries], dtype=np.int64),
+                "entry_quantity": np.array([quantity for _, quantity, _ in entries], dtype=np.int64),
+                "entry_spend": np.array([spend for _, _, spend in entries], dtype=np.float64),
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as handle:
+            np.savez(handle, **arrays)
+        os.replace(temporary, path)
+        return True
+
+    def load_snapshot(self, path=None) -> bool:
+        """
+        Load a snapshot written by ``save_snapshot``. Returns False (leaving
+        the cube empty) if there is none, it is from another version, or
+        its cursor is not in this database's change log range.
+        """
+        path = Path(path or settings.SPEND_CUBE_SNAPSHOT)
+        if not path.name or not path.exists():
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring unreadable spend cube snapshot %s: %s", path, exc)
+            return False
+        version, cursor = arrays["meta"].tolist()
+        oldest = PurchaseOrderChange.objects.aggregate(oldest=Min("id"))["oldest"]
+        if version != SNAPSHOT_VERSION or cursor > latest_cursor() or (oldest is not None and cursor < oldest - 1):
+            return False
+
+        with self._lock:
+            self._reset()
+            self.vendors = Dimension(arrays["vendors"].tolist())
+            self.months = Dimension(arrays["months"].tolist())
+            self.categories = Dimension(arrays["categories"].tolist())
+            self._size = len(arrays["spend"])
+            for name in self._columns:
+                self._columns[name] = arrays[name].copy()
+            self._cells = {
+                key: cell for cell, key in enumerate(zip(*(arrays[name].tolist() for name in DIMENSIONS)))
+            }
+            entries = list(zip(
+                arrays["entry_cell"].tolist(), arrays["entry_quantity"].tolist(), arrays["entry_spend"].tolist()
+            ))
+            offsets = arrays["po_offsets"].tolist()
+            self._contributions = {
+                po_id: tuple(entries[offsets[index]:offsets[index + 1]])
+                for index, po_id in enumerate(arrays["po_ids"].tolist())
+            }
+            self.cursor = cursor
+            self.loaded = True
+        return True
+
+
+cube = SpendCube()
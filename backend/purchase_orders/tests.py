@@ -1,3 +1,607 @@
-from django.test import TestCase
+import asyncio
+import heapq
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, FloatField, Sum
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from vendors.metrics import metrics_recalculated
+from vendors.models import Vendor
+from .acknowledgement import AcknowledgeConflict, acknowledge_purchase_order
+from .archive import MergedOrderList, archive_chunk
+from .changes import changes_since, latest_cursor
+from .models import (
+    ArchivedPurchaseOrder,
+    ArchivedPurchaseOrderItem,
+    IdempotencyRecord,
+    PurchaseOrder,
+    PurchaseOrderChange,
+    PurchaseOrderEvent,
+    PurchaseOrderItem,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from .serializers import WebhookEndpointSerializer
+from .spend import SpendCube
+from .views import _stream_subscription
+from .webhook_dispatcher import WebhookDispatcher
+from .webhooks import claim_due
+
+
+def make_vendor(code="V1"):
+    return Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code)
+
+
+def make_purchase_order(vendor, number="PO-1", **fields):
+    now = timezone.now()
+    fields = {"order_date": now, "issue_date": now, "items": [], "quantity": 1, **fields}
+    return PurchaseOrder.objects.create(po_number=number, vendor=vendor, **fields)
+
+
+@override_settings(WEBHOOK_ALLOW_PRIVATE_URLS=False)
+class WebhookURLSafetyTests(TestCase):
+    def test_registration_refuses_http_and_private_hosts(self):
+        for url in (
+            "http://example.com/hook",
+            "https://127.0.0.1/hook",
+            "https://localhost/hook",
+            "https://169.254.169.254/latest/meta-data",
+            "https://10.0.0.5/hook",
+            "https://[::1]/hook",
+        ):
+            with self.subTest(url=url):
+                serializer = WebhookEndpointSerializer(data={"url": url})
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("url", serializer.errors)
+
+    def test_dispatcher_refuses_private_hosts_at_send_time(self):
+        # Stored directly, as if the host had resolved publicly when registered.
+        endpoint = WebhookEndpoint.objects.create(vendor=make_vendor(), url="https://127.0.0.1:9/hook")
+        delivery = WebhookDelivery.objects.create(endpoint=endpoint, event="po.created", payload={})
+
+        dispatcher = WebhookDispatcher()
+        async_to_sync(dispatcher.run)(0, once=True)
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.attempts, 1)
+        self.assertIsNone(delivery.last_status_code)
+        self.assertIn("non-public", delivery.last_error)
+        self.assertEqual(dispatcher.stats["refused"], 1)
+
+    def test_response_body_is_not_stored(self):
+        endpoint = WebhookEndpoint.objects.create(vendor=make_vendor(), url="https://hooks.example.com/")
+        delivery = WebhookDelivery.objects.create(endpoint=endpoint, event="po.created", payload={})
+        transport = httpx.MockTransport(lambda request: httpx.Response(500, text="internal secrets"))
+
+        async_to_sync(WebhookDispatcher(transport=transport).run)(0, once=True)
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.last_status_code, 500)
+        self.assertEqual(delivery.last_error, "HTTP 500")
+
+
+class WebhookOrderingTests(TestCase):
+    def setUp(self):
+        self.endpoint = WebhookEndpoint.objects.create(vendor=make_vendor(), url="https://hooks.example.com/")
+        self.received = []
+        self.failing = True
+
+    def handler(self, request):
+        if self.failing:
+            return httpx.Response(503)
+        self.received.append(int(request.headers["X-Webhook-Id"]))
+        return httpx.Response(204)
+
+    def enqueue(self, count):
+        return [
+            WebhookDelivery.objects.create(endpoint=self.endpoint, event="po.created", payload={}).pk
+            for _ in range(count)
+        ]
+
+    def dispatch(self, batch_size=100):
+        dispatcher = WebhookDispatcher(batch_size=batch_size, transport=httpx.MockTransport(self.handler))
+        async_to_sync(dispatcher.run)(0, once=True)
+
+    def test_newer_events_wait_behind_a_backing_off_delivery(self):
+        first = self.enqueue(3)
+        self.dispatch()  # The first delivery fails; the rest wait for its retry.
+        self.failing = False
+        later = self.enqueue(2)
+
+        self.dispatch()
+        self.assertEqual(self.received, [])
+        self.assertFalse(WebhookDelivery.objects.filter(status=WebhookDelivery.DELIVERED).exists())
+
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.dispatch(batch_size=2)
+        self.assertEqual(self.received, first + later)
+
+    def test_leased_deliveries_block_the_rest_of_the_queue(self):
+        first, second = self.enqueue(2)
+        # As if another dispatcher had claimed the first delivery and is sending it.
+        WebhookDelivery.objects.filter(pk=first).update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.failing = False
+
+        self.dispatch()
+        self.assertEqual(self.received, [])
+
+
+class WebhookLeaseTests(TestCase):
+    def setUp(self):
+        self.endpoint = WebhookEndpoint.objects.create(vendor=make_vendor(), url="https://hooks.example.com/")
+        self.received = []
+        self.claimed_by_others = []
+
+    async def slow_handler(self, request):
+        await asyncio.sleep(0.1)
+        # A second dispatcher polling while this one is still sending.
+        self.claimed_by_others.extend(await sync_to_async(claim_due)(100, 60))
+        self.received.append(int(request.headers["X-Webhook-Id"]))
+        return httpx.Response(204)
+
+    def test_slow_endpoint_keeps_its_queue_leased(self):
+        ids = [
+            WebhookDelivery.objects.create(endpoint=self.endpoint, event="po.created", payload={}).pk
+            for _ in range(4)
+        ]
+        # Lease: 0.05s * (4 // 4 + 2) = 0.15s, well short of the four sends.
+        dispatcher = WebhookDispatcher(
+            batch_size=4, concurrency=4, timeout=0.05, transport=httpx.MockTransport(self.slow_handler)
+        )
+        async_to_sync(dispatcher.run)(0, once=True)
+
+        self.assertEqual(self.received, ids)
+        self.assertEqual(self.claimed_by_others, [])
+        self.assertEqual(WebhookDelivery.objects.filter(status=WebhookDelivery.DELIVERED).count(), 4)
+
+    def test_deliveries_of_another_vendors_endpoint_are_not_found(self):
+        owner, other = User.objects.create_user("owner"), User.objects.create_user("other")
+        self.endpoint.vendor.user = owner
+        self.endpoint.vendor.save()
+        other_vendor = make_vendor("V2")
+        other_vendor.user = other
+        other_vendor.save()
+        client = APIClient()
+        url = f"/api/vendor/webhooks/{self.endpoint.pk}/deliveries/"
+
+        client.force_authenticate(owner)
+        self.assertEqual(client.get(url).status_code, 200)
+        client.force_authenticate(other)
+        self.assertEqual(client.get(url).status_code, 404)
+        self.assertEqual(client.get("/api/vendor/webhooks/999999/deliveries/").status_code, 404)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.vendor = make_vendor()
+        self.user = User.objects.create_user("buyer")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now().isoformat()
+
+    def post(self, key, number="PO-1", **fields):
+        now = self.now
+        body = {
+            "po_number": number, "vendor": self.vendor.pk, "order_date": now, "issue_date": now,
+            "items": [], "quantity": 1, **fields,
+        }
+        return self.client.post("/api/purchase_orders/", body, format="json", headers={"Idempotency-Key": key})
+
+    def test_replayed_key_returns_the_stored_response(self):
+        first = self.post("key-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", first)
+
+        replay = self.post("key-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_refused(self):
+        self.post("key-1")
+        self.assertEqual(self.post("key-1", number="PO-2").status_code, 422)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_key_still_in_flight_is_a_conflict(self):
+        self.post("key-1")
+        IdempotencyRecord.objects.update(status_code=None, response_body=None)
+        self.assertEqual(self.post("key-1").status_code, 409)
+
+    def test_failed_request_releases_its_key(self):
+        self.assertEqual(self.post("key-1", quantity="many").status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.post("key-1").status_code, 201)
+
+    def test_expired_keys_are_claimed_afresh_and_purged(self):
+        self.post("key-1")
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        replay = self.post("key-1", number="PO-2")
+        self.assertEqual(replay.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", replay)
+
+        self.post("key-2", number="PO-3")
+        IdempotencyRecord.objects.filter(key="key-2").update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("Purged 1 expired idempotency keys", out.getvalue())
+        self.assertEqual(list(IdempotencyRecord.objects.values_list("key", flat=True)), ["key-1"])
+
+
+class AcknowledgeTests(TestCase):
+    def setUp(self):
+        self.po = make_purchase_order(make_vendor())
+
+    def test_already_acknowledged_po_still_takes_a_new_expected_delivery_date(self):
+        acknowledge_purchase_order(PurchaseOrder.objects.all(), self.po.pk)
+        expected = timezone.now() + timedelta(days=10)
+
+        po, acknowledged_now = acknowledge_purchase_order(
+            PurchaseOrder.objects.all(), self.po.pk, changes={"expected_delivery_date": expected}
+        )
+
+        self.assertFalse(acknowledged_now)
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.expected_delivery_date, expected)
+        self.assertEqual(self.po.version, 3)
+
+    def test_repeat_without_changes_writes_nothing(self):
+        acknowledge_purchase_order(PurchaseOrder.objects.all(), self.po.pk)
+        po, acknowledged_now = acknowledge_purchase_order(PurchaseOrder.objects.all(), self.po.pk)
+
+        self.assertFalse(acknowledged_now)
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.version, 2)
+
+
+class ConcurrentAcknowledgeTests(TransactionTestCase):
+    """
+    Many acknowledgers racing on one PO, each on its own thread and
+    database connection.
+    """
+    acknowledgers = 8
+
+    def test_exactly_one_acknowledgement_wins(self):
+        po = make_purchase_order(make_vendor())
+        recalculations = []
+
+        def on_recalculated(sender, vendor_id, **kwargs):
+            recalculations.append(vendor_id)
+
+        start = threading.Barrier(self.acknowledgers)
+
+        def acknowledge(_):
+            start.wait()
+            try:
+                return acknowledge_purchase_order(PurchaseOrder.objects.all(), po.pk, source="test")[1]
+            except AcknowledgeConflict:
+                return None
+            finally:
+                connection.close()
+
+        metrics_recalculated.connect(on_recalculated)
+        try:
+            with ThreadPoolExecutor(max_workers=self.acknowledgers) as executor:
+                results = list(executor.map(acknowledge, range(self.acknowledgers)))
+        finally:
+            metrics_recalculated.disconnect(on_recalculated)
+
+        self.assertEqual(results.count(True), 1, results)
+        self.assertEqual(results.count(False), self.acknowledgers - 1, results)
+        po.refresh_from_db()
+        self.assertEqual(po.status, "acknowledged")
+        self.assertEqual(po.version, 2)
+        self.assertEqual(recalculations, [po.vendor_id])
+        self.assertEqual(
+            PurchaseOrderEvent.objects.filter(purchase_order_id=po.pk, event_type=PurchaseOrderEvent.ACKNOWLEDGED).count(),
+            1,
+        )
+
+
+@override_settings(CHANGE_LOG_SETTLE_SECONDS=60)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.vendor = make_vendor()
+
+    def settle(self, *pos):
+        PurchaseOrderChange.objects.filter(purchase_order_id__in=[po.pk for po in pos]).update(
+            changed_at=timezone.now() - timedelta(minutes=5)
+        )
+
+    def test_recent_changes_wait_for_the_settle_window(self):
+        first = make_purchase_order(self.vendor, "PO-1")
+        second = make_purchase_order(self.vendor, "PO-2")
+        # The newer change is settled but the older id is not, as if its
+        # transaction had committed late; the cursor must not pass it.
+        self.settle(second)
+
+        upserts, deletes, cursor, has_more = changes_since(0)
+        self.assertEqual((upserts, deletes, cursor), ([], [], 0))
+        self.assertEqual(latest_cursor(), 0)
+
+        self.settle(first)
+        upserts, deletes, cursor, has_more = changes_since(0)
+        self.assertEqual([po.pk for po in upserts], [first.pk, second.pk])
+        self.assertEqual(cursor, latest_cursor())
+
+    def prune(self, days):
+        out = StringIO()
+        call_command("prune_po_changes", "--days", str(days), stdout=out)
+        return out.getvalue()
+
+    def test_prune_reports_the_cutoff_and_keeps_the_newest_row(self):
+        pos = [make_purchase_order(self.vendor, f"PO-{number}") for number in range(3)]
+        PurchaseOrderChange.objects.update(changed_at=timezone.now() - timedelta(days=40))
+        output = self.prune(60)
+        self.assertIn("Pruned 0 change-log rows from before", output)
+        self.assertIn("(60 days kept)", output)
+
+        pos[2].status = "acknowledged"
+        pos[2].save()
+        self.assertIn("Pruned 3 change-log rows", self.prune(30))
+        self.assertEqual(PurchaseOrderChange.objects.count(), 1)
+
+        PurchaseOrderChange.objects.update(changed_at=timezone.now() - timedelta(days=40))
+        make_purchase_order(self.vendor, "PO-new")
+        PurchaseOrderChange.objects.update(changed_at=timezone.now() - timedelta(days=40))
+        self.assertIn("Pruned 1 change-log rows", self.prune(30))
+        self.assertEqual(PurchaseOrderChange.objects.count(), 1)
+
+
+class EventStreamTicketTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer")
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def subscription(self, query):
+        return _stream_subscription(RequestFactory().get("/api/purchase_orders/events/", query))
+
+    def test_wsgi_server_refuses_tickets_and_streams(self):
+        self.assertEqual(self.client.post("/api/purchase_orders/events/ticket/", headers=self.auth).status_code, 404)
+        self.assertEqual(self.client.get("/api/purchase_orders/events/", headers=self.auth).status_code, 404)
+
+    def test_ticket_opens_the_stream_until_it_expires(self):
+        response = async_to_sync(AsyncClient().post)("/api/purchase_orders/events/ticket/", headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        ticket = response.json()["ticket"]
+
+        self.assertEqual(self.subscription({"ticket": ticket}), (self.user, None))
+        with override_settings(EVENT_STREAM_TICKET_SECONDS=-1):
+            self.assertEqual(self.subscription({"ticket": ticket}), (None, None))
+
+    def test_access_token_in_the_query_string_is_not_accepted(self):
+        self.assertEqual(self.subscription({"token": str(AccessToken.for_user(self.user))}), (None, None))
+        self.assertEqual(self.subscription({"ticket": "forged"}), (None, None))
+
+
+class ArchivedPurchaseOrderReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("vendor")
+        self.vendor = make_vendor()
+        self.vendor.user = self.user
+        self.vendor.save()
+        old = timezone.now() - timedelta(days=400)
+        self.archived = make_purchase_order(
+            self.vendor, "PO-OLD", status="completed", order_date=old, issue_date=old, quantity=2,
+            items=[
+                {"product": "Bolt", "category": "hardware", "unit_price": 1.5},
+                {"product": "Nut", "category": "hardware", "unit_price": 0.5, "quantity": 10},
+            ],
+        )
+        self.live = make_purchase_order(
+            self.vendor, "PO-NEW", items=[{"product": "Bolt", "category": "hardware", "unit_price": 2.0, "quantity": 3}]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self, query=""):
+        return self.client.get(f"/api/purchase_orders/items/summary/?{query}").json()
+
+    def test_item_summary_still_counts_archived_lines(self):
+        before = self.summary(), self.summary("group_by=vendor"), self.summary("group_by=product&min_unit_price=1")
+        archive_chunk([self.archived.pk])
+        after = self.summary(), self.summary("group_by=vendor"), self.summary("group_by=product&min_unit_price=1")
+
+        self.assertEqual(after, before)
+        self.assertEqual(before[0], [{
+            "category": "hardware", "line_count": 3, "po_count": 2, "total_quantity": 13,
+            "total_spend": 11.0, "avg_unit_price": 4 / 3,
+        }])
+
+    def test_vendor_list_and_detail_include_archived_orders(self):
+        archive_chunk([self.archived.pk])
+
+        results = self.client.get("/api/vendor/purchase_orders/").json()["results"]
+        self.assertEqual(
+            [(po["po_number"], po.get("archived", False)) for po in results], [("PO-NEW", False), ("PO-OLD", True)]
+        )
+        response = self.client.get(f"/api/vendor/purchase_orders/{self.archived.pk}/")
+        self.assertEqual(response.json()["po_number"], "PO-OLD")
+
+    def test_item_filters_reach_archived_orders(self):
+        archive_chunk([self.archived.pk])
+        after = (timezone.now() - timedelta(days=500)).isoformat()
+
+        def numbers(query):
+            response = self.client.get("/api/purchase_orders/", {"order_date_after": after, **query})
+            return [po["po_number"] for po in response.json()["results"]]
+
+        self.assertEqual(numbers({}), ["PO-NEW", "PO-OLD"])
+        self.assertEqual(numbers({"product": "nut"}), ["PO-OLD"])
+        self.assertEqual(numbers({"product": "bolt", "max_unit_price": 1.5}), ["PO-OLD"])
+        self.assertEqual(numbers({"product": "nut", "min_unit_price": 1}), [])
+
+    def test_page_survives_an_order_archived_mid_read(self):
+        merge = heapq.merge
+
+        def merge_then_archive(*sources, **kwargs):
+            rows = list(merge(*sources, **kwargs))
+            archive_chunk([self.archived.pk])
+            return iter(rows)
+
+        merged = MergedOrderList(PurchaseOrder.objects.all(), ArchivedPurchaseOrder.objects.all())
+        with mock.patch("purchase_orders.archive.heapq.merge", merge_then_archive):
+            page = merged[0:10]
+        self.assertEqual([po.po_number for po in page], ["PO-NEW", "PO-OLD"])
+        self.assertIsInstance(page[1], ArchivedPurchaseOrder)
+
+
+class ItemLineTests(TestCase):
+    def setUp(self):
+        self.vendor = make_vendor()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("buyer"))
+
+    def test_only_a_single_line_inherits_the_order_quantity(self):
+        single = make_purchase_order(self.vendor, "PO-1", quantity=4, items=[{"product": "Bolt"}])
+        multi = make_purchase_order(
+            self.vendor, "PO-2", quantity=4, items=[{"product": "Bolt"}, {"product": "Nut", "quantity": 3}]
+        )
+        self.assertEqual(list(single.item_lines.values_list("quantity", flat=True)), [4])
+        self.assertEqual(list(multi.item_lines.values_list("quantity", flat=True)), [None, 3])
+
+    def test_item_filters_must_match_the_same_line(self):
+        make_purchase_order(
+            self.vendor, "PO-1", items=[
+                {"product": "Bolt", "category": "hardware", "unit_price": 1.0},
+                {"product": "Drill", "category": "tools", "unit_price": 90.0},
+            ],
+        )
+        make_purchase_order(self.vendor, "PO-2", items=[{"product": "Bolt", "unit_price": 60.0}])
+
+        def numbers(query):
+            results = self.client.get(f"/api/purchase_orders/?{query}").json()["results"]
+            return sorted(po["po_number"] for po in results)
+
+        self.assertEqual(numbers("product=bolt"), ["PO-1", "PO-2"])
+        self.assertEqual(numbers("product=bolt&min_unit_price=50"), ["PO-2"])
+        self.assertEqual(numbers("category=tools&max_unit_price=10"), [])
+        self.assertEqual(numbers("category=tools&min_unit_price=50"), ["PO-1"])
+
+
+class SpendCubeTests(TestCase):
+    def setUp(self):
+        self.a, self.b = make_vendor("A"), make_vendor("B")
+        self.old = timezone.now() - timedelta(days=400)
+        make_purchase_order(self.a, "PO-1", items=[
+            {"category": "hardware", "unit_price": 2.0, "quantity": 5},
+            {"category": "tools", "unit_price": 40.0, "quantity": 1},
+        ])
+        self.archivable = make_purchase_order(
+            self.a, "PO-2", status="completed", order_date=self.old, issue_date=self.old, quantity=3,
+            items=[{"category": "hardware", "unit_price": 1.5}],
+        )
+        self.canceled = make_purchase_order(
+            self.b, "PO-3", status="canceled", items=[{"category": "tools", "unit_price": 9.0, "quantity": 2}]
+        )
+
+    def expected(self):
+        totals = {}
+        for lines in (
+            PurchaseOrderItem.objects.exclude(purchase_order__status="canceled"),
+            ArchivedPurchaseOrderItem.objects.exclude(status="canceled"),
+        ):
+            rows = lines.values_list("vendor_id", "category").annotate(
+                total_quantity=Sum("quantity"),
+                total_spend=Sum(F("unit_price") * F("quantity"), output_field=FloatField()),
+                line_count=Count("id"),
+            )
+            for vendor_id, category, quantity, spend, count in rows:
+                total = totals.setdefault((vendor_id, category), [0, 0.0, 0])
+                total[0] += quantity or 0
+                total[1] += spend or 0.0
+                total[2] += count
+        return totals
+
+    def assertMatchesSQL(self, cube):
+        rows = cube.query(["vendor", "category"])["rows"]
+        self.assertEqual(
+            {(row["vendor"], row["category"]): [row["quantity"], row["spend"], row["lines"]] for row in rows},
+            self.expected(),
+        )
+
+    def test_cube_follows_inserts_updates_and_archiving(self):
+        cube = SpendCube()
+        cube.build()
+        self.assertMatchesSQL(cube)
+
+        make_purchase_order(self.b, "PO-4", items=[{"category": "tools", "unit_price": 12.5, "quantity": 4}])
+        self.canceled.status = "pending"
+        self.canceled.save()
+        po = PurchaseOrder.objects.get(po_number="PO-1")
+        po.items = [{"category": "hardware", "unit_price": 2.0, "quantity": 7}]
+        po.save()
+        cube.refresh()
+        self.assertMatchesSQL(cube)
+
+        archive_chunk([self.archivable.pk])
+        cube.refresh()
+        self.assertMatchesSQL(cube)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "cube.npz"
+            self.assertTrue(cube.save_snapshot(path))
+            restored = SpendCube()
+            self.assertTrue(restored.load_snapshot(path))
+        self.assertMatchesSQL(restored)
+
+    @override_settings(CHANGE_LOG_SETTLE_SECONDS=0)
+    def test_refresh_reapplies_changes_inside_the_settle_window(self):
+        cube = SpendCube()
+        cube.build()
+        cursor = cube.cursor
+        make_purchase_order(self.b, "PO-4", items=[{"category": "tools", "unit_price": 1.0, "quantity": 1}])
+        with self.settings(CHANGE_LOG_SETTLE_SECONDS=3600):
+            self.assertEqual(cube.refresh(), 1)
+            self.assertEqual(cube.cursor, cursor)
+            self.assertEqual(cube.refresh(), 1)
+            self.assertMatchesSQL(cube)
+        self.assertEqual(cube.refresh(), 1)
+        self.assertGreater(cube.cursor, cursor)
+        self.assertEqual(cube.refresh(), 0)
+        self.assertMatchesSQL(cube)
+
+    def test_only_staff_and_vendor_accounts_see_spend(self):
+        make_purchase_order(self.b, "PO-4", items=[{"category": "tools", "unit_price": 1.0, "quantity": 1}])
+        self.a.user = User.objects.create_user("vendor-a")
+        self.a.save()
+        users = {
+            "staff": User.objects.create_user("staff", is_staff=True),
+            "vendor": self.a.user,
+            "buyer": User.objects.create_user("buyer"),
+        }
+        client = APIClient()
+        with mock.patch("purchase_orders.spend.cube", SpendCube()), self.settings(SPEND_CUBE_SNAPSHOT=""):
+            responses = {}
+            for name, user in users.items():
+                client.force_authenticate(user)
+                responses[name] = client.get("/api/purchase_orders/spend/?group_by=vendor")
+        self.assertEqual(responses["buyer"].status_code, 403)
+        self.assertEqual([row["vendor"] for row in responses["vendor"].json()["rows"]], [self.a.pk])
+        self.assertEqual({row["vendor"] for row in responses["staff"].json()["rows"]}, {self.a.pk, self.b.pk})
+
+
+class PredictedDeliveryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("buyer"))
+
+    def test_non_integer_filters_are_a_bad_request(self):
+        for query in ("vendor=abc", "ids=1,x"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/purchase_orders/predicted_delivery/?{query}")
+                self.assertEqual(response.status_code, 400)
@@ -3,13 +3,33 @@ from .views import (
     PurchaseOrderListCreateView,
     PurchaseOrderRetrieveUpdateDestroyView,
     PurchaseOrderAcknowledgeView,
+    PurchaseOrderChangesView,
+    PurchaseOrderPurgeView,
+    PredictedDeliveryView,
+    PurchaseOrderItemListView,
+    PurchaseOrderItemSummaryView,
+    SpendCubeView,
     VendorPurchaseOrderListView,
     VendorPurchaseOrderDetailView,
+    VendorPurchaseOrderChangesView,
     VendorAcknowledgePurchaseOrderView,
+    VendorWebhookEndpointListCreateView,
+    VendorWebhookEndpointDetailView,
+    VendorWebhookDeliveryListView,
+    EventStreamTicketView,
+    purchase_order_event_stream,
 )
 
 urlpatterns = [
     path("purchase_orders/", PurchaseOrderListCreateView.as_view(), name="po-list-create"),
+    path("purchase_orders/changes/", PurchaseOrderChangesView.as_view(), name="po-changes"),
+    path("purchase_orders/predicted_delivery/", PredictedDeliveryView.as_view(), name="po-predicted-delivery"),
+    path("purchase_orders/purge/", PurchaseOrderPurgeView.as_view(), name="po-purge"),
+    path("purchase_orders/events/", purchase_order_event_stream, name="po-event-stream"),
+    path("purchase_orders/events/ticket/", EventStreamTicketView.as_view(), name="po-event-stream-ticket"),
+    path("purchase_orders/items/", PurchaseOrderItemListView.as_view(), name="po-item-list"),
+    path("purchase_orders/items/summary/", PurchaseOrderItemSummaryView.as_view(), name="po-item-summary"),
+    path("purchase_orders/spend/", SpendCubeView.as_view(), name="po-spend-cube"),
     path("purchase_orders/<int:pk>/", PurchaseOrderRetrieveUpdateDestroyView.as_view(), name="po-detail"),
     path(
         "purchase_orders/<int:pk>/acknowledge/",
@@ -18,10 +38,18 @@ urlpatterns = [
     ),
     # Vendor-specific endpoints
     path("vendor/purchase_orders/", VendorPurchaseOrderListView.as_view(), name="vendor-po-list"),
+    path("vendor/purchase_orders/changes/", VendorPurchaseOrderChangesView.as_view(), name="vendor-po-changes"),
     path("vendor/purchase_orders/<int:pk>/", VendorPurchaseOrderDetailView.as_view(), name="vendor-po-detail"),
     path(
         "vendor/purchase_orders/<int:pk>/acknowledge/",
         VendorAcknowledgePurchaseOrderView.as_view(),
         name="vendor-po-acknowledge",
     ),
+    path("vendor/webhooks/", VendorWebhookEndpointListCreateView.as_view(), name="vendor-webhook-list"),
+    path("vendor/webhooks/<int:pk>/", VendorWebhookEndpointDetailView.as_view(), name="vendor-webhook-detail"),
+    path(
+        "vendor/webhooks/<int:pk>/deliveries/",
+        VendorWebhookDeliveryListView.as_view(),
+        name="vendor-webhook-deliveries",
+    ),
 ]
\ No newline at end of file
@@ -1,27 +1,159 @@
-from django.utils import timezone
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Sum
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
-from .models import PurchaseOrder
-from .serializers import PurchaseOrderSerializer
-from .permissions import IsVendorOwner
+from vendors.jobs import enqueue
+from vendors.models import MaintenanceJob
+from vendors.serializers import MaintenanceJobSerializer
 
+from .acknowledgement import AcknowledgeConflict, acknowledge_purchase_order
+from .archive import MergedOrderList, archived_matches
+from .broadcast import hub
+from .changes import DEFAULT_LIMIT, CursorExpired, changes_since, latest_cursor
+from .filters import ArchivedPurchaseOrderItemFilter, PurchaseOrderFilter, PurchaseOrderItemFilter
+from .idempotency import IdempotentPostMixin, run_idempotent
+from .models import (
+    ArchivedPurchaseOrder,
+    ArchivedPurchaseOrderItem,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from .serializers import (
+    PurchaseOrderSerializer,
+    PurchaseOrderItemSerializer,
+    PurchaseOrderPurgeSerializer,
+    WebhookDeliverySerializer,
+    WebhookEndpointSerializer,
+)
+from .permissions import IsStaffOrVendor, IsVendorOwner
 
-class PurchaseOrderListCreateView(generics.ListCreateAPIView):
-    queryset = PurchaseOrder.objects.select_related("vendor").all()
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The purchase order has been modified since the version in If-Match."
+    default_code = "precondition_failed"
+
+
+class AcknowledgeConflictError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The purchase order is being modified concurrently; retry the request."
+    default_code = "conflict"
+
+
+def parse_if_match(request):
+    """
+    Return the PO version from an ``If-Match: "<version>"`` header, or None.
+    """
+    header = request.headers.get("If-Match")
+    if not header or header.strip() == "*":
+        return None
+    tag = header.split(",")[0].strip().removeprefix("W/").strip('"')
+    try:
+        return int(tag)
+    except ValueError:
+        raise PreconditionFailed("If-Match must be a purchase order version ETag.")
+
+
+class ArchiveMergedListMixin:
+    """
+    Lists live POs and ``archived`` ones as one newest-first sequence;
+    archived rows carry ``"archived": true``.
+    """
+
+    def list_with_archive(self, live, archived):
+        merged = MergedOrderList(live, archived)
+        page = self.paginate_queryset(merged)
+        rows = page if page is not None else merged[0:len(merged)]
+        data = [
+            po.representation() if isinstance(po, ArchivedPurchaseOrder) else self.get_serializer(po).data
+            for po in rows
+        ]
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+class PurchaseOrderListCreateView(ArchiveMergedListMixin, IdempotentPostMixin, generics.ListCreateAPIView):
+    """
+    When ``order_date_after``/``order_date_before`` reach back into the
+    archive, archived POs are merged in (newest first, ``"archived": true``).
+    """
+    queryset = PurchaseOrder.objects.select_related("vendor").order_by("pk")
     serializer_class = PurchaseOrderSerializer
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["vendor"]
+    filterset_class = PurchaseOrderFilter
+
+    def list(self, request, *args, **kwargs):
+        archived = archived_matches(request.query_params)
+        if archived is None:
+            return super().list(request, *args, **kwargs)
+        return self.list_with_archive(self.filter_queryset(self.get_queryset()), archived)
 
 
 class PurchaseOrderRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Responses carry the PO version as an ETag. Sending it back in If-Match
+    on PUT/PATCH/DELETE makes the write conditional (412 if it moved on).
+    """
     queryset = PurchaseOrder.objects.select_related("vendor").all()
     serializer_class = PurchaseOrderSerializer
     lookup_field = "pk"
-    
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = ArchivedPurchaseOrder.objects.filter(pk=kwargs["pk"]).first()
+            if archived is None:
+                raise
+            return Response(archived.representation())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response.data, dict) and "version" in response.data:
+            response["ETag"] = f'"{response.data["version"]}"'
+        return response
+
     def perform_update(self, serializer):
-        serializer.save()
+        expected = parse_if_match(self.request)
+        if expected is None:
+            serializer.save()
+            return
+        with transaction.atomic():
+            # Claim the next version atomically; a concurrent writer loses here.
+            claimed = PurchaseOrder.objects.filter(pk=serializer.instance.pk, version=expected).update(
+                version=F("version") + 1
+            )
+            if not claimed:
+                raise PreconditionFailed()
+            serializer.instance.version = expected
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        expected = parse_if_match(self.request)
+        if expected is not None and expected != instance.version:
+            raise PreconditionFailed()
+        instance.delete()
 
 
 class PurchaseOrderAcknowledgeView(generics.UpdateAPIView):
@@ -31,16 +163,243 @@ class PurchaseOrderAcknowledgeView(generics.UpdateAPIView):
     lookup_field = "pk"
 
     def post(self, request, *args, **kwargs):
-        po = self.get_object()
-        if po.acknowledgment_date is None:
-            po.acknowledgment_date = timezone.now()
-        po.status = "acknowledged"
-        po.save(update_fields=["acknowledgment_date", "status"])
+        return run_idempotent(request, lambda: self.acknowledge(request, *args, **kwargs))
+
+    def acknowledge(self, request, *args, **kwargs):
+        try:
+            po, _ = acknowledge_purchase_order(self.get_queryset(), kwargs["pk"], source="buyer")
+        except AcknowledgeConflict:
+            raise AcknowledgeConflictError()
         serializer = self.get_serializer(po)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class VendorPurchaseOrderListView(generics.ListAPIView):
+class PurchaseOrderPurgeView(generics.GenericAPIView):
+    """
+    Schedule a background purge of POs matching ``vendor``, ``status`` and
+    ``before`` (order date). Returns the job (202); poll ``/api/jobs/<id>/``.
+    """
+    serializer_class = PurchaseOrderPurgeSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(MaintenanceJob.PO_PURGE, serializer.to_job_params(), request.user)
+        return Response(MaintenanceJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class PurchaseOrderItemListView(generics.ListAPIView):
+    queryset = PurchaseOrderItem.objects.select_related("purchase_order").all()
+    serializer_class = PurchaseOrderItemSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PurchaseOrderItemFilter
+
+
+class PredictedDeliveryView(generics.GenericAPIView):
+    """
+    Predicted delivery dates for open (pending/acknowledged) POs.
+
+    Query params: ``vendor``, ``ids`` (comma separated), ``limit`` (default
+    1000, max 10000). Each row has ``predicted``, an ``earliest``/``latest``
+    range and the ``basis`` used.
+    """
+    queryset = PurchaseOrder.objects.filter(status__in=PurchaseOrder.OPEN_STATUSES)
+    default_limit = 1000
+    max_limit = 10000
+
+    def get(self, request, *args, **kwargs):
+        qs = self.get_queryset()
+        if request.query_params.get("vendor"):
+            try:
+                qs = qs.filter(vendor_id=int(request.query_params["vendor"]))
+            except ValueError:
+                return Response({"detail": "vendor must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get("ids"):
+            try:
+                qs = qs.filter(pk__in=[int(pk) for pk in request.query_params["ids"].split(",") if pk])
+            except ValueError:
+                return Response({"detail": "ids must be comma-separated integers."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        rows = list(qs.order_by("pk").values_list("pk", "vendor_id", "issue_date", "expected_delivery_date")[:limit])
+        if not rows:
+            return Response([])
+        # numpy is only imported by the first prediction request, not at worker start.
+        from vendors.analytics import iso_datetimes, predict_deliveries
+
+        predictions = predict_deliveries(rows)
+        columns = [
+            predictions["id"].tolist(),
+            predictions["vendor"].tolist(),
+            *(iso_datetimes(predictions[name]) for name in ("predicted", "earliest", "latest")),
+            predictions["basis"].tolist(),
+        ]
+        keys = ("id", "vendor", "predicted_delivery_date", "earliest", "latest", "basis")
+        return Response([dict(zip(keys, row)) for row in zip(*columns)])
+
+
+class PurchaseOrderItemSummaryView(generics.GenericAPIView):
+    """
+    Aggregate item lines in SQL, grouped by ``group_by`` (product, category or vendor).
+    Lines of archived POs are aggregated separately and added in.
+    """
+    queryset = PurchaseOrderItem.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PurchaseOrderItemFilter
+    group_by_fields = ("category", "product", "vendor")
+
+    @staticmethod
+    def aggregate(lines, column):
+        return (
+            lines.values(column)
+            .annotate(
+                line_count=Count("id"),
+                po_count=Count("purchase_order_id", distinct=True),
+                total_quantity=Sum("quantity"),
+                total_spend=Sum(F("unit_price") * F("quantity"), output_field=FloatField()),
+                price_sum=Sum("unit_price"),
+                price_count=Count("unit_price"),
+            )
+            .values_list(column, "line_count", "po_count", "total_quantity", "total_spend", "price_sum", "price_count")
+            .order_by()
+        )
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get("group_by", "category")
+        if group_by not in self.group_by_fields:
+            return Response(
+                {"group_by": f"Must be one of: {', '.join(self.group_by_fields)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        sources = [self.aggregate(self.filter_queryset(self.get_queryset()), group_by)]
+        archived = ArchivedPurchaseOrderItemFilter(request.query_params, queryset=ArchivedPurchaseOrderItem.objects.all())
+        if archived.is_valid():
+            column = "vendor_id" if group_by == "vendor" else group_by
+            sources.append(self.aggregate(archived.qs, column))
+
+        # A PO is either live or archived, so every total (po_count too) adds up.
+        totals = {}
+        for source in sources:
+            for key, *values in source:
+                row = totals.setdefault(key, [0, 0, 0, None, None, 0])
+                for index, value in enumerate(values):
+                    if value is not None:
+                        row[index] = value if row[index] is None else row[index] + value
+        rows = [
+            {
+                group_by: key,
+                "line_count": line_count,
+                "po_count": po_count,
+                "total_quantity": total_quantity,
+                "total_spend": total_spend,
+                "avg_unit_price": price_sum / price_count if price_count else None,
+            }
+            for key, (line_count, po_count, total_quantity, total_spend, price_sum, price_count) in totals.items()
+        ]
+        # Largest spend first; groups with no priced lines last.
+        rows.sort(key=lambda row: (
+            row["total_spend"] is None, -(row["total_spend"] or 0), row[group_by] is None, row[group_by] or "",
+        ))
+        return Response(rows)
+
+
+class SpendCubeView(generics.GenericAPIView):
+    """
+    Quantity and spend by any of vendor, month and category, served from
+    the in-memory spend cube (see ``purchase_orders.spend``).
+
+    Query params: ``group_by`` (comma separated), ``vendor`` (comma
+    separated ids), ``category`` (repeatable), ``month_from``/``month_to``
+    (``YYYY-MM``, inclusive) and ``limit``. Staff see every vendor, vendor
+    accounts only their own spend. Canceled POs are left out.
+    """
+    permission_classes = [IsStaffOrVendor]
+
+    def get(self, request, *args, **kwargs):
+        from .spend import DIMENSIONS as SPEND_DIMENSIONS, cube as spend_cube, parse_month
+
+        params = request.query_params
+        group_by = [name for name in params.get("group_by", "").split(",") if name]
+        if not set(group_by) <= set(SPEND_DIMENSIONS) or len(set(group_by)) != len(group_by):
+            return Response(
+                {"group_by": f"Must be distinct values from: {', '.join(SPEND_DIMENSIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            vendors = [int(pk) for pk in params["vendor"].split(",") if pk] if params.get("vendor") else None
+            month_from = parse_month(params["month_from"]) if params.get("month_from") else None
+            month_to = parse_month(params["month_to"]) if params.get("month_to") else None
+            limit = max(1, int(params["limit"])) if params.get("limit") else None
+        except ValueError:
+            return Response(
+                {"detail": "vendor must be comma-separated ids, month_from/month_to YYYY-MM and limit an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not request.user.is_staff:
+            vendors = [request.user.vendor_profile.pk]
+
+        start = time.perf_counter()
+        spend_cube.ensure_loaded()
+        result = spend_cube.query(
+            group_by, vendors=vendors, categories=params.getlist("category") or None,
+            month_from=month_from, month_to=month_to, limit=limit,
+        )
+        response = Response(result)
+        response["Server-Timing"] = f"cube;dur={(time.perf_counter() - start) * 1000:.2f}"
+        return response
+
+
+class PurchaseOrderChangesMixin:
+    """
+    Delta sync: ``?since=<cursor>`` returns rows created or updated and ids
+    deleted after the cursor, plus the cursor to send next time. Without
+    ``since`` only the current cursor is returned, to start from after a
+    full download.
+    """
+    serializer_class = PurchaseOrderSerializer
+    pagination_class = None
+
+    def get_change_vendor_id(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        vendor_id = self.get_change_vendor_id()
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"next": str(latest_cursor(vendor_id)), "has_more": False, "upserts": [], "deletes": []})
+        try:
+            since = int(since)
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "since and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upserts, deletes, next_cursor, has_more = changes_since(since, limit, vendor_id)
+        except CursorExpired:
+            return Response(
+                {"detail": "Cursor has expired; download the full list and start again."},
+                status=status.HTTP_410_GONE,
+            )
+        return Response({
+            "next": str(next_cursor),
+            "has_more": has_more,
+            "upserts": self.get_serializer(upserts, many=True).data,
+            "deletes": deletes,
+        })
+
+
+class PurchaseOrderChangesView(PurchaseOrderChangesMixin, generics.GenericAPIView):
+    pass
+
+
+class VendorPurchaseOrderListView(ArchiveMergedListMixin, generics.ListAPIView):
+    """
+    The vendor's POs, newest first, archived ones included.
+    """
     serializer_class = PurchaseOrderSerializer
     permission_classes = [IsVendorOwner]
     
@@ -48,6 +407,10 @@ class VendorPurchaseOrderListView(generics.ListAPIView):
         vendor = self.request.user.vendor_profile
         return PurchaseOrder.objects.filter(vendor=vendor).select_related("vendor").order_by("-order_date")
 
+    def list(self, request, *args, **kwargs):
+        archived = ArchivedPurchaseOrder.objects.filter(vendor_id=request.user.vendor_profile.pk)
+        return self.list_with_archive(self.get_queryset(), archived)
+
 
 class VendorPurchaseOrderDetailView(generics.RetrieveAPIView):
     serializer_class = PurchaseOrderSerializer
@@ -58,6 +421,24 @@ class VendorPurchaseOrderDetailView(generics.RetrieveAPIView):
         vendor = self.request.user.vendor_profile
         return PurchaseOrder.objects.filter(vendor=vendor).select_related("vendor")
 
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = ArchivedPurchaseOrder.objects.filter(
+                pk=kwargs["pk"], vendor_id=request.user.vendor_profile.pk
+            ).first()
+            if archived is None:
+                raise
+            return Response(archived.representation())
+
+
+class VendorPurchaseOrderChangesView(PurchaseOrderChangesMixin, generics.GenericAPIView):
+    permission_classes = [IsVendorOwner]
+
+    def get_change_vendor_id(self):
+        return self.request.user.vendor_profile.pk
+
 
 class VendorAcknowledgePurchaseOrderView(generics.UpdateAPIView):
     serializer_class = PurchaseOrderSerializer
@@ -70,18 +451,140 @@ class VendorAcknowledgePurchaseOrderView(generics.UpdateAPIView):
         return PurchaseOrder.objects.filter(vendor=vendor).select_related("vendor")
     
     def post(self, request, *args, **kwargs):
-        po = self.get_object()
-        
-        if po.acknowledgment_date is None:
-            po.acknowledgment_date = timezone.now()
-        po.status = "acknowledged"
-        
-        update_fields = ["acknowledgment_date", "status"]
+        return run_idempotent(request, lambda: self.acknowledge(request, *args, **kwargs))
+
+    def acknowledge(self, request, *args, **kwargs):
+        changes = {}
         if 'expected_delivery_date' in request.data:
-            serializer = self.get_serializer(po, data={'expected_delivery_date': request.data['expected_delivery_date']}, partial=True)
+            serializer = self.get_serializer(data={'expected_delivery_date': request.data['expected_delivery_date']}, partial=True)
             if serializer.is_valid():
-                po.expected_delivery_date = serializer.validated_data.get('expected_delivery_date')
-                update_fields.append("expected_delivery_date")
-        
-        po.save(update_fields=update_fields)
-        return Response(self.get_serializer(po).data, status=status.HTTP_200_OK)
\ No newline at end of file
+                changes['expected_delivery_date'] = serializer.validated_data.get('expected_delivery_date')
+
+        try:
+            po, _ = acknowledge_purchase_order(self.get_queryset(), kwargs["pk"], source="vendor", changes=changes)
+        except AcknowledgeConflict:
+            raise AcknowledgeConflictError()
+        return Response(self.get_serializer(po).data, status=status.HTTP_200_OK)
+
+
+class VendorWebhookEndpointListCreateView(generics.ListCreateAPIView):
+    """
+    The vendor's webhook endpoints. The signing ``secret`` is generated on
+    create and returned with the endpoint.
+    """
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [IsVendorOwner]
+    pagination_class = None
+
+    def get_queryset(self):
+        return WebhookEndpoint.objects.filter(vendor=self.request.user.vendor_profile).order_by("pk")
+
+    def perform_create(self, serializer):
+        serializer.save(vendor=self.request.user.vendor_profile)
+
+
+class VendorWebhookEndpointDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [IsVendorOwner]
+
+    def get_queryset(self):
+        return WebhookEndpoint.objects.filter(vendor=self.request.user.vendor_profile)
+
+
+class VendorWebhookDeliveryListView(generics.ListAPIView):
+    """
+    Recent deliveries to one of the vendor's endpoints, newest first;
+    ``?status=dead`` lists the dead-lettered ones. 404 for another vendor's
+    endpoint, like the endpoint detail view.
+    """
+    serializer_class = WebhookDeliverySerializer
+    permission_classes = [IsVendorOwner]
+
+    def get_queryset(self):
+        endpoint = generics.get_object_or_404(
+            WebhookEndpoint, pk=self.kwargs["pk"], vendor=self.request.user.vendor_profile
+        )
+        deliveries = WebhookDelivery.objects.filter(endpoint=endpoint)
+        if self.request.query_params.get("status"):
+            deliveries = deliveries.filter(status=self.request.query_params["status"])
+        return deliveries.order_by("-pk")
+
+
+EVENT_STREAM_TICKET_SALT = "purchase_orders.event_stream"
+STREAMING_UNAVAILABLE = "Event streaming needs the ASGI server."
+
+
+class EventStreamTicketView(APIView):
+    """
+    Exchange the JWT for a short-lived ticket to open the event stream with.
+    ``EventSource`` cannot send headers, and a ticket in the query string
+    that expires within ``EVENT_STREAM_TICKET_SECONDS`` is far less useful
+    from an access log than the access token would be. 404 when this server
+    cannot stream, so clients fall back to fetching.
+    """
+
+    def post(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            raise NotFound(STREAMING_UNAVAILABLE)
+        return Response({
+            "ticket": signing.dumps(request.user.pk, salt=EVENT_STREAM_TICKET_SALT),
+            "expires_in": settings.EVENT_STREAM_TICKET_SECONDS,
+        })
+
+
+def _stream_subscription(request):
+    """
+    Authenticate an event-stream request from its ``?ticket=`` (or an
+    ``Authorization`` header) and return ``(user, vendor_id)``. Vendor users
+    only receive their own vendor's events.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    try:
+        if header:
+            user = auth.get_user(auth.get_validated_token(auth.get_raw_token(header)))
+        elif request.GET.get("ticket"):
+            user_id = signing.loads(
+                request.GET["ticket"], salt=EVENT_STREAM_TICKET_SALT, max_age=settings.EVENT_STREAM_TICKET_SECONDS
+            )
+            user = get_user_model().objects.select_related("vendor_profile").get(pk=user_id)
+        else:
+            return None, None
+    except (InvalidToken, TokenError, signing.BadSignature, get_user_model().DoesNotExist):
+        return None, None
+    vendor = getattr(user, "vendor_profile", None)
+    return user, vendor.pk if vendor else None
+
+
+async def purchase_order_event_stream(request):
+    """
+    Server-sent events for PO creation, status changes, deletion and vendor
+    metric updates. Requires the ASGI server: under WSGI the stream would
+    hold a worker thread for as long as the client stays connected.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": STREAMING_UNAVAILABLE}, status=404)
+    user, vendor_id = await sync_to_async(_stream_subscription)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    subscriber = hub.subscribe(vendor_id)
+    keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
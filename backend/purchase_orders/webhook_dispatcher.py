@@ -0,0 +1,158 @@
+import asyncio
+import json
+import socket
+import time
+from collections import defaultdict
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .webhooks import UnsafeWebhookURL, check_addresses, claim_due, extend_lease, record_results, sign
+
+USER_AGENT = "VendEase-Webhooks/1.0"
+
+
+def _retry_after(response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class PublicAddressTransport(httpx.AsyncBaseTransport):
+    """
+    Resolves every request's host itself, refuses anything but https to
+    public addresses, and connects to the address it checked (TLS still
+    verifies the hostname). Checking at send time, not only at
+    registration, stops a host from being re-pointed at an internal
+    service later (DNS rebinding). Redirects are never followed.
+    """
+
+    def __init__(self, **kwargs):
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not settings.WEBHOOK_ALLOW_PRIVATE_URLS:
+            host = request.url.host
+            if request.url.scheme != "https":
+                raise UnsafeWebhookURL("Webhook URLs must use https.")
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    host, request.url.port or 443, type=socket.SOCK_STREAM
+                )
+            except socket.gaierror:
+                raise UnsafeWebhookURL(f"{host} did not resolve.")
+            address = check_addresses(host, [info[4][0] for info in infos])
+            # The Host header was set from the original URL; SNI and
+            # certificate checks use ``sni_hostname``.
+            request.url = request.url.copy_with(host=address)
+            request.extensions = {**request.extensions, "sni_hostname": host}
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class WebhookDispatcher:
+    """
+    Sends outbox rows with one shared ``httpx.AsyncClient``, so keep-alive
+    connections to each receiver are reused across deliveries and batches.
+
+    Each batch is grouped by endpoint. Endpoints are sent to concurrently
+    (at most ``concurrency`` requests in flight), and one endpoint's
+    deliveries go out one at a time in outbox order. After a failure the
+    rest of that endpoint's batch waits for its retry, which keeps events
+    for one receiver in order and stops hammering a receiver that is down.
+    """
+
+    def __init__(self, batch_size=None, concurrency=None, timeout=None, transport=None):
+        self.batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+        self.concurrency = concurrency or settings.WEBHOOK_CONCURRENCY
+        self.timeout = timeout or settings.WEBHOOK_TIMEOUT_SECONDS
+        self.transport = transport
+        self.stats = defaultdict(int)
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            headers={"User-Agent": USER_AGENT, "Content-Type": "application/json"},
+            transport=self.transport or PublicAddressTransport(limits=limits),
+        )
+
+    async def run(self, poll_interval: float, once: bool = False) -> None:
+        """
+        Dispatch until the outbox is empty (``once``) or forever, sleeping
+        ``poll_interval`` seconds whenever nothing is due.
+        """
+        async with self._client() as client:
+            while True:
+                sent = await self.dispatch_batch(client)
+                if not sent:
+                    if once:
+                        return
+                    await asyncio.sleep(poll_interval)
+
+    async def dispatch_batch(self, client: httpx.AsyncClient) -> int:
+        # Long enough to wait for a free slot and send once; each endpoint's
+        # queue renews it before every send until its results are stored.
+        lease = self.timeout * (self.batch_size // self.concurrency + 2)
+        deliveries = await sync_to_async(claim_due)(self.batch_size, lease)
+        if not deliveries:
+            return 0
+        by_endpoint = defaultdict(list)
+        for delivery in deliveries:
+            by_endpoint[delivery.endpoint_id].append(delivery)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(self._send_in_order(client, semaphore, queue, lease) for queue in by_endpoint.values())
+        )
+        return len(deliveries)
+
+    async def _send_in_order(self, client, semaphore, deliveries, lease) -> None:
+        """
+        Send one endpoint's deliveries in order and store the results. A slow
+        receiver's queue can outlast the claim's lease, so the whole queue is
+        re-leased before each send and no other dispatcher sends it again.
+        """
+        results = []
+        for index, delivery in enumerate(deliveries):
+            async with semaphore:
+                await sync_to_async(extend_lease)([queued.pk for queued in deliveries], lease)
+                status_code, error, retry_after = await self._send(client, delivery)
+            results.append((delivery, status_code, error, retry_after, True))
+            if error:
+                results.extend((skipped, None, "", None, False) for skipped in deliveries[index + 1:])
+                break
+        await sync_to_async(record_results)(results)
+
+    async def _send(self, client, delivery) -> tuple:
+        """
+        POST one delivery; returns ``(status_code, error, retry_after)``
+        with an empty ``error`` on a 2xx response.
+        """
+        body = json.dumps({"id": delivery.pk, **delivery.payload}, cls=DjangoJSONEncoder).encode()
+        timestamp = str(int(time.time()))
+        headers = {
+            "X-Webhook-Id": str(delivery.pk),
+            "X-Webhook-Event": delivery.event,
+            "X-Webhook-Timestamp": timestamp,
+            "X-Webhook-Signature": sign(delivery.endpoint.secret, timestamp, body),
+        }
+        try:
+            response = await client.post(delivery.endpoint.url, content=body, headers=headers)
+        except UnsafeWebhookURL as exc:
+            self.stats["refused"] += 1
+            return None, str(exc), None
+        except httpx.HTTPError as exc:
+            # Only the error type: messages and response bodies can carry
+            # details of the receiving network, and vendors read last_error.
+            self.stats["errors"] += 1
+            return None, type(exc).__name__, None
+        if response.is_success:
+            self.stats["delivered"] += 1
+            return response.status_code, "", None
+        self.stats["failed"] += 1
+        return response.status_code, f"HTTP {response.status_code}", _retry_after(response)
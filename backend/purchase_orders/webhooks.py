@@ -0,0 +1,209 @@
+import hashlib
+import hmac
+import ipaddress
+import random
+import socket
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import WebhookDelivery, WebhookEndpoint
+
+
+class UnsafeWebhookURL(ValueError):
+    """
+    The URL is not https, or its host resolves to an address webhooks must
+    not reach (loopback, private, link-local, reserved).
+    """
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_addresses(host: str, addresses) -> str:
+    """
+    Return the first of ``host``'s resolved ``addresses`` if all of them
+    are public; a host with any private address is refused outright.
+    """
+    addresses = list(addresses)
+    if not addresses:
+        raise UnsafeWebhookURL(f"{host} did not resolve.")
+    for address in addresses:
+        if not is_public_address(address):
+            raise UnsafeWebhookURL(f"{host} resolves to a non-public address.")
+    return addresses[0]
+
+
+def check_webhook_url(url: str) -> None:
+    """
+    Raise ``UnsafeWebhookURL`` unless ``url`` is https and its host
+    resolves only to public addresses. The dispatcher checks again on every
+    request, so a host that re-resolves later (DNS rebinding) is still
+    refused. ``WEBHOOK_ALLOW_PRIVATE_URLS`` turns both checks off for local
+    development against ``webhook_stub_server``.
+    """
+    if settings.WEBHOOK_ALLOW_PRIVATE_URLS:
+        return
+    parts = urlsplit(url)
+    if parts.scheme != "https" or not parts.hostname:
+        raise UnsafeWebhookURL("Webhook URLs must use https.")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or 443, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeWebhookURL(f"{parts.hostname} did not resolve.")
+    check_addresses(parts.hostname, [info[4][0] for info in infos])
+
+
+def enqueue_webhooks(event: str, vendor_id: int, make_data) -> int:
+    """
+    Write an outbox row for every active endpoint of ``vendor_id`` that
+    subscribes to ``event``; ``make_data()`` builds the payload only when
+    there is one. Runs inside the caller's transaction, so the rows commit
+    (or roll back) with the PO change. Nothing is sent here.
+    """
+    endpoint_ids = [
+        pk for pk, events in
+        WebhookEndpoint.objects.filter(vendor_id=vendor_id, is_active=True).values_list("pk", "events")
+        if not events or event in events
+    ]
+    if not endpoint_ids:
+        return 0
+    payload = {"event": event, "occurred_at": timezone.now(), "data": make_data()}
+    WebhookDelivery.objects.bulk_create(
+        [WebhookDelivery(endpoint_id=pk, event=event, payload=payload) for pk in endpoint_ids]
+    )
+    return len(endpoint_ids)
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """
+    Value of the ``X-Webhook-Signature`` header: HMAC-SHA256 over
+    ``"<timestamp>.<body>"`` keyed with the endpoint secret.
+    """
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def retry_delay(attempts: int, retry_after=None) -> float:
+    """
+    Seconds before the next attempt: exponential from
+    ``WEBHOOK_RETRY_BASE_SECONDS`` with jitter, capped at
+    ``WEBHOOK_RETRY_MAX_SECONDS``. A receiver's ``Retry-After`` wins if longer.
+    """
+    delay = min(settings.WEBHOOK_RETRY_MAX_SECONDS, settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    delay *= random.uniform(0.5, 1.0)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.WEBHOOK_RETRY_MAX_SECONDS))
+    return delay
+
+
+def claim_due(batch_size: int, lease_seconds: float) -> list:
+    """
+    Take up to ``batch_size`` due deliveries and push their
+    ``next_attempt_at`` out by ``lease_seconds``, so other dispatchers skip
+    them while they are in flight; the dispatcher renews it with
+    ``extend_lease`` as it works through an endpoint's queue. A dispatcher
+    that dies mid-batch simply lets the lease run out.
+
+    Each endpoint gets its events in outbox order, across batches too. A
+    delivery is only claimed when no older delivery to its endpoint is
+    still pending and not due (backing off after a failure, or leased).
+    The endpoint rows are locked while claiming, so two dispatchers never
+    split one endpoint's queue between them.
+    """
+    now = timezone.now()
+    waiting_ahead = WebhookDelivery.objects.filter(
+        endpoint_id=OuterRef("endpoint_id"),
+        status=WebhookDelivery.PENDING,
+        next_attempt_at__gt=now,
+        pk__lt=OuterRef("pk"),
+    )
+    with transaction.atomic():
+        endpoint_ids = list(
+            WebhookEndpoint.objects.select_for_update(skip_locked=True)
+            .filter(
+                is_active=True,
+                pk__in=WebhookDelivery.objects.filter(
+                    status=WebhookDelivery.PENDING, next_attempt_at__lte=now
+                ).values("endpoint_id"),
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not endpoint_ids:
+            return []
+        deliveries = list(
+            WebhookDelivery.objects.filter(
+                endpoint_id__in=endpoint_ids, status=WebhookDelivery.PENDING, next_attempt_at__lte=now
+            )
+            .exclude(Exists(waiting_ahead))
+            .select_related("endpoint")
+            .order_by("pk")[:batch_size]
+        )
+        if deliveries:
+            WebhookDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+                next_attempt_at=now + timedelta(seconds=lease_seconds)
+            )
+    return deliveries
+
+
+def extend_lease(delivery_ids, lease_seconds: float) -> None:
+    """
+    Push the lease of claimed deliveries whose results are not stored yet
+    to ``lease_seconds`` from now.
+    """
+    WebhookDelivery.objects.filter(pk__in=delivery_ids, status=WebhookDelivery.PENDING).update(
+        next_attempt_at=timezone.now() + timedelta(seconds=lease_seconds)
+    )
+
+
+def record_results(results: list) -> None:
+    """
+    Store the outcome of one endpoint's deliveries: ``(delivery, status_code, error,
+    retry_after, attempted)`` tuples. Deliveries skipped behind a failure
+    (``attempted`` false) are released for the same retry time without
+    counting an attempt.
+    """
+    now = timezone.now()
+    retry_at = {}
+    for delivery, status_code, error, retry_after, attempted in results:
+        if not attempted:
+            continue
+        delivery.attempts += 1
+        delivery.last_status_code = status_code
+        delivery.last_error = error
+        if not error:
+            delivery.status = WebhookDelivery.DELIVERED
+            delivery.delivered_at = now
+        elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = WebhookDelivery.DEAD
+        else:
+            delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts, retry_after))
+            retry_at[delivery.endpoint_id] = delivery.next_attempt_at
+    for delivery, _, _, _, attempted in results:
+        if not attempted:
+            delivery.next_attempt_at = retry_at.get(delivery.endpoint_id, now)
+
+    WebhookDelivery.objects.bulk_update(
+        [delivery for delivery, *_ in results],
+        ["status", "attempts", "next_attempt_at", "last_status_code", "last_error", "delivered_at"],
+        batch_size=500,
+    )
+
+
+def requeue_dead(queryset=None) -> int:
+    """
+    Give dead deliveries a fresh set of attempts, due now.
+    """
+    queryset = WebhookDelivery.objects.all() if queryset is None else queryset
+    return queryset.filter(status=WebhookDelivery.DEAD).update(
+        status=WebhookDelivery.PENDING, attempts=0, next_attempt_at=timezone.now()
+    )
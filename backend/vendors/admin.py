@@ -1,3 +1,78 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
 
-# Register your models here.
+from config.pagination import EstimatedCountPaginator
+from .metrics import recalc_metrics
+from .models import HistoricalPerformance, Vendor
+from .sketches import SKETCH_FIELDS
+from .status_counts import STATUS_COUNT_FIELDS
+
+METRIC_FIELDS = ("on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate")
+
+
+class VendorListFilter(admin.SimpleListFilter):
+    """
+    Vendor filter that never loads the whole vendor table.
+
+    Offers the first vendors by name plus whichever one is selected; any
+    other vendor is reached through the "Purchase orders" link on the
+    vendor changelist, which sets ``?vendor=<id>``.
+    """
+    title = "vendor"
+    parameter_name = "vendor"
+    max_choices = 25
+    field_name = "vendor_id"
+
+    def lookups(self, request, model_admin):
+        vendors = list(Vendor.objects.order_by("name").values_list("pk", "name")[:self.max_choices])
+        selected = self.value()
+        if selected and selected.isdigit() and all(str(pk) != selected for pk, _ in vendors):
+            vendors += list(Vendor.objects.filter(pk=selected).values_list("pk", "name"))
+        return [(str(pk), name) for pk, name in vendors]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(**{self.field_name: self.value()})
+        return queryset
+
+
+@admin.register(Vendor)
+class VendorAdmin(admin.ModelAdmin):
+    list_display = ("name", "vendor_code", *METRIC_FIELDS, "purchase_orders_link")
+    search_fields = ("name", "vendor_code")
+    ordering = ("name",)
+    readonly_fields = (*METRIC_FIELDS, "created_at", "updated_at")
+    raw_id_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    actions = ["recalculate_metrics"]
+
+    def get_queryset(self, request):
+        # Saving a deferred field is skipped, so the change form can't clobber
+        # the sketches or status counters.
+        return super().get_queryset(request).defer(*SKETCH_FIELDS, *STATUS_COUNT_FIELDS)
+
+    @admin.display(description="Purchase orders")
+    def purchase_orders_link(self, obj):
+        url = reverse("admin:purchase_orders_purchaseorder_changelist")
+        return format_html('<a href="{}?vendor={}">View</a>', url, obj.pk)
+
+    @admin.action(description="Recalculate performance metrics")
+    def recalculate_metrics(self, request, queryset):
+        for vendor in queryset:
+            recalc_metrics(vendor)
+        self.message_user(request, f"Recalculated metrics for {queryset.count()} vendors.")
+
+
+@admin.register(HistoricalPerformance)
+class HistoricalPerformanceAdmin(admin.ModelAdmin):
+    list_display = ("vendor", "date", *METRIC_FIELDS)
+    list_select_related = ("vendor",)
+    list_filter = (VendorListFilter,)
+    autocomplete_fields = ("vendor",)
+    ordering = ("-date",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
@@ -0,0 +1,203 @@
+import warnings
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from purchase_orders.models import PurchaseOrder
+from .models import Vendor
+
+PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+# Vendors with fewer completed POs than this are predicted from fleet-wide figures.
+MIN_HISTORY = 3
+DAY = 86400.0
+HOUR = 3600.0
+OPEN_STATUSES = PurchaseOrder.OPEN_STATUSES
+
+HISTORY_FIELDS = ("vendor_id", "issue_date", "acknowledgment_date", "expected_delivery_date", "actual_delivery_date")
+
+
+def _seconds(values) -> np.ndarray:
+    """
+    Epoch seconds as float64, NaN where the value is missing.
+    """
+    with warnings.catch_warnings():
+        # Values are UTC-aware datetimes; numpy drops the (UTC) offset.
+        warnings.simplefilter("ignore", UserWarning)
+        stamps = np.array(values, dtype="datetime64[s]")
+    seconds = stamps.astype("float64")
+    seconds[np.isnat(stamps)] = np.nan
+    return seconds
+
+
+def iso_datetimes(seconds: np.ndarray) -> list:
+    """
+    Epoch seconds to ISO-8601 UTC strings, None where unknown.
+    """
+    text = np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s", timezone="UTC")
+    return [None if value == "NaT" else value for value in text.tolist()]
+
+
+def load_history(vendor_ids=None) -> dict:
+    """
+    Completed POs (with a delivery date) as column arrays.
+    """
+    qs = PurchaseOrder.objects.filter(status="completed", actual_delivery_date__isnull=False)
+    if vendor_ids is not None:
+        qs = qs.filter(vendor_id__in=list(vendor_ids))
+    rows = list(qs.order_by("vendor_id", "actual_delivery_date").values_list(*HISTORY_FIELDS))
+    if not rows:
+        return {"vendor": np.empty(0, dtype=np.int64), **{name: np.empty(0) for name in ("issue", "ack", "expected", "actual")}}
+    vendor, issue, ack, expected, actual = zip(*rows)
+    return {
+        "vendor": np.array(vendor, dtype=np.int64),
+        "issue": _seconds(issue),
+        "ack": _seconds(ack),
+        "expected": _seconds(expected),
+        "actual": _seconds(actual),
+    }
+
+
+def summarize(values: np.ndarray) -> dict:
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {"count": 0}
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "variance": float(values.var()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+    }
+
+
+def trend(at: np.ndarray, values: np.ndarray):
+    """
+    Least-squares slope of ``values`` per 30 days of ``at``, or None.
+    """
+    mask = ~(np.isnan(at) | np.isnan(values))
+    at, values = at[mask], values[mask]
+    if values.size < MIN_HISTORY or np.ptp(at) == 0:
+        return None
+    slope, _ = np.polyfit(at / (30 * DAY), values, 1)
+    return float(slope)
+
+
+def analyze(history: dict) -> dict:
+    lead_days = (history["actual"] - history["issue"]) / DAY
+    lateness_days = (history["actual"] - history["expected"]) / DAY
+    ack_hours = (history["ack"] - history["issue"]) / HOUR
+    ack_hours[ack_hours < 0] = np.nan
+    with_expected = ~np.isnan(lateness_days)
+    return {
+        "completed": int(history["actual"].size),
+        "on_time_rate": float((lateness_days[with_expected] <= 0).mean() * 100) if with_expected.any() else None,
+        "lead_time_days": {**summarize(lead_days), "trend_per_30_days": trend(history["actual"], lead_days)},
+        "lateness_days": {**summarize(lateness_days), "trend_per_30_days": trend(history["actual"], lateness_days)},
+        "acknowledgement_hours": summarize(ack_hours),
+    }
+
+
+def _cache_key(prefix: str, vendor: Vendor) -> str:
+    # Metrics recalculation bumps updated_at on every PO write, which retires stale entries.
+    return f"{prefix}:{vendor.pk}:{vendor.updated_at.timestamp()}"
+
+
+def vendor_delivery_analytics(vendor: Vendor) -> dict:
+    """
+    Lead-time, lateness and acknowledgement distributions for one vendor
+    (live completed POs), cached until the vendor's POs next change.
+    """
+    key = _cache_key("delivery_analytics", vendor)
+    result = cache.get(key)
+    if result is None:
+        result = analyze(load_history([vendor.pk]))
+        cache.set(key, result, settings.ANALYTICS_CACHE_SECONDS)
+    return result
+
+
+def _profile(history: dict) -> tuple:
+    lead = (history["actual"] - history["issue"]) / DAY
+    late = (history["actual"] - history["expected"]) / DAY
+    lead, late = lead[~np.isnan(lead)], late[~np.isnan(late)]
+    lead_p = np.percentile(lead, (10, 50, 90)) if lead.size else (np.nan,) * 3
+    late_p = np.percentile(late, (10, 50, 90)) if late.size else (np.nan,) * 3
+    return (int(lead.size), *map(float, lead_p), int(late.size), *map(float, late_p))
+
+
+def delivery_profiles(vendor_ids) -> dict:
+    """
+    ``{vendor_id: (lead_n, lead_p10, lead_p50, lead_p90, late_n, late_p10,
+    late_p50, late_p90)}`` in days, cached per vendor; ``None`` holds the
+    fleet-wide profile.
+    """
+    vendors = {pk: Vendor(pk=pk, updated_at=updated) for pk, updated in
+               Vendor.objects.filter(pk__in=list(vendor_ids)).values_list("pk", "updated_at")}
+    keys = {_cache_key("delivery_profile", vendor): pk for pk, vendor in vendors.items()}
+    cached = cache.get_many([*keys, "delivery_profile:fleet"])
+    profiles = {keys[key]: value for key, value in cached.items() if key in keys}
+
+    missing = [pk for pk in vendors if pk not in profiles]
+    if missing:
+        history = load_history(missing)
+        # Rows are sorted by vendor, so each vendor is one contiguous slice.
+        found, starts = np.unique(history["vendor"], return_index=True)
+        bounds = dict(zip(found.tolist(), zip(starts.tolist(), [*starts[1:].tolist(), history["vendor"].size])))
+        fresh = {}
+        for pk in missing:
+            start, stop = bounds.get(pk, (0, 0))
+            fresh[pk] = _profile({name: column[start:stop] for name, column in history.items()})
+        cache.set_many(
+            {_cache_key("delivery_profile", vendors[pk]): value for pk, value in fresh.items()},
+            settings.ANALYTICS_CACHE_SECONDS,
+        )
+        profiles.update(fresh)
+
+    fleet = cached.get("delivery_profile:fleet")
+    if fleet is None:
+        fleet = _profile(load_history())
+        cache.set("delivery_profile:fleet", fleet, settings.ANALYTICS_CACHE_SECONDS)
+    profiles[None] = fleet
+    return profiles
+
+
+def predict_deliveries(rows) -> dict:
+    """
+    Predict delivery for open POs given ``(id, vendor_id, issue_date,
+    expected_delivery_date)`` rows.
+
+    POs with an expected date are predicted as expected + the vendor's
+    median lateness, others as issue date + median lead time; the range is
+    the 10th to 90th percentile. Vendors with little history use the fleet
+    profile. Everything after loading the columns is array arithmetic.
+    """
+    if not rows:
+        return {"id": np.empty(0, dtype=np.int64)}
+    ids, vendors, issue, expected = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    vendors = np.array(vendors, dtype=np.int64)
+    issue, expected = _seconds(issue), _seconds(expected)
+
+    unique_vendors = np.unique(vendors)
+    profiles = delivery_profiles(unique_vendors.tolist())
+    fleet = np.array(profiles[None], dtype=np.float64)
+    table = np.array([profiles.get(pk, profiles[None]) for pk in unique_vendors.tolist()], dtype=np.float64)
+    # Too little history (or none at all): fall back to the fleet profile.
+    table[table[:, 0] < MIN_HISTORY, 0:4] = fleet[0:4]
+    table[table[:, 4] < MIN_HISTORY, 4:8] = fleet[4:8]
+    per_po = table[np.searchsorted(unique_vendors, vendors)]
+
+    use_expected = ~np.isnan(expected) & ~np.isnan(per_po[:, 6])
+    base = np.where(use_expected, expected, issue)
+    offsets = np.where(use_expected[:, None], per_po[:, 5:8], per_po[:, 1:4]) * DAY
+    predicted = base[:, None] + offsets
+    return {
+        "id": ids,
+        "vendor": vendors,
+        "earliest": predicted[:, 0],
+        "predicted": predicted[:, 1],
+        "latest": predicted[:, 2],
+        "basis": np.where(use_expected, "expected_plus_lateness", "issue_plus_lead_time"),
+    }
@@ -0,0 +1,12 @@
+import django_filters
+
+from config.filters import IdListFilter
+from .models import Vendor
+
+
+class VendorFilter(django_filters.FilterSet):
+    ids = IdListFilter()
+
+    class Meta:
+        model = Vendor
+        fields = []
@@ -0,0 +1,197 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.db_router import read_from_primary
+from purchase_orders.archive import archivable, archive_chunk
+from purchase_orders.changes import record_changes
+from purchase_orders.event_log import record_deletions
+from purchase_orders.models import ArchivedPurchaseOrder, ArchivedPurchaseOrderItem, PurchaseOrder, PurchaseOrderChange
+from purchase_orders.signals import suppress_signals
+from .leaderboard import refresh_ranks
+from .metrics import recalc_metrics
+from .models import MaintenanceJob, Vendor
+from .sketches import rebuild_sketches
+from .status_counts import subtract_status_counts
+from .windows import rebuild_buckets
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MAINTENANCE_JOB_WORKERS, thread_name_prefix="maintenance-job"
+            )
+        return _executor
+
+
+def enqueue(kind: str, params: dict, user=None) -> MaintenanceJob:
+    """
+    Create a job and, unless jobs are left to ``run_maintenance_jobs``,
+    start it on a worker thread once the current transaction commits.
+    """
+    job = MaintenanceJob.objects.create(
+        kind=kind, params=params, created_by=user if user and user.is_authenticated else None
+    )
+    if settings.MAINTENANCE_JOBS_IN_PROCESS:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id: int) -> None:
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_job(job_id: int) -> MaintenanceJob:
+    """
+    Run one job to completion, recording progress after every chunk.
+
+    Each chunk commits on its own, so an interrupted job can simply be run
+    again and picks up whatever rows are left.
+    """
+    job = MaintenanceJob.objects.get(pk=job_id)
+    job.status = MaintenanceJob.RUNNING
+    job.started_at = timezone.now()
+    job.error = ""
+    job.save(update_fields=["status", "started_at", "error"])
+    try:
+        with read_from_primary():
+            RUNNERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("Maintenance job %s failed", job.pk)
+        job.status = MaintenanceJob.FAILED
+        job.error = str(exc)
+    else:
+        job.status = MaintenanceJob.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "processed", "finished_at"])
+    return job
+
+
+def _chunks(queryset, size):
+    """
+    Yield lists of primary keys, re-querying each time because the
+    previous chunk has been deleted.
+    """
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+
+
+def _delete_purchase_orders(job: MaintenanceJob, queryset, source: str) -> set:
+    """
+    Delete the POs in ``queryset`` chunk by chunk, writing change-log
+    tombstones and ``deleted`` events in bulk. Returns the affected vendor ids.
+    """
+    vendor_ids = set()
+    for ids in _chunks(queryset, settings.MAINTENANCE_JOB_CHUNK_SIZE):
+        with transaction.atomic():
+            snapshots = {
+                row.pop("id"): row
+                for row in PurchaseOrder.objects.filter(pk__in=ids).values("id", *PurchaseOrder.METRIC_FIELDS)
+            }
+            with suppress_signals():
+                PurchaseOrder.objects.filter(pk__in=ids).delete()
+            subtract_status_counts(snapshots.values())
+            record_changes(
+                [(po_id, snapshot["vendor_id"]) for po_id, snapshot in snapshots.items()], PurchaseOrderChange.DELETE
+            )
+            record_deletions(snapshots, source=source)
+        vendor_ids.update(snapshot["vendor_id"] for snapshot in snapshots.values())
+        job.processed += len(ids)
+        job.save(update_fields=["processed"])
+    return vendor_ids
+
+
+def delete_vendor(job: MaintenanceJob) -> None:
+    vendor = Vendor.objects.filter(pk=job.params["vendor"]).first()
+    if vendor is None:
+        return
+    pos = PurchaseOrder.objects.filter(vendor_id=vendor.pk)
+    job.total = pos.count() + 1
+    job.save(update_fields=["total"])
+
+    _delete_purchase_orders(job, pos, source="vendor_delete")
+    archived = ArchivedPurchaseOrder.objects.filter(vendor_id=vendor.pk)
+    with transaction.atomic():
+        # Tombstones let change-log readers (such as the spend cube) drop archived POs too.
+        record_changes([(po_id, vendor.pk) for po_id in archived.values_list("pk", flat=True)], PurchaseOrderChange.DELETE)
+        archived.delete()
+        ArchivedPurchaseOrderItem.objects.filter(vendor_id=vendor.pk).delete()
+    # With its POs gone the vendor cascade is small: buckets, ranking, history.
+    vendor.delete()
+    job.processed += 1
+
+
+def purge_purchase_orders(job: MaintenanceJob) -> None:
+    """
+    Delete POs matching ``params``: ``vendor``, ``status`` (list) and
+    ``before`` (order dates strictly earlier). Metrics, buckets and sketches
+    are recomputed once per affected vendor at the end.
+    """
+    pos = purge_queryset(job.params)
+    job.total = pos.count()
+    job.save(update_fields=["total"])
+
+    vendor_ids = _delete_purchase_orders(job, pos, source="purge")
+    if vendor_ids:
+        rebuild_buckets(vendor_ids)
+        rebuild_sketches(vendor_ids)
+        for vendor in Vendor.objects.filter(pk__in=vendor_ids):
+            recalc_metrics(vendor)
+        refresh_ranks()
+
+
+def archive_purchase_orders(job: MaintenanceJob) -> None:
+    """
+    Move completed/canceled POs ordered before ``params["before"]`` to the
+    archive. Metrics are unchanged by construction, so nothing is recalculated.
+    """
+    pos = archivable(parse_datetime(job.params["before"]))
+    job.total = pos.count()
+    job.save(update_fields=["total"])
+    for ids in _chunks(pos, settings.MAINTENANCE_JOB_CHUNK_SIZE):
+        archive_chunk(ids)
+        job.processed += len(ids)
+        job.save(update_fields=["processed"])
+
+
+def refresh_leaderboard(job: MaintenanceJob) -> None:
+    refresh_ranks()
+    job.processed = 1
+
+
+def purge_queryset(params: dict):
+    pos = PurchaseOrder.objects.all()
+    if params.get("vendor"):
+        pos = pos.filter(vendor_id=params["vendor"])
+    if params.get("status"):
+        pos = pos.filter(status__in=params["status"])
+    if params.get("before"):
+        pos = pos.filter(order_date__lt=parse_datetime(params["before"]))
+    return pos
+
+
+RUNNERS = {
+    MaintenanceJob.VENDOR_DELETE: delete_vendor,
+    MaintenanceJob.PO_PURGE: purge_purchase_orders,
+    MaintenanceJob.PO_ARCHIVE: archive_purchase_orders,
+    MaintenanceJob.RANK_REFRESH: refresh_leaderboard,
+}
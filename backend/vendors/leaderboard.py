@@ -0,0 +1,83 @@
+from django.db import connections, router
+
+from .models import MaintenanceJob, VendorRanking
+
+# Composite score weights; every component is normalised to 0..1.
+SCORE_WEIGHTS = {
+    "on_time_delivery_rate": 0.3,
+    "quality_rating_avg": 0.3,
+    "fulfillment_rate": 0.2,
+    "average_response_time": 0.2,
+}
+
+# One set-based statement recomputes every rank and percentile with window
+# functions (PostgreSQL, and SQLite >= 3.33 for UPDATE ... FROM).
+REFRESH_RANKS_SQL = """
+    UPDATE vendors_vendorranking
+    SET rank = ranked.rank,
+        percentile = ranked.percentile,
+        on_time_delivery_percentile = ranked.on_time_pct,
+        quality_rating_percentile = ranked.quality_pct,
+        response_time_percentile = ranked.response_pct,
+        fulfillment_percentile = ranked.fulfillment_pct
+    FROM (
+        SELECT r.vendor_id,
+               RANK() OVER (ORDER BY r.score DESC) AS rank,
+               100.0 * PERCENT_RANK() OVER (ORDER BY r.score) AS percentile,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.on_time_delivery_rate) AS on_time_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.quality_rating_avg) AS quality_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.average_response_time DESC) AS response_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.fulfillment_rate) AS fulfillment_pct
+        FROM vendors_vendorranking r
+        JOIN vendors_vendor v ON v.id = r.vendor_id
+    ) AS ranked
+    WHERE vendors_vendorranking.vendor_id = ranked.vendor_id
+"""
+
+
+def composite_score(on_time_delivery_rate, quality_rating_avg, average_response_time, fulfillment_rate, **kwargs) -> float:
+    """
+    Weighted 0..1 score; response time maps hours to 1 / (1 + days).
+    """
+    components = {
+        "on_time_delivery_rate": on_time_delivery_rate / 100,
+        "quality_rating_avg": quality_rating_avg / 5,
+        "fulfillment_rate": fulfillment_rate / 100,
+        "average_response_time": 1 / (1 + max(average_response_time, 0.0) / 24),
+    }
+    return sum(SCORE_WEIGHTS[name] * value for name, value in components.items())
+
+
+def refresh_ranks(using=None) -> None:
+    using = using or router.db_for_write(VendorRanking)
+    with connections[using].cursor() as cursor:
+        cursor.execute(REFRESH_RANKS_SQL)
+
+
+def schedule_rank_refresh() -> None:
+    """
+    Re-rank the board in a maintenance job instead of on every score change.
+
+    Ranks and percentiles depend on every vendor, so a refresh costs
+    O(vendors). Changes made while a refresh is still pending share it; one
+    that is already running may have read the old scores, so it does not count.
+    """
+    from .jobs import enqueue
+
+    if not MaintenanceJob.objects.filter(kind=MaintenanceJob.RANK_REFRESH, status=MaintenanceJob.PENDING).exists():
+        enqueue(MaintenanceJob.RANK_REFRESH, {})
+
+
+def update_ranking(vendor_id: int, metrics: dict) -> None:
+    """
+    Store the vendor's composite score and schedule a re-rank if it moved.
+
+    Vendors enter the leaderboard on their first metrics recalculation.
+    """
+    score = composite_score(**metrics)
+    changed = VendorRanking.objects.filter(vendor_id=vendor_id).exclude(score=score).update(score=score)
+    if not changed:
+        _, created = VendorRanking.objects.get_or_create(vendor_id=vendor_id, defaults={"score": score})
+        if not created:
+            return
+    schedule_rank_refresh()
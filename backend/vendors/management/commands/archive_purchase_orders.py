@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from purchase_orders.archive import default_cutoff
+from vendors.jobs import run_job
+from vendors.models import MaintenanceJob
+
+
+class Command(BaseCommand):
+    help = 'Move completed/canceled purchase orders older than --days into the compressed archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive orders older than this (default: PO_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--background', action='store_true', help='Only create the job for run_maintenance_jobs')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days']) if options['days'] is not None else default_cutoff()
+        job = MaintenanceJob.objects.create(kind=MaintenanceJob.PO_ARCHIVE, params={'before': before.isoformat()})
+        if options['background']:
+            self.stdout.write(f'Enqueued {job}; run_maintenance_jobs will pick it up')
+            return
+        job = run_job(job.pk)
+        style = self.style.SUCCESS if job.status == MaintenanceJob.SUCCEEDED else self.style.ERROR
+        self.stdout.write(style(f'{job}: archived {job.processed}/{job.total} {job.error}'.rstrip()))
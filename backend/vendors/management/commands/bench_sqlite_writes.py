@@ -0,0 +1,98 @@
+import multiprocessing
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from purchase_orders.models import PurchaseOrder
+from vendors.models import Vendor
+
+# Django's stock SQLite setup, with the journal mode reset in case the copied file is already in WAL mode.
+BASELINE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE'}
+
+
+def _worker(args):
+    """
+    Create and then complete ``writes`` POs through the ORM (full signal
+    pipeline) and return per-write latencies and lock errors.
+    """
+    path, options, vendor_ids, writes, worker = args
+    connection = connections['default']
+    connection.close()
+    connection.settings_dict.update(NAME=path, OPTIONS=options)
+
+    latencies, errors = [], 0
+    now = timezone.now()
+    for index in range(writes):
+        start = time.perf_counter()
+        try:
+            po = PurchaseOrder.objects.create(
+                po_number=f'BENCH-{worker}-{index}-{uuid.uuid4().hex[:8]}',
+                vendor_id=vendor_ids[index % len(vendor_ids)],
+                order_date=now,
+                expected_delivery_date=now + timedelta(days=7),
+                items={'bench': 1},
+                quantity=1,
+                issue_date=now,
+            )
+            po.status = 'completed'
+            po.save()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent PO write throughput on a scratch copy of the SQLite database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent writer processes (like gunicorn workers)')
+        parser.add_argument('--writes', type=int, default=100, help='POs each worker creates and completes')
+        parser.add_argument('--mode', choices=['hardened', 'baseline', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+        vendor_ids = list(Vendor.objects.values_list('pk', flat=True)[:20])
+        if not vendor_ids:
+            raise CommandError('Needs at least one vendor (try seed_test_data)')
+
+        modes = ['baseline', 'hardened'] if options['mode'] == 'both' else [options['mode']]
+        for mode in modes:
+            run_options = settings.SQLITE_OPTIONS if mode == 'hardened' else BASELINE_OPTIONS
+            self._run(mode, run_options, vendor_ids, options['workers'], options['writes'])
+
+    def _run(self, mode, run_options, vendor_ids, workers, writes):
+        connections.close_all()
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'bench.sqlite3')
+            # Back up through SQLite so a live WAL file is folded into the copy.
+            with connections['default'].cursor() as cursor:
+                cursor.execute('VACUUM INTO %s', [path])
+            connections.close_all()
+
+            context = multiprocessing.get_context('fork')
+            start = time.perf_counter()
+            with context.Pool(workers) as pool:
+                results = pool.map(_worker, [(path, run_options, vendor_ids, writes, worker) for worker in range(workers)])
+            elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        errors = sum(worker_errors for _, worker_errors in results)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{mode}: {workers} workers x {writes} POs (create + complete)'))
+        self.stdout.write(f'  {len(latencies)} ok, {errors} "database is locked" errors in {elapsed:.2f}s')
+        if latencies:
+            self.stdout.write(
+                f'  {len(latencies) / elapsed:.1f} POs/s; latency p50 {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1000:.1f} ms'
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from vendors.windows import rebuild_buckets
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily metric buckets behind the rolling 30/90 day vendor metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendors', help='Only rebuild this vendor id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_buckets(options['vendors'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} metric buckets'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from vendors.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 vendor search table (PostgreSQL indexes maintain themselves)'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} vendors'))
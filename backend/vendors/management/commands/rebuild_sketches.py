@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from vendors.sketches import rebuild_sketches
+
+
+class Command(BaseCommand):
+    help = 'Recompute the response-time and lateness quantile sketches stored on vendors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendors', help='Only rebuild this vendor id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_sketches(options['vendors'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sketches for {count} vendors'))
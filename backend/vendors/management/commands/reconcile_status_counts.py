@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from vendors.status_counts import reconcile_status_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-vendor PO status counters and repair any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendors', help='Only check this vendor id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_status_counts(options['vendors'], dry_run=options['dry_run'])
+        for vendor_id, diff in sorted(drifted.items()):
+            changes = ', '.join(f'{field} {stored} -> {actual}' for field, (stored, actual) in diff.items())
+            self.stdout.write(f'  vendor {vendor_id}: {changes}')
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} drift on {len(drifted)} vendors'))
@@ -0,0 +1,64 @@
+import json
+import math
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from vendors.leaderboard import update_ranking
+from vendors.models import Vendor
+from vendors.projector import MetricsProjector
+
+
+class Command(BaseCommand):
+    help = 'Rebuild vendor metrics by replaying the purchase order event log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkpoint', help='JSON state file to resume from and write back to')
+        parser.add_argument('--from-position', type=int, default=0, help='Start after this event id (ignored with a checkpoint)')
+        parser.add_argument('--until', type=int, help='Stop at this event id')
+        parser.add_argument('--vendor', type=int, action='append', dest='vendors', help='Only replay this vendor id (repeatable; not with --checkpoint)')
+        parser.add_argument('--apply', action='store_true', help='Write the replayed metrics to the vendors')
+        parser.add_argument('--verify', action='store_true', help='Report vendors whose stored metrics differ from the replay')
+
+    def handle(self, *args, **options):
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+        if checkpoint and options['vendors']:
+            # A filtered replay skips other vendors' events but still moves the position past them.
+            raise CommandError('--checkpoint cannot be combined with --vendor.')
+        if checkpoint and checkpoint.exists():
+            projector = MetricsProjector.from_state(json.loads(checkpoint.read_text()))
+        else:
+            projector = MetricsProjector(position=options['from_position'])
+
+        start = projector.position
+        applied = projector.consume(vendor_ids=options['vendors'], until=options['until'])
+        self.stdout.write(f'Replayed {applied} events ({start} -> {projector.position})')
+
+        if checkpoint:
+            checkpoint.write_text(json.dumps(projector.to_state()))
+            self.stdout.write(f'Checkpoint written to {checkpoint}')
+
+        replayed = projector.metrics()
+        if options['verify']:
+            self._verify(replayed)
+        if options['apply']:
+            for vendor_id, metrics in replayed.items():
+                if Vendor.objects.filter(pk=vendor_id).update(**metrics, updated_at=timezone.now()):
+                    update_ranking(vendor_id, metrics)
+            self.stdout.write(self.style.SUCCESS(f'Applied metrics to {len(replayed)} vendors'))
+
+    def _verify(self, replayed):
+        fields = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate')
+        stored = Vendor.objects.filter(pk__in=replayed).values('pk', *fields)
+        mismatches = 0
+        for row in stored:
+            expected = replayed[row['pk']]
+            diffs = [f for f in fields if not math.isclose(row[f], expected[f], rel_tol=1e-6, abs_tol=1e-6)]
+            if diffs:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(f'Vendor {row["pk"]}: {", ".join(diffs)} differ'))
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'{mismatches} vendors differ from the event log'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Stored metrics match the event log'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from vendors.jobs import run_job
+from vendors.models import MaintenanceJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending maintenance jobs (vendor deletion, PO purge and archival, re-ranking) in this process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help='Run only this job id (repeatable)')
+        parser.add_argument('--include-running', action='store_true', help='Also rerun jobs left running by a dead worker')
+
+    def handle(self, *args, **options):
+        statuses = [MaintenanceJob.PENDING]
+        if options['include_running']:
+            statuses.append(MaintenanceJob.RUNNING)
+        jobs = MaintenanceJob.objects.filter(status__in=statuses).order_by('pk')
+        if options['ids']:
+            jobs = jobs.filter(pk__in=options['ids'])
+        for job_id in jobs.values_list('pk', flat=True):
+            job = run_job(job_id)
+            style = self.style.SUCCESS if job.status == MaintenanceJob.SUCCEEDED else self.style.ERROR
+            self.stdout.write(style(f'{job}: {job.processed}/{job.total} {job.error}'.rstrip()))
@@ -0,0 +1,75 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.profiling import get_store
+
+
+class Command(BaseCommand):
+    help = 'List profiled slow requests, show one, or print collapsed stacks for flamegraph.pl / speedscope'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', help='Profile ids (default: every profile matching the filters)')
+        parser.add_argument('--path', help='Only requests whose path contains this')
+        parser.add_argument('--min-ms', type=float, default=0, help='Only requests at least this slow')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--show', action='store_true', help='Print details and the slowest SQL of each profile')
+        parser.add_argument('--collapsed', action='store_true', help='Print merged stacks as "frame;frame count" lines')
+        parser.add_argument('--clear', action='store_true', help='Delete all stored profiles')
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if options['clear']:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {store.clear()} profiles'))
+            return
+
+        records = self._select(store, options)
+        if options['collapsed']:
+            stacks = Counter()
+            for record in records:
+                stacks.update(record['stacks'])
+            for stack, count in stacks.most_common():
+                self.stdout.write(f'{stack or "(idle)"} {count}')
+            return
+        if options['show']:
+            for record in records:
+                self._show(record)
+            return
+
+        self.stdout.write(f'{"id":<40} {"ms":>9} {"sql":>5} {"sql ms":>9} {"status":>6}  request')
+        for record in records[:options['limit']]:
+            self.stdout.write(
+                f'{record["id"]:<40} {record["duration_ms"]:>9.1f} {record["sql_count"]:>5} '
+                f'{record["sql_ms"]:>9.1f} {record["status"]:>6}  {record["method"]} {record["path"]}'
+            )
+
+    def _select(self, store, options):
+        if options['ids']:
+            records = [store.load(record_id) for record_id in options['ids']]
+            missing = [record_id for record_id, record in zip(options['ids'], records) if record is None]
+            if missing:
+                raise CommandError(f'No profile {", ".join(missing)}')
+            return records
+        return [
+            record for record in store.records()
+            if record['duration_ms'] >= options['min_ms'] and (not options['path'] or options['path'] in record['path'])
+        ]
+
+    def _show(self, record):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{record["method"]} {record["path"]} ({record["id"]})'))
+        self.stdout.write(
+            f'  view {record["view"]}, status {record["status"]}, {record["duration_ms"]:.1f} ms at {record["started_at"]}'
+        )
+        self.stdout.write(
+            f'  {record["samples"]} samples every {record["interval_ms"]} ms; '
+            f'{record["sql_count"]} queries, {record["sql_ms"]:.1f} ms in SQL'
+        )
+        leaves = Counter()
+        for stack, count in record['stacks'].items():
+            leaves[stack.rsplit(';', 1)[-1] or '(idle)'] += count
+        self.stdout.write('  hottest frames:')
+        for frame, count in leaves.most_common(10):
+            self.stdout.write(f'    {count:>5}  {frame}')
+        self.stdout.write('  slowest queries:')
+        for query in sorted(record['sql'], key=lambda query: query['ms'], reverse=True)[:10]:
+            self.stdout.write(f'    {query["ms"]:>9.3f} ms  [{query["alias"]}] {query["sql"][:200]}')
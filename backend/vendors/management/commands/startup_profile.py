@@ -0,0 +1,108 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Heavy modules that a worker should only import when a request needs them.
+WATCHED_MODULES = (
+    'numpy',
+    'httpx',
+    'django.contrib.admin.sites',
+    'django.contrib.auth.forms',
+    'rest_framework_simplejwt.views',
+    'purchase_orders.admin',
+    'purchase_orders.spend',
+    'vendors.analytics',
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    ``{module: (self_us, cumulative_us)}`` from ``-X importtime`` output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Measure cold start: import time per module, time and RSS to first request, in fresh interpreters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start (medians are reported)')
+        parser.add_argument('--top', type=int, default=25, help='Slowest modules / packages to list')
+        parser.add_argument('--path', action='append', dest='paths', help='GET paths to send in order (default /api/vendors/)')
+        parser.add_argument('--json', action='store_true', help='Print the raw medians as JSON')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/api/vendors/']
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        runs = []
+        for _ in range(options['runs']):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-m', 'config.startup', *paths],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            wall_ms = (time.perf_counter() - start) * 1000
+            if result.returncode:
+                raise CommandError(result.stderr[-2000:])
+            probe = json.loads(result.stdout.strip().splitlines()[-1])
+            runs.append((wall_ms, probe, parse_importtime(result.stderr)))
+
+        phases = []
+        for index, phase in enumerate(runs[0][1]['phases']):
+            phases.append({
+                **{key: value for key, value in phase.items() if key not in ('ms', 'rss_kb')},
+                'ms': statistics.median(run[1]['phases'][index]['ms'] for run in runs),
+                'rss_kb': statistics.median(run[1]['phases'][index]['rss_kb'] for run in runs),
+            })
+        cumulative, packages = defaultdict(list), defaultdict(list)
+        for _, _, modules in runs:
+            per_package = defaultdict(int)
+            for name, (self_us, cumulative_us) in modules.items():
+                cumulative[name].append(cumulative_us)
+                per_package[name.split('.')[0]] += self_us
+            for package, total in per_package.items():
+                packages[package].append(total)
+        slowest = sorted(((statistics.median(v), k) for k, v in cumulative.items()), reverse=True)[:options['top']]
+        heaviest = sorted(((statistics.median(v), k) for k, v in packages.items()), reverse=True)[:options['top']]
+        loaded = set(runs[0][1]['modules'])
+        report = {
+            'process_ms': statistics.median(run[0] for run in runs),
+            'phases': phases,
+            'modules_loaded': len(loaded),
+            'slowest_modules_ms': {name: round(us / 1000, 2) for us, name in slowest},
+            'packages_self_ms': {name: round(us / 1000, 2) for us, name in heaviest},
+            'watched': {name: name in loaded for name in WATCHED_MODULES},
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Cold start, median of {len(runs)} runs: {report["process_ms"]:.0f} ms process wall time, '
+            f'{report["modules_loaded"]} modules'
+        ))
+        for phase in phases:
+            detail = f' {phase["path"]} -> {phase["status"]}' if 'path' in phase else ''
+            self.stdout.write(f'  {phase["phase"]:<14} {phase["ms"]:>9.1f} ms  {phase["rss_kb"] / 1024:>7.1f} MiB{detail}')
+        self.stdout.write(self.style.MIGRATE_HEADING('Slowest imports (cumulative ms)'))
+        for name, ms in report['slowest_modules_ms'].items():
+            self.stdout.write(f'  {ms:>9.1f}  {name}')
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time by package (self ms)'))
+        for name, ms in report['packages_self_ms'].items():
+            self.stdout.write(f'  {ms:>9.1f}  {name}')
+        self.stdout.write(self.style.MIGRATE_HEADING('Loaded after the requests'))
+        for name, is_loaded in report['watched'].items():
+            self.stdout.write(f'  {"yes" if is_loaded else "no ":<4} {name}')
@@ -1,52 +1,180 @@
-from django.db.models import Avg, F
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import router, transaction
+from django.db.models import Count, F, Sum
+from django.dispatch import Signal
 from django.utils import timezone
 
+from config.db_router import read_from_primary
 from purchase_orders.models import PurchaseOrder
-from .models import Vendor
+from .leaderboard import update_ranking
+from .models import Vendor, VendorArchiveTotals
+
+TOTAL_FIELDS = (
+    "total_count",
+    "completed_count",
+    "on_time_count",
+    "quality_count",
+    "quality_sum",
+    "ack_count",
+    "ack_seconds",
+)
+
+# Sent with ``vendor_id`` and ``metrics`` after a vendor's metrics are written.
+metrics_recalculated = Signal()
+
+_deferred = ContextVar("deferred_recalc", default=None)
+
+
+@contextmanager
+def deferred_recalc():
+    """
+    Collect vendors whose metrics need recalculating inside the block and
+    recalculate each one once on the way out (bulk edits and deletes).
+    """
+    if _deferred.get() is not None:
+        # Already deferring; the outermost block recalculates.
+        yield
+        return
+    pending = {}
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    for vendor_id in pending:
+        vendor = Vendor.objects.filter(pk=vendor_id).first()
+        if vendor is not None:
+            recalc_metrics(vendor)
+
 
+def request_recalc(vendor: Vendor) -> None:
+    """
+    Recalculate ``vendor`` once the current transaction commits (right away
+    outside one), or once at the end of ``deferred_recalc()``.
 
-def recalc_metrics(vendor: Vendor) -> None:
+    PO saves always run in a transaction, which on SQLite holds the write
+    lock from its first statement. Recalculating after commit keeps the
+    aggregation and the ranking refresh out of that window; the metrics
+    commit separately, a moment after the PO.
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        pending[vendor.pk] = True
+        return
+    using = router.db_for_write(Vendor)
+    if not transaction.get_connection(using).in_atomic_block:
+        recalc_metrics(vendor)
+        return
+
+    def recalc_after_commit():
+        # The vendor may have been deleted in the meantime.
+        current = Vendor.objects.filter(pk=vendor.pk).first()
+        if current is not None:
+            recalc_metrics(current)
+
+    transaction.on_commit(recalc_after_commit, using=using)
+
+
+def recalc_metrics(vendor: Vendor) -> dict:
     """
     Recalculate and persist performance metrics for a vendor based on its purchase orders.
+
+    Returns the metrics that were written.
     """
+    # Recalculation follows a write, so aggregate on the primary rather than a lagging replica.
+    with read_from_primary():
+        metrics = _compute_metrics(vendor)
+
+    # Aggregate first, then hold the write lock only for the writes. PO
+    # saves get here after their commit, see request_recalc().
+    with transaction.atomic():
+        Vendor.objects.filter(pk=vendor.pk).update(**metrics, updated_at=timezone.now())
+        update_ranking(vendor.pk, metrics)
+    metrics_recalculated.send(sender=Vendor, vendor_id=vendor.pk, metrics=metrics)
+    return metrics
+
+
+def _compute_metrics(vendor: Vendor) -> dict:
+    totals = _live_totals(vendor)
+    # POs moved to cold storage still count, through their folded-in totals.
+    archived = VendorArchiveTotals.objects.filter(vendor=vendor).values(*TOTAL_FIELDS).first()
+    if archived:
+        for field in TOTAL_FIELDS:
+            totals[field] += archived[field]
+    return metrics_from_totals(totals)
+
+
+def _live_totals(vendor: Vendor) -> dict:
     qs = PurchaseOrder.objects.filter(vendor=vendor)
 
     completed = qs.filter(status="completed")
-    completed_count = completed.count()
-
     on_time_count = completed.filter(
         actual_delivery_date__isnull=False,
         expected_delivery_date__isnull=False,
         actual_delivery_date__lte=F("expected_delivery_date"),
     ).count()
-    on_time_rate = (on_time_count / completed_count * 100) if completed_count else 0.0
-
-    quality_rated = completed.exclude(quality_rating__isnull=True)
-    quality_avg = quality_rated.aggregate(avg=Avg("quality_rating"))["avg"] or 0.0
-
+    quality = completed.exclude(quality_rating__isnull=True).aggregate(n=Count("pk"), total=Sum("quality_rating"))
 
     acknowledged = qs.filter(
         acknowledgment_date__isnull=False,
         acknowledgment_date__gte=F("issue_date")
     )
-    ack_count = acknowledged.count()
-    if ack_count:
-        diffs = acknowledged.annotate(diff=F("acknowledgment_date") - F("issue_date")).aggregate(
-            avg=Avg("diff")
-        )["avg"]
-        avg_resp_hours = diffs.total_seconds() / 3600 if diffs else 0.0
-    else:
-        avg_resp_hours = 0.0
-
-    # Fulfillment rate: completed over all POs (adjust if you add issue flags)
-    total_pos = qs.count()
-    fulfillment_rate = (completed_count / total_pos * 100) if total_pos else 0.0
-
-    Vendor.objects.filter(pk=vendor.pk).update(
-        on_time_delivery_rate=on_time_rate,
-        quality_rating_avg=quality_avg,
-        average_response_time=avg_resp_hours,
-        fulfillment_rate=fulfillment_rate,
-        updated_at=timezone.now(),
+    ack = acknowledged.annotate(diff=F("acknowledgment_date") - F("issue_date")).aggregate(
+        n=Count("pk"), total=Sum("diff")
     )
 
+    return {
+        "total_count": qs.count(),
+        "completed_count": completed.count(),
+        "on_time_count": on_time_count,
+        "quality_count": quality["n"],
+        "quality_sum": quality["total"] or 0.0,
+        "ack_count": ack["n"],
+        "ack_seconds": ack["total"].total_seconds() if ack["total"] else 0.0,
+    }
+
+
+def snapshot_totals(snapshots) -> dict:
+    """
+    Metric totals (see ``TOTAL_FIELDS``) over PO metric snapshots.
+    """
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    for po in snapshots:
+        totals["total_count"] += 1
+        if po["status"] == "completed":
+            totals["completed_count"] += 1
+            actual, expected = po["actual_delivery_date"], po["expected_delivery_date"]
+            if actual is not None and expected is not None and actual <= expected:
+                totals["on_time_count"] += 1
+            if po["quality_rating"] is not None:
+                totals["quality_count"] += 1
+                totals["quality_sum"] += po["quality_rating"]
+        acknowledged = po["acknowledgment_date"]
+        if acknowledged is not None and acknowledged >= po["issue_date"]:
+            totals["ack_count"] += 1
+            totals["ack_seconds"] += (acknowledged - po["issue_date"]).total_seconds()
+    return totals
+
+
+def metrics_from_totals(totals: dict) -> dict:
+    completed = totals["completed_count"]
+    total = totals["total_count"]
+    return {
+        "on_time_delivery_rate": totals["on_time_count"] / completed * 100 if completed else 0.0,
+        "quality_rating_avg": totals["quality_sum"] / totals["quality_count"] if totals["quality_count"] else 0.0,
+        "average_response_time": totals["ack_seconds"] / totals["ack_count"] / 3600 if totals["ack_count"] else 0.0,
+        # Fulfillment rate: completed over all POs (adjust if you add issue flags)
+        "fulfillment_rate": completed / total * 100 if total else 0.0,
+    }
+
+
+def add_archive_totals(vendor_id: int, totals: dict) -> None:
+    """
+    Fold the totals of POs moved to the archive into the vendor's counters.
+    """
+    VendorArchiveTotals.objects.get_or_create(vendor_id=vendor_id)
+    VendorArchiveTotals.objects.filter(vendor_id=vendor_id).update(
+        **{field: F(field) + totals[field] for field in TOTAL_FIELDS}, updated_at=timezone.now()
+    )
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+PG_DOCUMENT = "name || ' ' || vendor_code || ' ' || contact_details || ' ' || address"
+PG_TRIGRAM_DOCUMENT = "name || ' ' || vendor_code"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS vendors_vendor_search_tsv ON vendors_vendor "
+            f"USING gin (to_tsvector('simple', {PG_DOCUMENT}))"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS vendors_vendor_search_trgm ON vendors_vendor "
+            f"USING gin (({PG_TRIGRAM_DOCUMENT}) gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS vendors_vendor_fts USING fts5("
+            "name, vendor_code, contact_details, address, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            "INSERT INTO vendors_vendor_fts (rowid, name, vendor_code, contact_details, address) "
+            "SELECT id, name, vendor_code, contact_details, address FROM vendors_vendor"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS vendors_vendor_search_tsv")
+        schema_editor.execute("DROP INDEX IF EXISTS vendors_vendor_search_trgm")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS vendors_vendor_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0002_vendor_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
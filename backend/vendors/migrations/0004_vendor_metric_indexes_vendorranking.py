@@ -0,0 +1,100 @@
+# Generated by Django 6.0 on 2026-10-19 02:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of vendors.leaderboard as of this migration, so later
+# changes to the live code don't change what it does.
+SCORE_WEIGHTS = {
+    'on_time_delivery_rate': 0.3,
+    'quality_rating_avg': 0.3,
+    'fulfillment_rate': 0.2,
+    'average_response_time': 0.2,
+}
+
+REFRESH_RANKS_SQL = """
+    UPDATE vendors_vendorranking
+    SET rank = ranked.rank,
+        percentile = ranked.percentile,
+        on_time_delivery_percentile = ranked.on_time_pct,
+        quality_rating_percentile = ranked.quality_pct,
+        response_time_percentile = ranked.response_pct,
+        fulfillment_percentile = ranked.fulfillment_pct
+    FROM (
+        SELECT r.vendor_id,
+               RANK() OVER (ORDER BY r.score DESC) AS rank,
+               100.0 * PERCENT_RANK() OVER (ORDER BY r.score) AS percentile,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.on_time_delivery_rate) AS on_time_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.quality_rating_avg) AS quality_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.average_response_time DESC) AS response_pct,
+               100.0 * PERCENT_RANK() OVER (ORDER BY v.fulfillment_rate) AS fulfillment_pct
+        FROM vendors_vendorranking r
+        JOIN vendors_vendor v ON v.id = r.vendor_id
+    ) AS ranked
+    WHERE vendors_vendorranking.vendor_id = ranked.vendor_id
+"""
+
+
+def composite_score(on_time_delivery_rate, quality_rating_avg, average_response_time, fulfillment_rate, **kwargs):
+    components = {
+        'on_time_delivery_rate': on_time_delivery_rate / 100,
+        'quality_rating_avg': quality_rating_avg / 5,
+        'fulfillment_rate': fulfillment_rate / 100,
+        'average_response_time': 1 / (1 + max(average_response_time, 0.0) / 24),
+    }
+    return sum(SCORE_WEIGHTS[name] * value for name, value in components.items())
+
+
+def backfill_rankings(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    VendorRanking = apps.get_model('vendors', 'VendorRanking')
+    metric_fields = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate')
+    rankings = [
+        VendorRanking(vendor_id=row['id'], score=composite_score(**row))
+        for row in Vendor.objects.filter(purchase_orders__isnull=False).distinct().values('id', *metric_fields)
+    ]
+    VendorRanking.objects.bulk_create(rankings, batch_size=2000)
+    schema_editor.execute(REFRESH_RANKS_SQL)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0003_vendor_search_index'),
+        ('purchase_orders', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorRanking',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='vendors.vendor')),
+                ('score', models.FloatField(db_index=True, default=0.0)),
+                ('rank', models.PositiveIntegerField(db_index=True, default=0)),
+                ('percentile', models.FloatField(default=0.0)),
+                ('on_time_delivery_percentile', models.FloatField(default=0.0)),
+                ('quality_rating_percentile', models.FloatField(default=0.0)),
+                ('response_time_percentile', models.FloatField(default=0.0)),
+                ('fulfillment_percentile', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['on_time_delivery_rate'], name='vendor_on_time_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['quality_rating_avg'], name='vendor_quality_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['average_response_time'], name='vendor_response_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['fulfillment_rate'], name='vendor_fulfillment_rate_idx'),
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
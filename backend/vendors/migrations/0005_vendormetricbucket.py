@@ -0,0 +1,92 @@
+# Generated by Django 6.0 on 2026-10-19 02:49
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+METRIC_FIELDS = (
+    'vendor_id',
+    'status',
+    'issue_date',
+    'acknowledgment_date',
+    'expected_delivery_date',
+    'actual_delivery_date',
+    'quality_rating',
+)
+
+
+# Frozen copy of vendors.windows.bucket_contributions as of this migration.
+def _day(value):
+    return timezone.localtime(value).date()
+
+
+def bucket_contributions(snapshot):
+    contributions = defaultdict(Counter)
+    if not snapshot or not snapshot.get('issue_date'):
+        return contributions
+    vendor_id = snapshot['vendor_id']
+    issue_date = snapshot['issue_date']
+    contributions[(vendor_id, _day(issue_date))]['issued_count'] += 1
+
+    actual = snapshot.get('actual_delivery_date')
+    if snapshot.get('status') == 'completed' and actual is not None:
+        bucket = contributions[(vendor_id, _day(actual))]
+        bucket['completed_count'] += 1
+        expected = snapshot.get('expected_delivery_date')
+        if expected is not None and actual <= expected:
+            bucket['on_time_count'] += 1
+        if snapshot.get('quality_rating') is not None:
+            bucket['quality_count'] += 1
+            bucket['quality_sum'] += snapshot['quality_rating']
+
+    acknowledged = snapshot.get('acknowledgment_date')
+    if acknowledged is not None and acknowledged >= issue_date:
+        bucket = contributions[(vendor_id, _day(acknowledged))]
+        bucket['ack_count'] += 1
+        bucket['ack_seconds'] += (acknowledged - issue_date).total_seconds()
+    return contributions
+
+
+def backfill_buckets(apps, schema_editor):
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    VendorMetricBucket = apps.get_model('vendors', 'VendorMetricBucket')
+    totals = defaultdict(Counter)
+    for snapshot in PurchaseOrder.objects.values(*METRIC_FIELDS).iterator(chunk_size=2000):
+        for key, counter in bucket_contributions(snapshot).items():
+            totals[key].update(counter)
+    VendorMetricBucket.objects.bulk_create(
+        [VendorMetricBucket(vendor_id=vendor_id, day=day, **counter) for (vendor_id, day), counter in totals.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0004_vendor_metric_indexes_vendorranking'),
+        ('purchase_orders', '0003_purchaseorderitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('issued_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('quality_count', models.IntegerField(default=0)),
+                ('quality_sum', models.FloatField(default=0.0)),
+                ('ack_count', models.IntegerField(default=0)),
+                ('ack_seconds', models.FloatField(default=0.0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_buckets', to='vendors.vendor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'day'), name='unique_vendor_metric_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0005_vendormetricbucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['vendor', 'date'], name='hist_perf_vendor_date_idx'),
+        ),
+    ]
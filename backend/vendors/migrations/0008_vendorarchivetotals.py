@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 04:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0007_maintenancejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorArchiveTotals',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive_totals', serialize=False, to='vendors.vendor')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('on_time_count', models.PositiveIntegerField(default=0)),
+                ('quality_count', models.PositiveIntegerField(default=0)),
+                ('quality_sum', models.FloatField(default=0.0)),
+                ('ack_count', models.PositiveIntegerField(default=0)),
+                ('ack_seconds', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='maintenancejob',
+            name='kind',
+            field=models.CharField(choices=[('vendor_delete', 'Delete vendor'), ('po_purge', 'Purge purchase orders'), ('po_archive', 'Archive purchase orders')], max_length=30),
+        ),
+    ]
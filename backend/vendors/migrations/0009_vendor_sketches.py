@@ -0,0 +1,127 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+import json
+import math
+import struct
+import zlib
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+METRIC_FIELDS = (
+    'vendor_id',
+    'status',
+    'issue_date',
+    'acknowledgment_date',
+    'expected_delivery_date',
+    'actual_delivery_date',
+    'quality_rating',
+)
+DATE_FIELDS = ('issue_date', 'acknowledgment_date', 'expected_delivery_date', 'actual_delivery_date')
+
+
+# Frozen copy of the parts of vendors.sketches this backfill uses: adding
+# values and the version 1 encoding.
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 1e-4
+_HEADER = struct.Struct('<Bdd')
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class QuantileSketch:
+    def __init__(self):
+        self.log_gamma = math.log((1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY))
+        self.positive = defaultdict(int)
+        self.negative = defaultdict(int)
+        self.zero_count = 0
+
+    def add(self, value):
+        if abs(value) < MIN_VALUE:
+            self.zero_count += 1
+            return
+        store = self.positive if value > 0 else self.negative
+        store[math.ceil(math.log(abs(value)) / self.log_gamma)] += 1
+
+    def to_bytes(self):
+        out = bytearray(_HEADER.pack(1, RELATIVE_ACCURACY, MIN_VALUE))
+        _put_varint(out, _zigzag(self.zero_count))
+        for store in (self.positive, self.negative):
+            _put_varint(out, len(store))
+            previous = 0
+            for key in sorted(store):
+                _put_varint(out, _zigzag(key - previous))
+                _put_varint(out, _zigzag(store[key]))
+                previous = key
+        return bytes(out)
+
+
+def sketch_contributions(snapshot):
+    contributions = defaultdict(list)
+    if not snapshot or not snapshot.get('issue_date'):
+        return contributions
+    vendor_id = snapshot['vendor_id']
+    acknowledged = snapshot.get('acknowledgment_date')
+    if acknowledged is not None and acknowledged >= snapshot['issue_date']:
+        hours = (acknowledged - snapshot['issue_date']).total_seconds() / 3600
+        contributions[(vendor_id, 'response_time_sketch')].append(hours)
+    actual, expected = snapshot.get('actual_delivery_date'), snapshot.get('expected_delivery_date')
+    if snapshot.get('status') == 'completed' and actual is not None and expected is not None:
+        contributions[(vendor_id, 'lateness_sketch')].append((actual - expected).total_seconds() / 86400)
+    return contributions
+
+
+def backfill_sketches(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    ArchivedPurchaseOrder = apps.get_model('purchase_orders', 'ArchivedPurchaseOrder')
+
+    def archived():
+        for po in ArchivedPurchaseOrder.objects.iterator(chunk_size=500):
+            data = json.loads(zlib.decompress(bytes(po.payload)))
+            yield {
+                'vendor_id': po.vendor_id,
+                'status': po.status,
+                **{field: parse_datetime(data[field]) if data.get(field) else None for field in DATE_FIELDS},
+            }
+
+    sketches = defaultdict(lambda: defaultdict(QuantileSketch))
+    for source in (PurchaseOrder.objects.values(*METRIC_FIELDS).iterator(chunk_size=2000), archived()):
+        for snapshot in source:
+            for (vendor_id, field), values in sketch_contributions(snapshot).items():
+                for value in values:
+                    sketches[vendor_id][field].add(value)
+    for vendor_id, fields in sketches.items():
+        Vendor.objects.filter(pk=vendor_id).update(**{field: sketch.to_bytes() for field, sketch in fields.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0008_vendorarchivetotals'),
+        ('purchase_orders', '0009_archivedpurchaseorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='lateness_sketch',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='response_time_sketch',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-19 16:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_COUNT_FIELDS = {
+    'pending': 'pending_count',
+    'acknowledged': 'acknowledged_count',
+    'completed': 'completed_count',
+    'canceled': 'canceled_count',
+}
+
+
+def backfill_status_counts(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    PurchaseOrder = apps.get_model('purchase_orders', 'PurchaseOrder')
+    counts = {}
+    for row in PurchaseOrder.objects.order_by().values('vendor_id', 'status').annotate(n=Count('pk')):
+        if row['status'] in STATUS_COUNT_FIELDS:
+            counts.setdefault(row['vendor_id'], {})[STATUS_COUNT_FIELDS[row['status']]] = row['n']
+    for vendor_id, fields in counts.items():
+        Vendor.objects.filter(pk=vendor_id).update(**fields)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0009_vendor_sketches'),
+        ('purchase_orders', '0010_webhooks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='acknowledged_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='canceled_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='completed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='pending_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_status_counts, migrations.RunPython.noop),
+    ]
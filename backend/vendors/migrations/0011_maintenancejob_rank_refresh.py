@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0010_vendor_status_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='maintenancejob',
+            name='kind',
+            field=models.CharField(choices=[('vendor_delete', 'Delete vendor'), ('po_purge', 'Purge purchase orders'), ('po_archive', 'Archive purchase orders'), ('rank_refresh', 'Refresh leaderboard ranks')], max_length=30),
+        ),
+    ]
@@ -11,9 +11,25 @@ class Vendor(models.Model):
     quality_rating_avg = models.FloatField(default=0.0)
     average_response_time = models.FloatField(default=0.0)
     fulfillment_rate = models.FloatField(default=0.0)
+    # Serialized QuantileSketch (see vendors.sketches), kept up to date by the PO signals.
+    response_time_sketch = models.BinaryField(default=bytes, editable=False)
+    lateness_sketch = models.BinaryField(default=bytes, editable=False)
+    # Live POs per status (see vendors.status_counts), kept up to date by the PO signals.
+    pending_count = models.IntegerField(default=0, editable=False)
+    acknowledged_count = models.IntegerField(default=0, editable=False)
+    completed_count = models.IntegerField(default=0, editable=False)
+    canceled_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['on_time_delivery_rate'], name='vendor_on_time_rate_idx'),
+            models.Index(fields=['quality_rating_avg'], name='vendor_quality_avg_idx'),
+            models.Index(fields=['average_response_time'], name='vendor_response_time_idx'),
+            models.Index(fields=['fulfillment_rate'], name='vendor_fulfillment_rate_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -25,5 +41,115 @@ class HistoricalPerformance(models.Model):
     average_response_time = models.FloatField()
     fulfillment_rate = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'date'], name='hist_perf_vendor_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.vendor.name} - {self.date}"
+
+class VendorRanking(models.Model):
+    """
+    Precomputed leaderboard row. The score follows every metrics
+    recalculation; ranks and percentiles follow in a re-rank job, and a new
+    row has rank 0 until then.
+
+    Percentiles are 0-100, higher is better for every metric (including
+    response time, where a faster response ranks higher).
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    score = models.FloatField(default=0.0, db_index=True)
+    rank = models.PositiveIntegerField(default=0, db_index=True)
+    percentile = models.FloatField(default=0.0)
+    on_time_delivery_percentile = models.FloatField(default=0.0)
+    quality_rating_percentile = models.FloatField(default=0.0)
+    response_time_percentile = models.FloatField(default=0.0)
+    fulfillment_percentile = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"#{self.rank} {self.vendor_id} ({self.score:.3f})"
+
+class VendorMetricBucket(models.Model):
+    """
+    Per-vendor, per-day counters that rolling-window metrics are summed from.
+
+    Completions (and their on-time/quality figures) land on the delivery day,
+    acknowledgements on the acknowledgement day and issued POs on the issue day.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='metric_buckets')
+    day = models.DateField()
+    issued_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    ack_count = models.IntegerField(default=0)
+    ack_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'day'], name='unique_vendor_metric_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id} {self.day}"
+
+class VendorArchiveTotals(models.Model):
+    """
+    Metric totals of the vendor's POs that were moved to the archive, added
+    to the live aggregates whenever metrics are recalculated.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='archive_totals')
+    total_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    on_time_count = models.PositiveIntegerField(default=0)
+    quality_count = models.PositiveIntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    ack_count = models.PositiveIntegerField(default=0)
+    ack_seconds = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.vendor_id}: {self.total_count} archived"
+
+class MaintenanceJob(models.Model):
+    """
+    A chunked background operation (vendor deletion, PO purge or archival,
+    leaderboard re-rank) and its progress.
+    """
+    VENDOR_DELETE = 'vendor_delete'
+    PO_PURGE = 'po_purge'
+    PO_ARCHIVE = 'po_archive'
+    RANK_REFRESH = 'rank_refresh'
+    KIND_CHOICES = [
+        (VENDOR_DELETE, 'Delete vendor'),
+        (PO_PURGE, 'Purge purchase orders'),
+        (PO_ARCHIVE, 'Archive purchase orders'),
+        (RANK_REFRESH, 'Refresh leaderboard ranks'),
+    ]
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    params = models.JSONField(default=dict)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='maintenance_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
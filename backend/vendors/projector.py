@@ -0,0 +1,108 @@
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from purchase_orders.models import PurchaseOrderEvent
+from .metrics import TOTAL_FIELDS, metrics_from_totals, snapshot_totals
+
+DATE_FIELDS = ("issue_date", "acknowledgment_date", "expected_delivery_date", "actual_delivery_date")
+
+
+def _parse_snapshot(snapshot: dict) -> dict:
+    parsed = dict(snapshot)
+    for field in DATE_FIELDS:
+        value = parsed.get(field)
+        parsed[field] = parse_datetime(value) if isinstance(value, str) else value
+    return parsed
+
+
+class MetricsProjector:
+    """
+    Fold ``PurchaseOrderEvent`` rows into vendor metrics.
+
+    The state is a running set of metric totals per vendor plus the log
+    position it reflects, so its size grows with the number of vendors, not
+    POs. An event replaces its PO's previous snapshot, which is read back
+    from the log (one query per chunk) and subtracted. Events at or before
+    ``base``, where replay started from empty totals, were never added and
+    are not subtracted.
+
+    It round-trips through ``to_state``/``from_state`` so a replay can
+    resume from a checkpoint instead of from the start of the log.
+    """
+
+    def __init__(self, position=0, totals=None, base=None):
+        self.position = position
+        self.base = position if base is None else base
+        self.totals = totals if totals is not None else {}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "MetricsProjector":
+        projector = cls(
+            position=state.get("position", 0),
+            base=state.get("base", 0),
+            totals={int(vendor_id): totals for vendor_id, totals in state.get("totals", {}).items()},
+        )
+        # Older checkpoints kept every PO's latest snapshot instead of totals.
+        for snapshot in state.get("orders", {}).values():
+            projector._add(snapshot, 1)
+        return projector
+
+    def to_state(self) -> dict:
+        return {"position": self.position, "base": self.base, "totals": self.totals}
+
+    def _add(self, snapshot: dict | None, sign: int) -> None:
+        if not snapshot:
+            return
+        totals = self.totals.setdefault(snapshot["vendor_id"], dict.fromkeys(TOTAL_FIELDS, 0))
+        for field, value in snapshot_totals([_parse_snapshot(snapshot)]).items():
+            totals[field] += sign * value
+
+    def _previous_snapshots(self, po_ids, before: int) -> dict:
+        """
+        ``{po_id: snapshot}`` as of the last event before ``before`` (and after ``base``).
+        """
+        last_ids = (
+            PurchaseOrderEvent.objects.filter(purchase_order_id__in=po_ids, id__gt=self.base, id__lt=before)
+            .values("purchase_order_id")
+            .annotate(last=Max("id"))
+            .values_list("last", flat=True)
+        )
+        return dict(
+            PurchaseOrderEvent.objects.filter(id__in=list(last_ids)).values_list("purchase_order_id", "snapshot")
+        )
+
+    def apply(self, event_id: int, snapshot: dict, previous: dict | None) -> None:
+        self._add(previous, -1)
+        self._add(snapshot, 1)
+        self.position = event_id
+
+    def consume(self, vendor_ids=None, until=None, chunk_size=2000) -> int:
+        """
+        Stream events after the current position; returns how many were applied.
+        """
+        events = PurchaseOrderEvent.objects.order_by("id")
+        if vendor_ids is not None:
+            events = events.filter(vendor_id__in=vendor_ids)
+        if until is not None:
+            events = events.filter(id__lte=until)
+        applied = 0
+        while True:
+            rows = list(
+                events.filter(id__gt=self.position).values_list("id", "purchase_order_id", "snapshot")[:chunk_size]
+            )
+            if not rows:
+                return applied
+            previous = self._previous_snapshots({po_id for _, po_id, _ in rows}, before=rows[0][0])
+            for event_id, po_id, snapshot in rows:
+                self.apply(event_id, snapshot, previous.get(po_id))
+                previous[po_id] = snapshot
+            applied += len(rows)
+
+    def metrics(self) -> dict:
+        """
+        Return ``{vendor_id: metrics}`` for every vendor with POs in the state.
+        """
+        return {
+            vendor_id: metrics_from_totals(totals)
+            for vendor_id, totals in self.totals.items() if totals["total_count"] > 0
+        }
@@ -0,0 +1,108 @@
+"""
+Vendor self-registration. Routed lazily from ``config.urls``: this module,
+and the JWT token machinery it needs, is only imported by the first
+registration request.
+"""
+from django.contrib.auth.models import User
+from django.urls import path
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.throttling import AuthRateThrottle
+from .models import Vendor
+from .serializers import VendorSerializer
+
+
+class VendorRegistrationSerializer(serializers.Serializer):
+    # User fields
+    username = serializers.CharField(max_length=150, required=True)
+    email = serializers.EmailField(required=True)
+    password = serializers.CharField(write_only=True, required=True, min_length=8)
+    password_confirm = serializers.CharField(write_only=True, required=True, min_length=8)
+    
+    # Vendor fields
+    name = serializers.CharField(max_length=255, required=True)
+    contact_details = serializers.CharField(required=True)
+    address = serializers.CharField(required=True)
+    vendor_code = serializers.CharField(max_length=50, required=True)
+    
+    # Response fields
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+    vendor = VendorSerializer(read_only=True)
+    
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password_confirm']:
+            raise serializers.ValidationError({"password": "Passwords do not match."})
+        return attrs
+    
+    def validate_username(self, value):
+        if User.objects.filter(username=value).exists():
+            raise serializers.ValidationError("A user with this username already exists.")
+        return value
+    
+    def validate_email(self, value):
+        if User.objects.filter(email=value).exists():
+            raise serializers.ValidationError("A user with this email already exists.")
+        return value
+    
+    def validate_vendor_code(self, value):
+        if Vendor.objects.filter(vendor_code=value).exists():
+            raise serializers.ValidationError("A vendor with this vendor code already exists.")
+        return value
+    
+    def create(self, validated_data):
+        # Create User
+        user = User.objects.create_user(
+            username=validated_data['username'],
+            email=validated_data['email'],
+            password=validated_data['password']
+        )
+        
+        # Create Vendor linked to User
+        vendor = Vendor.objects.create(
+            name=validated_data['name'],
+            contact_details=validated_data['contact_details'],
+            address=validated_data['address'],
+            vendor_code=validated_data['vendor_code'],
+            user=user
+        )
+        
+        # Generate JWT tokens
+        refresh = RefreshToken.for_user(user)
+        
+        return {
+            'vendor': vendor,
+            'access': str(refresh.access_token),
+            'refresh': str(refresh)
+        }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
+def vendor_registration_view(request):
+    """
+    Register a new vendor account.
+    
+    Creates both a Django User and a Vendor profile linked together.
+    Returns JWT tokens for immediate authentication.
+    """
+    serializer = VendorRegistrationSerializer(data=request.data)
+    if serializer.is_valid():
+        result = serializer.save()
+        return Response({
+            'message': 'Vendor registered successfully',
+            'vendor': VendorSerializer(result['vendor']).data,
+            'access': result['access'],
+            'refresh': result['refresh']
+        }, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+urlpatterns = [
+    path("", vendor_registration_view, name="vendor-register"),
+]
@@ -0,0 +1,167 @@
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Vendor
+
+SEARCH_FIELDS = ("name", "vendor_code", "contact_details", "address")
+FTS_TABLE = "vendors_vendor_fts"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Weights applied per column (name, vendor_code, contact_details, address).
+_FTS_WEIGHTS = "10.0, 8.0, 1.0, 1.0"
+
+_PG_DOCUMENT = "name || ' ' || vendor_code || ' ' || contact_details || ' ' || address"
+_PG_TRIGRAM_DOCUMENT = "name || ' ' || vendor_code"
+
+
+def _terms(query: str) -> list[str]:
+    return _TERM_RE.findall(query.lower())
+
+
+def _trigrams(term: str) -> list[str]:
+    return [term[i:i + 3] for i in range(len(term) - 2)]
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search_vendors(query: str, limit: int = DEFAULT_LIMIT) -> list[tuple[int, float]]:
+    """
+    Return ``(vendor_id, rank)`` pairs for ``query``, best match first.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    connection = connections[router.db_for_read(Vendor)]
+    if connection.vendor == "postgresql":
+        return _search_postgresql(connection, terms, limit)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(connection, terms, limit)
+    return _search_fallback(terms, limit)
+
+
+def _search_postgresql(connection, terms, limit):
+    # Prefix matching via tsquery, typo tolerance via pg_trgm word similarity.
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    phrase = " ".join(terms)
+    sql = f"""
+        SELECT id,
+               ts_rank(to_tsvector('simple', {_PG_DOCUMENT}), to_tsquery('simple', %s)) * 2
+               + word_similarity(%s, {_PG_TRIGRAM_DOCUMENT}) AS rank
+        FROM vendors_vendor
+        WHERE to_tsvector('simple', {_PG_DOCUMENT}) @@ to_tsquery('simple', %s)
+           OR %s <%% ({_PG_TRIGRAM_DOCUMENT})
+        ORDER BY rank DESC, id
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, phrase, tsquery, phrase, limit])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _search_sqlite(connection, terms, limit):
+    long_terms = [term for term in terms if len(term) >= 3]
+    if not long_terms:
+        return _search_fallback(terms, limit)
+    # Too short for a trigram; matched with LIKE the way the fallback does.
+    short_terms = [term for term in terms if len(term) < 3]
+
+    # Substring (and therefore prefix) matches on every term rank first.
+    exact = _fts_query(
+        connection, " AND ".join(_fts_phrase(term) for term in long_terms), limit, short_terms
+    )
+    if len(exact) >= limit:
+        return exact
+
+    # Typo tolerance: any shared trigram matches, bm25 favours the most overlap.
+    grams = {gram for term in long_terms for gram in _trigrams(term)}
+    fuzzy = _fts_query(
+        connection, " OR ".join(_fts_phrase(gram) for gram in sorted(grams)), limit, short_terms
+    )
+    seen = {vendor_id for vendor_id, _ in exact}
+    results = list(exact)
+    for vendor_id, rank in fuzzy:
+        if vendor_id not in seen:
+            results.append((vendor_id, rank))
+            seen.add(vendor_id)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _like_escape(term: str) -> str:
+    # Terms are \w+ runs, so "_" is the only LIKE wildcard they can hold.
+    return term.replace("_", "\\_")
+
+
+def _fts_query(connection, match, limit, short_terms=()):
+    # Each short term must be in the name or start the vendor code, as in _search_fallback().
+    conditions = "".join(
+        " AND (name LIKE %s ESCAPE '\\' OR vendor_code LIKE %s ESCAPE '\\')" for _ in short_terms
+    )
+    params = [match]
+    for term in short_terms:
+        params += [f"%{_like_escape(term)}%", f"{_like_escape(term)}%"]
+    sql = f"""
+        SELECT rowid, -bm25({FTS_TABLE}, {_FTS_WEIGHTS}) AS rank
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH %s{conditions}
+        ORDER BY rank DESC, rowid
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _search_fallback(terms, limit):
+    qs = Vendor.objects.all()
+    for term in terms:
+        qs = qs.filter(Q(name__icontains=term) | Q(vendor_code__istartswith=term))
+    return [(pk, 0.0) for pk in qs.order_by("name").values_list("pk", flat=True)[:limit]]
+
+
+def index_vendor(vendor: Vendor) -> None:
+    """
+    Upsert a vendor into the SQLite FTS5 shadow table.
+    """
+    connection = connections[router.db_for_write(Vendor)]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [vendor.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+            [vendor.pk] + [getattr(vendor, field) for field in SEARCH_FIELDS],
+        )
+
+
+def unindex_vendor(vendor_id: int) -> None:
+    connection = connections[router.db_for_write(Vendor)]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [vendor_id])
+
+
+def rebuild_index() -> int:
+    """
+    Rebuild the SQLite FTS5 shadow table from the vendors table.
+    """
+    connection = connections[router.db_for_write(Vendor)]
+    if connection.vendor != "sqlite":
+        return 0
+    columns = ", ".join(SEARCH_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) SELECT id, {columns} FROM vendors_vendor"
+        )
+        return cursor.rowcount
@@ -1,12 +1,14 @@
 from rest_framework import serializers
-from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Vendor, HistoricalPerformance
+from .models import Vendor, HistoricalPerformance, MaintenanceJob, VendorRanking
+from .sketches import vendor_percentiles
+from .status_counts import STATUS_COUNT_FIELDS
+from .windows import windowed_metrics
 
 class VendorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vendor
-        fields = "__all__"
+        # Status counters are served by VendorSummarySerializer.
+        exclude = ("response_time_sketch", "lateness_sketch", *STATUS_COUNT_FIELDS)
         read_only_fields = (
             "on_time_delivery_rate",
             "quality_rating_avg",
@@ -14,6 +16,9 @@ class VendorSerializer(serializers.ModelSerializer):
             "fulfillment_rate",
         )
 
+class VendorSearchSerializer(VendorSerializer):
+    rank = serializers.FloatField(read_only=True)
+
 class VendorPerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vendor
@@ -27,72 +32,80 @@ class VendorPerformanceSerializer(serializers.ModelSerializer):
             "fulfillment_rate",
         )
 
+class VendorWindowedPerformanceSerializer(VendorPerformanceSerializer):
+    """
+    Lifetime metrics plus rolling 30 and 90 day windows and response-time
+    and lateness percentiles.
+    """
+    windows = serializers.SerializerMethodField()
+    percentiles = serializers.SerializerMethodField()
+
+    class Meta(VendorPerformanceSerializer.Meta):
+        fields = VendorPerformanceSerializer.Meta.fields + ("windows", "percentiles")
+
+    def get_windows(self, obj):
+        return windowed_metrics(obj.pk)
+
+    def get_percentiles(self, obj):
+        return vendor_percentiles(obj)
+
+class VendorSummarySerializer(VendorPerformanceSerializer):
+    """
+    Lifetime metrics plus live PO counts by status, all read from the
+    vendor row.
+    """
+    purchase_orders = serializers.SerializerMethodField()
+
+    class Meta(VendorPerformanceSerializer.Meta):
+        fields = VendorPerformanceSerializer.Meta.fields + ("purchase_orders",)
+
+    def get_purchase_orders(self, obj):
+        counts = {status: getattr(obj, field) for field, status in STATUS_COUNT_FIELDS.items()}
+        return {"total": sum(counts.values()), **counts}
+
+class VendorRankingSerializer(serializers.ModelSerializer):
+    vendor = VendorPerformanceSerializer(read_only=True)
+
+    class Meta:
+        model = VendorRanking
+        fields = (
+            "rank",
+            "score",
+            "percentile",
+            "on_time_delivery_percentile",
+            "quality_rating_percentile",
+            "response_time_percentile",
+            "fulfillment_percentile",
+            "vendor",
+        )
+
 class HistoricalPerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistoricalPerformance
         fields = "__all__"
         read_only_fields = ("date",)
 
-class VendorRegistrationSerializer(serializers.Serializer):
-    # User fields
-    username = serializers.CharField(max_length=150, required=True)
-    email = serializers.EmailField(required=True)
-    password = serializers.CharField(write_only=True, required=True, min_length=8)
-    password_confirm = serializers.CharField(write_only=True, required=True, min_length=8)
-    
-    # Vendor fields
-    name = serializers.CharField(max_length=255, required=True)
-    contact_details = serializers.CharField(required=True)
-    address = serializers.CharField(required=True)
-    vendor_code = serializers.CharField(max_length=50, required=True)
-    
-    # Response fields
-    access = serializers.CharField(read_only=True)
-    refresh = serializers.CharField(read_only=True)
-    vendor = VendorSerializer(read_only=True)
-    
-    def validate(self, attrs):
-        if attrs['password'] != attrs['password_confirm']:
-            raise serializers.ValidationError({"password": "Passwords do not match."})
-        return attrs
-    
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-    
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-    
-    def validate_vendor_code(self, value):
-        if Vendor.objects.filter(vendor_code=value).exists():
-            raise serializers.ValidationError("A vendor with this vendor code already exists.")
-        return value
-    
-    def create(self, validated_data):
-        # Create User
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
-        )
-        
-        # Create Vendor linked to User
-        vendor = Vendor.objects.create(
-            name=validated_data['name'],
-            contact_details=validated_data['contact_details'],
-            address=validated_data['address'],
-            vendor_code=validated_data['vendor_code'],
-            user=user
+class MaintenanceJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MaintenanceJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "params",
+            "total",
+            "processed",
+            "progress",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
         )
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return {
-            'vendor': vendor,
-            'access': str(refresh.access_token),
-            'refresh': str(refresh)
-        }
\ No newline at end of file
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if obj.status == MaintenanceJob.SUCCEEDED:
+            return 100.0
+        return round(obj.processed / obj.total * 100, 1) if obj.total else 0.0
@@ -1,3 +1,30 @@
-# Placeholder for vendor-related signals.
-# Currently metrics are triggered from purchase_orders.signals.
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from config.throttling import forget_vendor
+from .leaderboard import schedule_rank_refresh
+from .models import Vendor, VendorRanking
+from .search import index_vendor, unindex_vendor
+
+# Metrics are triggered from purchase_orders.signals.
+
+
+@receiver(post_save, sender=Vendor)
+def update_search_index(sender, instance: Vendor, **kwargs):
+    index_vendor(instance)
+
+
+@receiver(post_delete, sender=Vendor)
+def remove_from_search_index(sender, instance: Vendor, **kwargs):
+    unindex_vendor(instance.pk)
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def forget_throttle_vendor(sender, instance: Vendor, **kwargs):
+    forget_vendor(instance.pk, instance.user_id)
+
+
+@receiver(post_delete, sender=VendorRanking)
+def rerank_after_removal(sender, instance: VendorRanking, **kwargs):
+    schedule_rank_refresh()
@@ -0,0 +1,275 @@
+import math
+import struct
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from purchase_orders.models import ArchivedPurchaseOrder, PurchaseOrder
+from .models import Vendor
+
+# Vendor field -> what it measures. Response time is in hours (like
+# ``average_response_time``), lateness in days (negative means early).
+SKETCH_FIELDS = {
+    "response_time_sketch": "response_time_hours",
+    "lateness_sketch": "lateness_days",
+}
+QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+RELATIVE_ACCURACY = 0.01
+# Anything closer to zero than this (about a second either way) counts as zero.
+MIN_VALUE = 1e-4
+
+_HEADER = struct.Struct("<Bdd")
+_VERSION = 1
+
+
+class QuantileSketch:
+    """
+    A DDSketch: values are counted in logarithmically sized bins, so any
+    quantile comes back within ``relative_accuracy`` of the true value.
+
+    Sketches with the same parameters merge by adding bin counts, and a
+    value can be removed again by adding it with a negative count, which is
+    how PO edits and deletes are undone.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, min_value=MIN_VALUE):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = defaultdict(int)
+        self.negative = defaultdict(int)
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if abs(value) < self.min_value:
+            self.zero_count += count
+            return
+        store = self.positive if value > 0 else self.negative
+        key = self._key(abs(value))
+        store[key] += count
+        if not store[key]:
+            del store[key]
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if (other.relative_accuracy, other.min_value) != (self.relative_accuracy, self.min_value):
+            raise ValueError("Cannot merge sketches with different parameters.")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] += count
+                if not store[key]:
+                    del store[key]
+        self.zero_count += other.zero_count
+
+    def quantile(self, q: float):
+        """
+        The value at quantile ``q`` (0-1), or None for an empty sketch.
+        """
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_bytes(self) -> bytes:
+        """
+        Header, then varints: zero count and each store as its bin count
+        followed by (key delta, count) pairs.
+        """
+        out = bytearray(_HEADER.pack(_VERSION, self.relative_accuracy, self.min_value))
+        _put_varint(out, _zigzag(self.zero_count))
+        for store in (self.positive, self.negative):
+            _put_varint(out, len(store))
+            previous = 0
+            for key in sorted(store):
+                _put_varint(out, _zigzag(key - previous))
+                _put_varint(out, _zigzag(store[key]))
+                previous = key
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data) -> "QuantileSketch":
+        data = bytes(data or b"")
+        if not data:
+            return cls()
+        version, relative_accuracy, min_value = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unknown sketch version {version}.")
+        sketch = cls(relative_accuracy, min_value)
+        position = _HEADER.size
+        zero, position = _get_varint(data, position)
+        sketch.zero_count = _unzigzag(zero)
+        for store in (sketch.positive, sketch.negative):
+            size, position = _get_varint(data, position)
+            key = 0
+            for _ in range(size):
+                delta, position = _get_varint(data, position)
+                count, position = _get_varint(data, position)
+                key += _unzigzag(delta)
+                store[key] = _unzigzag(count)
+        return sketch
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, position: int) -> tuple:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def sketch_contributions(snapshot: dict | None) -> dict:
+    """
+    Map a PO metric snapshot to ``{(vendor_id, sketch_field): [values]}``.
+    """
+    contributions = defaultdict(list)
+    if not snapshot or not snapshot.get("issue_date"):
+        return contributions
+    vendor_id = snapshot["vendor_id"]
+    acknowledged = snapshot.get("acknowledgment_date")
+    if acknowledged is not None and acknowledged >= snapshot["issue_date"]:
+        hours = (acknowledged - snapshot["issue_date"]).total_seconds() / 3600
+        contributions[(vendor_id, "response_time_sketch")].append(hours)
+    actual, expected = snapshot.get("actual_delivery_date"), snapshot.get("expected_delivery_date")
+    if snapshot.get("status") == "completed" and actual is not None and expected is not None:
+        contributions[(vendor_id, "lateness_sketch")].append((actual - expected).total_seconds() / 86400)
+    return contributions
+
+
+def apply_sketch_delta(old: dict | None, new: dict | None) -> None:
+    """
+    Move a PO's values from its ``old`` to its ``new`` snapshot in the
+    vendors' sketches. Saves that change neither value write nothing.
+    """
+    before, after = sketch_contributions(old), sketch_contributions(new)
+    if before == after:
+        return
+    by_vendor = defaultdict(dict)
+    for key in before.keys() | after.keys():
+        if before.get(key) != after.get(key):
+            vendor_id, field = key
+            by_vendor[vendor_id][field] = (before.get(key, []), after.get(key, []))
+
+    for vendor_id, fields in by_vendor.items():
+        with transaction.atomic():
+            stored = Vendor.objects.select_for_update().filter(pk=vendor_id).values(*fields).first()
+            if stored is None:
+                continue
+            changes = {}
+            for field, (removed, added) in fields.items():
+                sketch = QuantileSketch.from_bytes(stored[field])
+                for value in removed:
+                    sketch.add(value, -1)
+                for value in added:
+                    sketch.add(value)
+                changes[field] = sketch.to_bytes()
+            Vendor.objects.filter(pk=vendor_id).update(**changes)
+
+
+def _archived_snapshots(vendor_ids=None):
+    archived = ArchivedPurchaseOrder.objects.all()
+    if vendor_ids is not None:
+        archived = archived.filter(vendor_id__in=vendor_ids)
+    for po in archived.iterator(chunk_size=500):
+        data = po.representation()
+        snapshot = {"vendor_id": po.vendor_id, "status": po.status}
+        for field in ("issue_date", "acknowledgment_date", "expected_delivery_date", "actual_delivery_date"):
+            snapshot[field] = parse_datetime(data[field]) if data.get(field) else None
+        yield snapshot
+
+
+def rebuild_sketches(vendor_ids=None) -> int:
+    """
+    Recompute sketches from live and archived POs, for all vendors or
+    ``vendor_ids``. Returns the number of vendors written.
+    """
+    vendors = Vendor.objects.all()
+    pos = PurchaseOrder.objects.all()
+    if vendor_ids is not None:
+        vendors = vendors.filter(pk__in=vendor_ids)
+        pos = pos.filter(vendor_id__in=vendor_ids)
+
+    sketches = defaultdict(lambda: {field: QuantileSketch() for field in SKETCH_FIELDS})
+    snapshots = pos.values(*PurchaseOrder.METRIC_FIELDS).iterator(chunk_size=2000)
+    for source in (snapshots, _archived_snapshots(vendor_ids)):
+        for snapshot in source:
+            for (vendor_id, field), values in sketch_contributions(snapshot).items():
+                for value in values:
+                    sketches[vendor_id][field].add(value)
+
+    written = 0
+    for vendor_id in vendors.values_list("pk", flat=True).iterator():
+        fields = sketches[vendor_id]
+        Vendor.objects.filter(pk=vendor_id).update(**{field: fields[field].to_bytes() for field in SKETCH_FIELDS})
+        written += 1
+    return written
+
+
+def summarize(sketch: QuantileSketch) -> dict:
+    return {
+        "count": sketch.count,
+        **{f"p{round(q * 100)}": sketch.quantile(q) for q in QUANTILES},
+    }
+
+
+def vendor_percentiles(vendor: Vendor) -> dict:
+    return {
+        name: summarize(QuantileSketch.from_bytes(getattr(vendor, field)))
+        for field, name in SKETCH_FIELDS.items()
+    }
+
+
+def fleet_percentiles(vendor_ids=None) -> dict:
+    """
+    Percentiles across vendors (all, or ``vendor_ids``) by merging their
+    sketches; no purchase orders are read.
+    """
+    vendors = Vendor.objects.all()
+    if vendor_ids is not None:
+        vendors = vendors.filter(pk__in=vendor_ids)
+    merged = {field: QuantileSketch() for field in SKETCH_FIELDS}
+    for row in vendors.values(*SKETCH_FIELDS).iterator(chunk_size=500):
+        for field in SKETCH_FIELDS:
+            merged[field].merge(QuantileSketch.from_bytes(row[field]))
+    return {name: summarize(merged[field]) for field, name in SKETCH_FIELDS.items()}
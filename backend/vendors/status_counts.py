@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from purchase_orders.models import PurchaseOrder
+from .models import Vendor
+
+# Vendor field -> the PO status it counts. Only live POs are counted, the
+# same set the vendor portal pages through; archived POs drop out.
+STATUS_COUNT_FIELDS = {
+    "pending_count": "pending",
+    "acknowledged_count": "acknowledged",
+    "completed_count": "completed",
+    "canceled_count": "canceled",
+}
+_FIELD_FOR_STATUS = {status: field for field, status in STATUS_COUNT_FIELDS.items()}
+
+
+def status_count_deltas(old: dict | None, new: dict | None) -> dict:
+    """
+    ``{vendor_id: Counter}`` of counter changes for a PO going from its
+    ``old`` to its ``new`` snapshot (None for created / deleted).
+    """
+    deltas = defaultdict(Counter)
+    for snapshot, sign in ((old, -1), (new, 1)):
+        if snapshot and snapshot.get("status") in _FIELD_FOR_STATUS:
+            deltas[snapshot["vendor_id"]][_FIELD_FOR_STATUS[snapshot["status"]]] += sign
+    return deltas
+
+
+def _apply(deltas: dict) -> None:
+    for vendor_id, counter in deltas.items():
+        changes = {field: F(field) + value for field, value in counter.items() if value}
+        if changes:
+            Vendor.objects.filter(pk=vendor_id).update(**changes)
+
+
+def apply_status_delta(old: dict | None, new: dict | None) -> None:
+    """
+    Move a PO's count from its ``old`` to its ``new`` status (and vendor).
+    A save that changes neither writes nothing.
+    """
+    _apply(status_count_deltas(old, new))
+
+
+def subtract_status_counts(snapshots) -> None:
+    """
+    Take POs removed in bulk (purge, archival, vendor deletion) off their
+    vendors' counters, with one UPDATE per vendor.
+    """
+    deltas = defaultdict(Counter)
+    for snapshot in snapshots:
+        for vendor_id, counter in status_count_deltas(snapshot, None).items():
+            deltas[vendor_id].update(counter)
+    _apply(deltas)
+
+
+def vendor_status_counts(vendor_ids=None) -> dict:
+    """
+    ``{vendor_id: {field: count}}`` counted from the PO table, grouped on
+    the (vendor, status) index. Vendors without POs are absent.
+    """
+    pos = PurchaseOrder.objects.all()
+    if vendor_ids is not None:
+        pos = pos.filter(vendor_id__in=vendor_ids)
+    counts = defaultdict(lambda: dict.fromkeys(STATUS_COUNT_FIELDS, 0))
+    rows = pos.order_by().values("vendor_id", "status").annotate(n=Count("pk"))
+    for row in rows:
+        if row["status"] in _FIELD_FOR_STATUS:
+            counts[row["vendor_id"]][_FIELD_FOR_STATUS[row["status"]]] = row["n"]
+    return counts
+
+
+def _drift(vendor_ids=None) -> dict:
+    actual = vendor_status_counts(vendor_ids)
+    vendors = Vendor.objects.all()
+    if vendor_ids is not None:
+        vendors = vendors.filter(pk__in=vendor_ids)
+    drifted = {}
+    for vendor_id, *stored in vendors.values_list("pk", *STATUS_COUNT_FIELDS).iterator(chunk_size=2000):
+        counts = actual.get(vendor_id) or dict.fromkeys(STATUS_COUNT_FIELDS, 0)
+        diff = {
+            field: (value, counts[field])
+            for field, value in zip(STATUS_COUNT_FIELDS, stored) if value != counts[field]
+        }
+        if diff:
+            drifted[vendor_id] = diff
+    return drifted
+
+
+def reconcile_status_counts(vendor_ids=None, dry_run=False) -> dict:
+    """
+    Find vendors whose counters disagree with their POs and, unless
+    ``dry_run``, recount and store them. Returns ``{vendor_id: {field:
+    (stored, actual)}}`` for the vendors that had drifted.
+
+    The first pass takes no locks. Each drifted vendor is then recounted
+    with its row locked: writers update the same row in their transaction,
+    so none can commit between the recount and the write.
+    """
+    drifted = _drift(vendor_ids)
+    if dry_run:
+        return drifted
+    for vendor_id in drifted:
+        with transaction.atomic():
+            if not Vendor.objects.select_for_update().filter(pk=vendor_id).exists():
+                continue
+            counts = vendor_status_counts([vendor_id]).get(vendor_id) or dict.fromkeys(STATUS_COUNT_FIELDS, 0)
+            Vendor.objects.filter(pk=vendor_id).update(**counts)
+    return drifted
@@ -1,3 +1,379 @@
+import math
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import Count
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from purchase_orders.archive import archive_chunk
+from purchase_orders.models import PurchaseOrder
+from .jobs import RUNNERS, run_job
+from .leaderboard import update_ranking
+from .metrics import _compute_metrics
+from .models import MaintenanceJob, Vendor, VendorRanking
+from .projector import MetricsProjector
+from .search import _search_fallback, _terms, search_vendors
+from .sketches import QUANTILES, RELATIVE_ACCURACY, QuantileSketch, rebuild_sketches
+from .status_counts import STATUS_COUNT_FIELDS, reconcile_status_counts
+
+
+class MetricsProjectorTests(TestCase):
+    def setUp(self):
+        self.vendors = [
+            Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code) for code in ("A", "B")
+        ]
+        now = timezone.now()
+        self.pos = [
+            PurchaseOrder.objects.create(
+                po_number=f"PO-{number}", vendor=self.vendors[number % 2], order_date=now, issue_date=now,
+                expected_delivery_date=now + timedelta(days=5), items=[], quantity=1,
+            )
+            for number in range(6)
+        ]
+
+    def change_history(self):
+        first, second, third, fourth = self.pos[:4]
+        first.status, first.actual_delivery_date, first.quality_rating = "completed", timezone.now(), 4
+        first.save()
+        second.vendor = self.vendors[0]
+        second.save()
+        third.delete()
+        fourth.acknowledgment_date = fourth.issue_date + timedelta(hours=6)
+        fourth.save()
+
+    def assertMatchesStoredMetrics(self, metrics):
+        self.assertEqual(set(metrics), {vendor.pk for vendor in self.vendors})
+        for vendor in self.vendors:
+            expected = _compute_metrics(vendor)
+            for field, value in expected.items():
+                self.assertTrue(math.isclose(metrics[vendor.pk][field], value, abs_tol=1e-9), (vendor, field))
+
+    def test_state_holds_per_vendor_totals_and_resumes(self):
+        projector = MetricsProjector()
+        projector.consume()
+        state = projector.to_state()
+        self.assertEqual(set(state["totals"]), {vendor.pk for vendor in self.vendors})
+
+        self.change_history()
+        resumed = MetricsProjector.from_state(state)
+        self.assertEqual(resumed.consume(chunk_size=2), 4)
+        self.assertMatchesStoredMetrics(resumed.metrics())
+
+        from_scratch = MetricsProjector()
+        from_scratch.consume(chunk_size=3)
+        self.assertMatchesStoredMetrics(from_scratch.metrics())
+
+    def test_checkpoint_refuses_a_vendor_filter(self):
+        with self.assertRaisesMessage(CommandError, "--vendor"):
+            call_command("replay_metrics", "--checkpoint", "unused.json", "--vendor", str(self.vendors[0].pk))
+
+
+class VendorSummaryTests(TestCase):
+    def test_follows_the_current_vendor_profile(self):
+        user = User.objects.create_user("portal")
+        first, second = (
+            Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code) for code in ("A", "B")
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.assertEqual(client.get("/api/vendor/summary/").status_code, 403)
+        first.user = user
+        first.save()
+        self.assertEqual(client.get("/api/vendor/summary/").json()["vendor_code"], "A")
+
+        first.user = None
+        first.save()
+        second.user = user
+        second.save()
+        user.refresh_from_db()
+        self.assertEqual(client.get("/api/vendor/summary/").json()["vendor_code"], "B")
+
+
+class StatusCountTests(TestCase):
+    def setUp(self):
+        self.vendors = [
+            Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code) for code in ("A", "B")
+        ]
+        self.now = timezone.now()
+
+    def create(self, number, vendor, status="pending", days_ago=0):
+        order_date = self.now - timedelta(days=days_ago)
+        return PurchaseOrder.objects.create(
+            po_number=f"PO-{number}", vendor=vendor, status=status, order_date=order_date, issue_date=order_date,
+            items=[], quantity=1,
+        )
+
+    def assertCountersMatchTable(self):
+        expected = {vendor.pk: dict.fromkeys(STATUS_COUNT_FIELDS, 0) for vendor in self.vendors}
+        fields = {status: field for field, status in STATUS_COUNT_FIELDS.items()}
+        for row in PurchaseOrder.objects.order_by().values("vendor_id", "status").annotate(n=Count("pk")):
+            expected[row["vendor_id"]][fields[row["status"]]] = row["n"]
+        stored = {row.pop("pk"): row for row in Vendor.objects.values("pk", *STATUS_COUNT_FIELDS)}
+        self.assertEqual(stored, expected)
+
+    def test_counters_follow_every_kind_of_write(self):
+        a, b = self.vendors
+        pos = [self.create(number, a if number % 2 else b) for number in range(6)]
+        self.assertCountersMatchTable()
+
+        pos[0].status = "acknowledged"
+        pos[0].save()
+        pos[1].status = "completed"
+        pos[1].save()
+        pos[2].vendor = a
+        pos[2].status = "canceled"
+        pos[2].save()
+        self.assertCountersMatchTable()
+
+        pos[3].delete()
+        PurchaseOrder.objects.filter(pk=pos[4].pk).delete()
+        self.assertCountersMatchTable()
+
+        old = [self.create(f"old-{number}", a, status="completed", days_ago=500) for number in range(3)]
+        self.assertCountersMatchTable()
+        archive_chunk([po.pk for po in old[:2]])
+        self.assertCountersMatchTable()
+
+        job = MaintenanceJob.objects.create(kind=MaintenanceJob.PO_PURGE, params={"vendor": a.pk})
+        self.assertEqual(run_job(job.pk).status, MaintenanceJob.SUCCEEDED)
+        self.assertCountersMatchTable()
+
+    def test_reconcile_repairs_drifted_counters(self):
+        a, b = self.vendors
+        self.create(1, a)
+        self.create(2, a, status="completed")
+        Vendor.objects.filter(pk=a.pk).update(pending_count=7, completed_count=0)
+        Vendor.objects.filter(pk=b.pk).update(canceled_count=2)
+
+        drifted = reconcile_status_counts(dry_run=True)
+        self.assertEqual(drifted, {
+            a.pk: {"pending_count": (7, 1), "completed_count": (0, 1)},
+            b.pk: {"canceled_count": (2, 0)},
+        })
+        self.assertEqual(reconcile_status_counts(), drifted)
+        self.assertCountersMatchTable()
+        self.assertEqual(reconcile_status_counts(), {})
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.vendors = {
+            code: Vendor.objects.create(name=code, contact_details="-", address="-", vendor_code=code)
+            for code in ("A", "B", "C", "D")
+        }
+
+    def score(self, code, on_time):
+        update_ranking(self.vendors[code].pk, {
+            "on_time_delivery_rate": on_time, "quality_rating_avg": 4.0,
+            "average_response_time": 12.0, "fulfillment_rate": 90.0,
+        })
+
+    def refresh(self):
+        jobs = MaintenanceJob.objects.filter(kind=MaintenanceJob.RANK_REFRESH, status=MaintenanceJob.PENDING)
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(run_job(jobs.get().pk).status, MaintenanceJob.SUCCEEDED)
+
+    def ranks(self):
+        return dict(VendorRanking.objects.values_list("vendor__vendor_code", "rank"))
+
+    def test_score_changes_share_one_pending_rerank(self):
+        for code, on_time in (("A", 90.0), ("B", 50.0), ("C", 90.0), ("D", 10.0)):
+            self.score(code, on_time)
+        self.assertEqual(set(self.ranks().values()), {0})
+        self.refresh()
+        self.assertEqual(self.ranks(), {"A": 1, "C": 1, "B": 3, "D": 4})
+
+        self.score("D", 95.0)
+        self.score("A", 90.0)  # unchanged score: nothing to schedule
+        self.refresh()
+        self.assertEqual(self.ranks(), {"D": 1, "A": 2, "C": 2, "B": 4})
+
+    def test_deleting_a_vendor_closes_the_gap(self):
+        for code, on_time in (("A", 90.0), ("B", 50.0), ("C", 50.0), ("D", 10.0)):
+            self.score(code, on_time)
+        self.refresh()
+        self.vendors["A"].delete()
+        self.refresh()
+        self.assertEqual(self.ranks(), {"B": 1, "C": 1, "D": 3})
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("buyer"))
+        board = client.get("/api/vendors/leaderboard/").json()
+        self.assertEqual([row["rank"] for row in board], [1, 1, 3])
+
+
+class VendorSearchTests(TestCase):
+    def setUp(self):
+        self.vendors = {
+            code: Vendor.objects.create(name=name, contact_details="-", address="-", vendor_code=code)
+            for code, name in (
+                ("AB-1", "AB Supplies"),
+                ("CD-1", "CD Supplies"),
+                ("EF-1", "Northwind Traders"),
+                ("GH-1", "Contoso Hardware"),
+            )
+        }
+
+    def codes(self, query):
+        found = [vendor_id for vendor_id, _ in search_vendors(query)]
+        by_pk = {vendor.pk: code for code, vendor in self.vendors.items()}
+        return [by_pk[vendor_id] for vendor_id in found]
+
+    def test_full_text_prefix_and_typo_matches(self):
+        self.assertEqual(self.codes("northw"), ["EF-1"])
+        self.assertEqual(self.codes("contsoo"), ["GH-1"])
+        self.assertEqual(set(self.codes("supplies")), {"AB-1", "CD-1"})
+
+    def test_short_terms_narrow_longer_ones(self):
+        self.assertEqual(self.codes("AB Supplies"), ["AB-1"])
+        self.assertEqual(self.codes("cd supplie"), ["CD-1"])
+        self.assertEqual(self.codes("xy supplies"), [])
+
+    def test_fallback_matches_names_and_code_prefixes(self):
+        def fallback(query):
+            return {vendor_id for vendor_id, _ in _search_fallback(_terms(query), 10)}
+
+        self.assertEqual(fallback("ab supplies"), {self.vendors["AB-1"].pk})
+        self.assertEqual(fallback("gh"), {self.vendors["GH-1"].pk})
+        # Only short terms: the SQLite path falls back too.
+        self.assertEqual(self.codes("ef"), ["EF-1"])
+
+    def test_index_follows_saves_and_deletes(self):
+        vendor = self.vendors["EF-1"]
+        vendor.name = "Fabrikam Goods"
+        vendor.save()
+        self.assertEqual(self.codes("fabrikam"), ["EF-1"])
+        self.assertEqual(self.codes("northwind"), [])
+
+        vendor.delete()
+        self.assertEqual(self.codes("fabrikam"), [])
+
+
+class MaintenanceJobTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.vendor = Vendor.objects.create(name="A", contact_details="-", address="-", vendor_code="A")
+        now = timezone.now()
+        for number in range(3):
+            PurchaseOrder.objects.create(
+                po_number=f"PO-{number}", vendor=self.vendor, order_date=now, issue_date=now, items=[], quantity=1,
+            )
+
+    def job(self, pk):
+        return self.client.get(f"/api/jobs/{pk}/").json()
+
+    def test_vendor_delete_runs_pending_to_succeeded(self):
+        response = self.client.delete(f"/api/vendors/{self.vendor.pk}/")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+        self.assertEqual(self.job(job_id)["status"], MaintenanceJob.PENDING)
+        # Deleting again while the job is pending returns the same job.
+        self.assertEqual(self.client.delete(f"/api/vendors/{self.vendor.pk}/").json()["id"], job_id)
+
+        self.assertEqual(run_job(job_id).status, MaintenanceJob.SUCCEEDED)
+        job = self.job(job_id)
+        self.assertEqual((job["status"], job["total"], job["processed"]), (MaintenanceJob.SUCCEEDED, 4, 4))
+        self.assertIsNotNone(job["started_at"])
+        self.assertIsNotNone(job["finished_at"])
+        self.assertFalse(Vendor.objects.filter(pk=self.vendor.pk).exists())
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_failed_job_records_the_error_and_can_be_rerun(self):
+        response = self.client.post("/api/purchase_orders/purge/", {"vendor": self.vendor.pk}, format="json")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+
+        def broken(job):
+            raise RuntimeError("disk full")
+
+        with mock.patch.dict(RUNNERS, {MaintenanceJob.PO_PURGE: broken}), self.assertLogs("vendors.jobs", "ERROR"):
+            self.assertEqual(run_job(job_id).status, MaintenanceJob.FAILED)
+        self.assertEqual(self.job(job_id)["error"], "disk full")
+        self.assertEqual(PurchaseOrder.objects.count(), 3)
+
+        job = run_job(job_id)
+        self.assertEqual((job.status, job.error, job.processed), (MaintenanceJob.SUCCEEDED, "", 3))
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_jobs_are_only_visible_to_their_creator_and_staff(self):
+        job_id = self.client.delete(f"/api/vendors/{self.vendor.pk}/").json()["id"]
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user("other"))
+        self.assertEqual(other.get(f"/api/jobs/{job_id}/").status_code, 404)
+        self.assertEqual(self.client.post("/api/purchase_orders/purge/", {}, format="json").status_code, 400)
+
+
+class QuantileSketchTests(TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        # Response-time-like hours plus some early (negative) lateness and exact zeros.
+        self.values = [rng.lognormvariate(2, 1.5) for _ in range(2000)]
+        self.values += [-rng.expovariate(0.5) for _ in range(300)] + [0.0] * 50
+
+    def assertWithinBound(self, sketch, values):
+        ordered = sorted(values)
+        for q in QUANTILES + (0.0, 0.25, 1.0):
+            expected = ordered[math.floor(q * (len(ordered) - 1))]
+            self.assertLessEqual(
+                abs(sketch.quantile(q) - expected), RELATIVE_ACCURACY * abs(expected) + 1e-9, f"q={q}",
+            )
+
+    def test_quantiles_are_within_the_relative_accuracy(self):
+        sketch = QuantileSketch()
+        for value in self.values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertWithinBound(sketch, self.values)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+    def test_merge_removal_and_round_trip_keep_the_bound(self):
+        first, second = QuantileSketch(), QuantileSketch()
+        for number, value in enumerate(self.values):
+            (first if number % 2 else second).add(value)
+        first.merge(second)
+        self.assertWithinBound(first, self.values)
+
+        removed, kept = self.values[:500], self.values[500:]
+        for value in removed:
+            first.add(value, -1)
+        restored = QuantileSketch.from_bytes(first.to_bytes())
+        self.assertEqual(restored.count, len(kept))
+        self.assertWithinBound(restored, kept)
+
+        with self.assertRaises(ValueError):
+            first.merge(QuantileSketch(relative_accuracy=0.05))
+
+    def test_vendor_sketches_follow_po_changes(self):
+        vendor = Vendor.objects.create(name="A", contact_details="-", address="-", vendor_code="A")
+        issued = timezone.now() - timedelta(days=10)
+        hours = [1, 2, 4, 8, 16, 32, 64, 128]
+        pos = [
+            PurchaseOrder.objects.create(
+                po_number=f"PO-{number}", vendor=vendor, order_date=issued, issue_date=issued, items=[], quantity=1,
+                acknowledgment_date=issued + timedelta(hours=value),
+            )
+            for number, value in enumerate(hours)
+        ]
+        pos[-1].delete()
+        hours.pop()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("viewer"))
+
+        def percentiles():
+            return client.get("/api/vendors/percentiles/", {"vendor": vendor.pk}).json()["response_time_hours"]
+
+        signal_maintained = percentiles()
+        self.assertEqual(signal_maintained["count"], len(hours))
+        for q in QUANTILES:
+            expected = sorted(hours)[math.floor(q * (len(hours) - 1))]
+            self.assertAlmostEqual(signal_maintained[f"p{round(q * 100)}"], expected, delta=RELATIVE_ACCURACY * expected)
 
-# Create your tests here.
+        self.assertEqual(rebuild_sketches([vendor.pk]), 1)
+        self.assertEqual(percentiles(), signal_maintained)
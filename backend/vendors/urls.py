@@ -2,17 +2,27 @@ from django.urls import path
 from .views import (
     VendorListCreateView,
     VendorRetrieveUpdateDestroyView,
+    VendorSearchView,
+    VendorLeaderboardView,
+    VendorPercentilesView,
     HistoricalPerformanceListView,
+    MaintenanceJobDetailView,
     VendorPerformanceView,
-    vendor_registration_view,
+    VendorDeliveryAnalyticsView,
+    VendorSummaryView,
     vendor_profile_view,
 )
 
 urlpatterns = [
     path("vendors/", VendorListCreateView.as_view(), name="vendor-list-create"),
+    path("vendors/search/", VendorSearchView.as_view(), name="vendor-search"),
+    path("vendors/leaderboard/", VendorLeaderboardView.as_view(), name="vendor-leaderboard"),
+    path("vendors/percentiles/", VendorPercentilesView.as_view(), name="vendor-percentiles"),
     path("vendors/<int:pk>/", VendorRetrieveUpdateDestroyView.as_view(), name="vendor-detail"),
     path("vendors/<int:pk>/performance/", VendorPerformanceView.as_view(), name="vendor-performance"),
+    path("vendors/<int:pk>/delivery_analytics/", VendorDeliveryAnalyticsView.as_view(), name="vendor-delivery-analytics"),
     path("vendor_performance_history/", HistoricalPerformanceListView.as_view(), name="vendor-performance-history"),
-    path("vendors/register/", vendor_registration_view, name="vendor-register"),
     path("vendor/profile/", vendor_profile_view, name="vendor-profile"),
+    path("vendor/summary/", VendorSummaryView.as_view(), name="vendor-summary"),
+    path("jobs/<int:pk>/", MaintenanceJobDetailView.as_view(), name="maintenance-job-detail"),
 ]
\ No newline at end of file
@@ -1,29 +1,153 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import api_view
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from .models import Vendor, HistoricalPerformance
+from purchase_orders.permissions import IsVendorOwner
+from .filters import VendorFilter
+from .jobs import enqueue
+from .models import Vendor, HistoricalPerformance, MaintenanceJob, VendorRanking
+from .search import DEFAULT_LIMIT, search_vendors
+from .sketches import SKETCH_FIELDS, fleet_percentiles
+from .status_counts import STATUS_COUNT_FIELDS
 from .serializers import (
     VendorSerializer,
+    VendorSearchSerializer,
     HistoricalPerformanceSerializer,
-    VendorPerformanceSerializer,
-    VendorRegistrationSerializer,
+    MaintenanceJobSerializer,
+    VendorRankingSerializer,
+    VendorSummarySerializer,
+    VendorWindowedPerformanceSerializer,
 )
 
 class VendorListCreateView(generics.ListCreateAPIView):
-    queryset = Vendor.objects.all()
+    # Sketches and status counters are only read by the performance and
+    # summary views; deferring them also keeps save() from writing back
+    # stale copies.
+    queryset = Vendor.objects.defer(*SKETCH_FIELDS, *STATUS_COUNT_FIELDS).order_by("pk")
     serializer_class = VendorSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = VendorFilter
+    # Each metric column has its own index, see Vendor.Meta.indexes.
+    ordering_fields = [
+        "on_time_delivery_rate",
+        "quality_rating_avg",
+        "average_response_time",
+        "fulfillment_rate",
+        "name",
+        "created_at",
+    ]
 
 class VendorRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Vendor.objects.all()
+    """
+    DELETE schedules a background job (202) that removes the vendor's POs
+    in chunks before the vendor itself; poll ``/api/jobs/<id>/``.
+    """
+    queryset = Vendor.objects.defer(*SKETCH_FIELDS, *STATUS_COUNT_FIELDS)
     serializer_class = VendorSerializer
     lookup_field = "pk"
 
+    def destroy(self, request, *args, **kwargs):
+        vendor = self.get_object()
+        job = MaintenanceJob.objects.filter(
+            kind=MaintenanceJob.VENDOR_DELETE,
+            status__in=[MaintenanceJob.PENDING, MaintenanceJob.RUNNING],
+            params__vendor=vendor.pk,
+        ).first()
+        if job is None:
+            job = enqueue(MaintenanceJob.VENDOR_DELETE, {"vendor": vendor.pk}, request.user)
+        return Response(MaintenanceJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+class MaintenanceJobDetailView(generics.RetrieveAPIView):
+    serializer_class = MaintenanceJobSerializer
+    lookup_field = "pk"
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return MaintenanceJob.objects.all()
+        return MaintenanceJob.objects.filter(created_by=self.request.user)
+
+class VendorSearchView(generics.ListAPIView):
+    """
+    Ranked vendor search over name, vendor code, contact details and address.
+
+    Query params: ``q`` (search text), ``limit`` (max ranked matches).
+    """
+    serializer_class = VendorSearchSerializer
+
+    def get_queryset(self):
+        query = self.request.query_params.get("q", "")
+        try:
+            limit = int(self.request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        ranked = search_vendors(query, limit)
+        vendors = Vendor.objects.defer(*SKETCH_FIELDS).in_bulk([vendor_id for vendor_id, _ in ranked])
+        results = []
+        for vendor_id, rank in ranked:
+            vendor = vendors.get(vendor_id)
+            if vendor is not None:
+                vendor.rank = rank
+                results.append(vendor)
+        return results
+
 class VendorPerformanceView(generics.RetrieveAPIView):
     queryset = Vendor.objects.all()
-    serializer_class = VendorPerformanceSerializer
+    serializer_class = VendorWindowedPerformanceSerializer
+    lookup_field = "pk"
+
+class VendorDeliveryAnalyticsView(generics.GenericAPIView):
+    """
+    Lead-time, lateness and acknowledgement distributions (percentiles,
+    variance, trend per 30 days) over the vendor's completed POs.
+    """
+    queryset = Vendor.objects.defer(*SKETCH_FIELDS)
     lookup_field = "pk"
 
+    def get(self, request, *args, **kwargs):
+        # numpy is only imported by the first analytics request, not at worker start.
+        from .analytics import vendor_delivery_analytics
+
+        vendor = self.get_object()
+        return Response({"vendor": vendor.pk, **vendor_delivery_analytics(vendor)})
+
+class VendorPercentilesView(generics.GenericAPIView):
+    """
+    Fleet-wide response-time and lateness percentiles, merged from the
+    per-vendor sketches.
+
+    Query params: ``vendor`` (repeatable) to merge only those vendors.
+    """
+    queryset = Vendor.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        vendor_ids = request.query_params.getlist("vendor")
+        try:
+            vendor_ids = [int(pk) for pk in vendor_ids] or None
+        except ValueError:
+            return Response({"detail": "vendor must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(fleet_percentiles(vendor_ids))
+
+class VendorLeaderboardView(generics.ListAPIView):
+    """
+    Top vendors by composite score, read straight off the ``rank`` index.
+    Vendors not ranked yet (rank 0) are left out until the re-rank job runs.
+
+    Query params: ``limit`` (default 20, max 100).
+    """
+    serializer_class = VendorRankingSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        return VendorRanking.objects.filter(rank__gt=0).select_related("vendor").order_by("rank", "vendor_id")[:limit]
+
 class HistoricalPerformanceListView(generics.ListAPIView):
     queryset = HistoricalPerformance.objects.select_related("vendor").all()
     serializer_class = HistoricalPerformanceSerializer
@@ -40,22 +164,14 @@ def vendor_profile_view(request):
     serializer = VendorSerializer(vendor)
     return Response(serializer.data)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def vendor_registration_view(request):
+class VendorSummaryView(generics.GenericAPIView):
     """
-    Register a new vendor account.
-    
-    Creates both a Django User and a Vendor profile linked together.
-    Returns JWT tokens for immediate authentication.
-    """
-    serializer = VendorRegistrationSerializer(data=request.data)
-    if serializer.is_valid():
-        result = serializer.save()
-        return Response({
-            'message': 'Vendor registered successfully',
-            'vendor': VendorSerializer(result['vendor']).data,
-            'access': result['access'],
-            'refresh': result['refresh']
-        }, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    The signed-in vendor's metrics and PO counts by status, for the portal
+    dashboard. Served from the vendor row the permission check loads; the
+    counters are maintained by the PO signals, so no PO is scanned.
+    """
+    serializer_class = VendorSummarySerializer
+    permission_classes = [IsVendorOwner]
+
+    def get(self, request, *args, **kwargs):
+        return Response(self.get_serializer(request.user.vendor_profile).data)
@@ -0,0 +1,126 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from purchase_orders.models import PurchaseOrder
+from .models import VendorMetricBucket
+
+WINDOWS = (30, 90)
+COUNTER_FIELDS = (
+    "issued_count",
+    "completed_count",
+    "on_time_count",
+    "quality_count",
+    "quality_sum",
+    "ack_count",
+    "ack_seconds",
+)
+
+
+def _day(value):
+    return timezone.localtime(value).date()
+
+
+def bucket_contributions(snapshot: dict | None) -> dict:
+    """
+    Map a PO metric snapshot to ``{(vendor_id, day): Counter}`` bucket increments.
+    """
+    contributions = defaultdict(Counter)
+    if not snapshot or not snapshot.get("issue_date"):
+        return contributions
+    vendor_id = snapshot["vendor_id"]
+    issue_date = snapshot["issue_date"]
+    contributions[(vendor_id, _day(issue_date))]["issued_count"] += 1
+
+    actual = snapshot.get("actual_delivery_date")
+    if snapshot.get("status") == "completed" and actual is not None:
+        bucket = contributions[(vendor_id, _day(actual))]
+        bucket["completed_count"] += 1
+        expected = snapshot.get("expected_delivery_date")
+        if expected is not None and actual <= expected:
+            bucket["on_time_count"] += 1
+        if snapshot.get("quality_rating") is not None:
+            bucket["quality_count"] += 1
+            bucket["quality_sum"] += snapshot["quality_rating"]
+
+    acknowledged = snapshot.get("acknowledgment_date")
+    if acknowledged is not None and acknowledged >= issue_date:
+        bucket = contributions[(vendor_id, _day(acknowledged))]
+        bucket["ack_count"] += 1
+        bucket["ack_seconds"] += (acknowledged - issue_date).total_seconds()
+    return contributions
+
+
+def apply_snapshot_delta(old: dict | None, new: dict | None) -> None:
+    """
+    Move a PO's bucket contribution from its ``old`` to its ``new`` snapshot.
+    """
+    deltas = defaultdict(Counter)
+    for key, counter in bucket_contributions(old).items():
+        deltas[key].subtract(counter)
+    for key, counter in bucket_contributions(new).items():
+        deltas[key].update(counter)
+
+    for (vendor_id, day), counter in deltas.items():
+        changes = {field: F(field) + value for field, value in counter.items() if value}
+        if not changes:
+            continue
+        VendorMetricBucket.objects.get_or_create(vendor_id=vendor_id, day=day)
+        VendorMetricBucket.objects.filter(vendor_id=vendor_id, day=day).update(**changes)
+
+
+def _summarize(totals: dict) -> dict:
+    completed = totals["completed_count"]
+    issued = totals["issued_count"]
+    return {
+        "on_time_delivery_rate": totals["on_time_count"] / completed * 100 if completed else 0.0,
+        "quality_rating_avg": totals["quality_sum"] / totals["quality_count"] if totals["quality_count"] else 0.0,
+        "average_response_time": totals["ack_seconds"] / totals["ack_count"] / 3600 if totals["ack_count"] else 0.0,
+        # Completions in the window over POs issued in the window.
+        "fulfillment_rate": min(completed / issued * 100, 100.0) if issued else 0.0,
+        "completed_count": completed,
+        "issued_count": issued,
+    }
+
+
+def windowed_metrics(vendor_id: int, windows=WINDOWS) -> dict:
+    """
+    Rolling metrics per window, summed from at most ``max(windows)`` bucket rows.
+    """
+    today = timezone.localdate()
+    oldest = today - timedelta(days=max(windows) - 1)
+    rows = VendorMetricBucket.objects.filter(vendor_id=vendor_id, day__gte=oldest).values("day", *COUNTER_FIELDS)
+
+    totals = {days: dict.fromkeys(COUNTER_FIELDS, 0) for days in windows}
+    for row in rows:
+        age = (today - row["day"]).days
+        for days in windows:
+            if age < days:
+                for field in COUNTER_FIELDS:
+                    totals[days][field] += row[field]
+    return {f"last_{days}_days": _summarize(totals[days]) for days in windows}
+
+
+def rebuild_buckets(vendor_ids=None) -> int:
+    """
+    Recompute buckets from purchase orders, for all vendors or ``vendor_ids``.
+    """
+    pos = PurchaseOrder.objects.all()
+    buckets = VendorMetricBucket.objects.all()
+    if vendor_ids is not None:
+        pos = pos.filter(vendor_id__in=vendor_ids)
+        buckets = buckets.filter(vendor_id__in=vendor_ids)
+
+    totals = defaultdict(Counter)
+    for snapshot in pos.values(*PurchaseOrder.METRIC_FIELDS).iterator(chunk_size=2000):
+        for key, counter in bucket_contributions(snapshot).items():
+            totals[key].update(counter)
+
+    buckets.delete()
+    VendorMetricBucket.objects.bulk_create(
+        [VendorMetricBucket(vendor_id=vendor_id, day=day, **counter) for (vendor_id, day), counter in totals.items()],
+        batch_size=2000,
+    )
+    return len(totals)
@@ -0,0 +1,27 @@
+import { apiClient } from "./client";
+
+export interface BatchResult<T = unknown> {
+  path: string;
+  status: number;
+  body: T;
+  etag?: string;
+}
+
+/** Server-side cap on sub-requests per call (BATCH_MAX_REQUESTS). */
+export const BATCH_MAX_REQUESTS = 20;
+
+/**
+ * Run several GETs (paths relative to the API root, e.g. "/vendors/1/") in
+ * as few round trips as possible. Results come back in request order.
+ */
+export async function batchGet<T = unknown>(paths: string[]) {
+  const base = new URL(apiClient.defaults.baseURL ?? "/api", window.location.origin).pathname.replace(/\/$/, "");
+  const results: BatchResult<T>[] = [];
+  for (let start = 0; start < paths.length; start += BATCH_MAX_REQUESTS) {
+    const params = new URLSearchParams();
+    paths.slice(start, start + BATCH_MAX_REQUESTS).forEach((path) => params.append("path", base + path));
+    const res = await apiClient.get<{ results: BatchResult<T>[] }>("/batch/", { params });
+    results.push(...res.data.results);
+  }
+  return results;
+}
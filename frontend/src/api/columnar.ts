@@ -0,0 +1,27 @@
+import type { AxiosRequestConfig } from "axios";
+import type { PaginatedResponse } from "./vendors";
+
+/** Lists as `{columns, rows}`: key names are sent once instead of per row. */
+export const COLUMNAR_MEDIA_TYPE = "application/vnd.vendease.columnar+json";
+
+export interface Columnar {
+  columns: string[];
+  rows: unknown[][];
+}
+
+export function fromColumnar<T>(data: Columnar): T[] {
+  return data.rows.map(
+    (row) => Object.fromEntries(data.columns.map((column, i) => [column, row[i]])) as T
+  );
+}
+
+/** Request config for a paginated list fetched in columnar form. */
+export const columnarConfig: AxiosRequestConfig = {
+  headers: { Accept: COLUMNAR_MEDIA_TYPE },
+};
+
+export function decodeColumnarPage<T>(
+  data: Omit<PaginatedResponse<T>, "results"> & { results: Columnar }
+): PaginatedResponse<T> {
+  return { ...data, results: fromColumnar<T>(data.results) };
+}
@@ -0,0 +1,72 @@
+import { apiClient, getAccessToken } from "./client";
+import type { PurchaseOrder } from "./purchaseOrders";
+
+const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000/api";
+
+export interface VendorMetricsEvent {
+  vendor: number;
+  on_time_delivery_rate: number;
+  quality_rating_avg: number;
+  average_response_time: number;
+  fulfillment_rate: number;
+}
+
+export interface PurchaseOrderEventHandlers {
+  onCreated?: (po: PurchaseOrder) => void;
+  onStatusChanged?: (po: PurchaseOrder & { previous_status: string }) => void;
+  onDeleted?: (event: { id: number; vendor: number }) => void;
+  onVendorMetrics?: (event: VendorMetricsEvent) => void;
+}
+
+// Subscribe to server-sent PO and vendor metric events instead of polling.
+// Vendor users only receive events for their own purchase orders. The JWT is
+// exchanged for a short-lived stream ticket, so it never appears in a URL; a
+// server that cannot stream (WSGI) refuses the ticket and nothing is opened.
+// Returns an unsubscribe function.
+export function subscribeToPurchaseOrderEvents(handlers: PurchaseOrderEventHandlers) {
+  if (!getAccessToken() || typeof EventSource === "undefined") {
+    return () => {};
+  }
+
+  let source: EventSource | null = null;
+  let reconnect: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  const listen = <T>(event: string, handler?: (data: T) => void) => {
+    if (handler) {
+      source?.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+    }
+  };
+
+  const connect = async () => {
+    let ticket: string;
+    try {
+      ({ data: { ticket } } = await apiClient.post<{ ticket: string }>("/purchase_orders/events/ticket/"));
+    } catch {
+      // No streaming on this server (or not signed in): the page still works without pushed updates
+      return;
+    }
+    if (closed) {
+      return;
+    }
+    source = new EventSource(`${API_BASE_URL}/purchase_orders/events/?ticket=${encodeURIComponent(ticket)}`);
+    listen("po.created", handlers.onCreated);
+    listen("po.status_changed", handlers.onStatusChanged);
+    listen("po.deleted", handlers.onDeleted);
+    listen("vendor.metrics", handlers.onVendorMetrics);
+    source.onerror = () => {
+      // The browser reconnects with the same URL by itself, and gives up once
+      // the ticket has expired; fetch a new one then
+      if (source?.readyState === EventSource.CLOSED && !closed) {
+        reconnect = setTimeout(connect, 3000);
+      }
+    };
+  };
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(reconnect);
+    source?.close();
+  };
+}
@@ -0,0 +1,39 @@
+import { apiClient } from "./client";
+
+export type JobStatus = "pending" | "running" | "succeeded" | "failed";
+
+export interface MaintenanceJob {
+  id: number;
+  kind: "vendor_delete" | "po_purge";
+  status: JobStatus;
+  params: Record<string, unknown>;
+  total: number;
+  processed: number;
+  progress: number;
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+export async function getJob(id: number) {
+  const res = await apiClient.get<MaintenanceJob>(`/jobs/${id}/`);
+  return res.data;
+}
+
+/**
+ * Poll a background job until it finishes. Rejects if the job fails.
+ */
+export async function waitForJob(
+  id: number,
+  onProgress?: (job: MaintenanceJob) => void,
+  intervalMs = 1000
+) {
+  for (;;) {
+    const job = await getJob(id);
+    onProgress?.(job);
+    if (job.status === "succeeded") return job;
+    if (job.status === "failed") throw new Error(job.error || "Job failed");
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
@@ -22,7 +22,7 @@ export type PurchaseOrderPayload = Omit<
   "id" | "acknowledgment_date"
 >;
 
-import type { PaginatedResponse } from "./vendors";
+import { columnarConfig, decodeColumnarPage } from "./columnar";
 
 export interface PurchaseOrderQuery {
   vendor?: number;
@@ -30,13 +30,11 @@ export interface PurchaseOrderQuery {
 }
 
 export async function listPurchaseOrders(params?: PurchaseOrderQuery) {
-  const res = await apiClient.get<PaginatedResponse<PurchaseOrder>>(
-    "/purchase_orders/",
-    {
-      params,
-    }
-  );
-  return res.data;
+  const res = await apiClient.get("/purchase_orders/", {
+    ...columnarConfig,
+    params,
+  });
+  return decodeColumnarPage<PurchaseOrder>(res.data);
 }
 
 export async function getPurchaseOrder(id: number) {
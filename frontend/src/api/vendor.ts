@@ -9,3 +9,26 @@ export async function getVendorProfile() {
   return res.data;
 }
 
+
+export interface VendorSummary {
+  id: number;
+  name: string;
+  vendor_code: string;
+  on_time_delivery_rate: number;
+  quality_rating_avg: number;
+  average_response_time: number;
+  fulfillment_rate: number;
+  purchase_orders: {
+    total: number;
+    pending: number;
+    acknowledged: number;
+    completed: number;
+    canceled: number;
+  };
+}
+
+export async function getVendorSummary() {
+  // Metrics and PO counts by status, maintained server-side
+  const res = await apiClient.get<VendorSummary>("/vendor/summary/");
+  return res.data;
+}
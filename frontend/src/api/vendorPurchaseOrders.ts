@@ -1,15 +1,13 @@
 import { apiClient } from "./client";
 import type { PurchaseOrder } from "./purchaseOrders";
-import type { PaginatedResponse } from "./vendors";
+import { columnarConfig, decodeColumnarPage } from "./columnar";
 
 export async function listVendorPurchaseOrders(page?: number) {
-  const res = await apiClient.get<PaginatedResponse<PurchaseOrder>>(
-    "/vendor/purchase_orders/",
-    {
-      params: page ? { page } : undefined,
-    }
-  );
-  return res.data;
+  const res = await apiClient.get("/vendor/purchase_orders/", {
+    ...columnarConfig,
+    params: page ? { page } : undefined,
+  });
+  return decodeColumnarPage<PurchaseOrder>(res.data);
 }
 
 export async function getVendorPurchaseOrder(id: number) {
@@ -1,4 +1,5 @@
 import { apiClient } from "./client";
+import type { MaintenanceJob } from "./jobs";
 
 export interface Vendor {
   id: number;
@@ -26,6 +27,8 @@ export interface PaginatedResponse<T> {
   next: string | null;
   previous: string | null;
   results: T[];
+  /** True when `count` is a planner estimate (very large, unfiltered lists). */
+  count_is_estimate?: boolean;
 }
 
 export interface ListVendorsParams {
@@ -39,6 +42,15 @@ export async function listVendors(params?: ListVendorsParams) {
   return res.data;
 }
 
+/** Fetch specific vendors in one request (at most 200 ids). */
+export async function getVendorsByIds(ids: number[]) {
+  if (!ids.length) return [];
+  const res = await apiClient.get<PaginatedResponse<Vendor>>("/vendors/", {
+    params: { ids: ids.join(",") },
+  });
+  return res.data.results;
+}
+
 export async function createVendor(data: VendorPayload) {
   const res = await apiClient.post<Vendor>("/vendors/", data);
   return res.data;
@@ -49,8 +61,10 @@ export async function updateVendor(id: number, data: VendorPayload) {
   return res.data;
 }
 
+/** Schedules deletion in the background; wait on the returned job. */
 export async function deleteVendor(id: number) {
-  await apiClient.delete(`/vendors/${id}/`);
+  const res = await apiClient.delete<MaintenanceJob>(`/vendors/${id}/`);
+  return res.data;
 }
 
 export interface VendorRegistrationPayload {
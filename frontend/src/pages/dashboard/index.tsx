@@ -1,7 +1,8 @@
 import { useEffect, useState } from "react";
+import { batchGet } from "@/api/batch";
 import { listVendors } from "@/api/vendors";
 import { listPurchaseOrders } from "@/api/purchaseOrders";
-import type { Vendor } from "@/api/vendors";
+import type { PaginatedResponse, Vendor } from "@/api/vendors";
 import type { PurchaseOrder } from "@/api/purchaseOrders";
 import {
   Card,
@@ -50,25 +51,21 @@ export function DashboardPage() {
           listVendors({ page: 1 }),
           listPurchaseOrders({ page: 1 }),
         ]);
-        setVendors(vsData.results);
-        setPurchaseOrders(posData.results);
-        // If there are more pages, fetch them (for dashboard we want all data)
-        if (vsData.count > 10) {
-          const allVendors = [...vsData.results];
-          for (let page = 2; page <= Math.ceil(vsData.count / 10); page++) {
-            const pageData = await listVendors({ page });
-            allVendors.push(...pageData.results);
-          }
-          setVendors(allVendors);
+        // Fetch every remaining page of both lists in one batched round trip.
+        const pageCount = (count: number) => Math.ceil(count / 10);
+        const vendorPaths: string[] = [];
+        for (let page = 2; page <= pageCount(vsData.count); page++) {
+          vendorPaths.push(`/vendors/?page=${page}`);
         }
-        if (posData.count > 10) {
-          const allPOs = [...posData.results];
-          for (let page = 2; page <= Math.ceil(posData.count / 10); page++) {
-            const pageData = await listPurchaseOrders({ page });
-            allPOs.push(...pageData.results);
-          }
-          setPurchaseOrders(allPOs);
+        const poPaths: string[] = [];
+        for (let page = 2; page <= pageCount(posData.count); page++) {
+          poPaths.push(`/purchase_orders/?page=${page}`);
         }
+        const rest = await batchGet<PaginatedResponse<Vendor | PurchaseOrder>>([...vendorPaths, ...poPaths]);
+        const pages = (results: typeof rest) =>
+          results.filter((r) => r.status === 200).flatMap((r) => r.body.results);
+        setVendors([...vsData.results, ...(pages(rest.slice(0, vendorPaths.length)) as Vendor[])]);
+        setPurchaseOrders([...posData.results, ...(pages(rest.slice(vendorPaths.length)) as PurchaseOrder[])]);
       } catch (err) {
         console.error(err);
       } finally {
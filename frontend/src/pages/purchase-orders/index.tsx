@@ -10,7 +10,7 @@ import {
   type PurchaseOrderPayload,
   type POStatus,
 } from "@/api/purchaseOrders";
-import { listVendors, type Vendor } from "@/api/vendors";
+import { getVendorsByIds, listVendors, type Vendor } from "@/api/vendors";
 import {
   Card,
   CardContent,
@@ -118,7 +118,10 @@ export function PurchaseOrdersPage() {
         ]);
         setPurchaseOrders(posData.results);
         setTotalPages(Math.ceil(posData.count / 10));
-        setVendors(vsData.results);
+        // Vendors on this page that aren't on the first vendor page, in one multi-get.
+        const known = new Set(vsData.results.map((v) => v.id));
+        const missing = [...new Set(posData.results.map((po) => po.vendor))].filter((id) => !known.has(id));
+        setVendors([...vsData.results, ...(await getVendorsByIds(missing))]);
       } catch (err) {
         console.error(err);
         setError("Failed to load purchase orders. Please try again.");
@@ -8,6 +8,7 @@ import {
   type Vendor,
   type VendorPayload,
 } from "@/api/vendors";
+import { waitForJob } from "@/api/jobs";
 import {
   Card,
   CardContent,
@@ -162,7 +163,8 @@ export function VendorsPage() {
     try {
       setError(null);
       setSuccess(null);
-      await deleteVendor(vendorToDelete.id);
+      const job = await deleteVendor(vendorToDelete.id);
+      await waitForJob(job.id);
       if (selectedVendorId === vendorToDelete.id) {
         handleResetForm();
       }